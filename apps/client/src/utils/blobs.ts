@@ -0,0 +1,56 @@
+// Large payload fields arrive as blob references:
+//   {"$blob": "sha256:<hex>", "size": <bytes>, "preview": "<first chars>"}
+// Their content is fetched from the server on demand.
+
+const BLOB_URL = 'http://localhost:4000/blobs/';
+
+export interface BlobRef {
+  $blob: string;
+  size?: number;
+  preview?: string;
+}
+
+// Blob content never changes for a hash, so fetches are shared and kept
+const contentCache = new Map<string, Promise<string | null>>();
+
+export function isBlobRef(value: unknown): value is BlobRef {
+  return typeof value === 'object' && value !== null && typeof (value as BlobRef).$blob === 'string';
+}
+
+export function hasBlobRefs(value: unknown): boolean {
+  if (isBlobRef(value)) return true;
+  if (Array.isArray(value)) return value.some(hasBlobRefs);
+  if (typeof value === 'object' && value !== null) return Object.values(value).some(hasBlobRefs);
+  return false;
+}
+
+export function fetchBlob(ref: string): Promise<string | null> {
+  const hash = ref.split(':').pop() as string;
+  let content = contentCache.get(hash);
+  if (!content) {
+    content = fetch(BLOB_URL + hash)
+      .then(response => (response.ok ? response.text() : null))
+      .catch(() => null);
+    // A failed fetch is retried the next time the event is opened
+    content.then(text => { if (text === null) contentCache.delete(hash); });
+    contentCache.set(hash, content);
+  }
+  return content;
+}
+
+// A copy of value with every blob reference replaced by its content;
+// references the server cannot resolve are left as they are
+export async function resolveBlobs(value: any): Promise<any> {
+  if (isBlobRef(value)) {
+    const content = await fetchBlob(value.$blob);
+    return content === null ? value : content;
+  }
+  if (Array.isArray(value)) return Promise.all(value.map(resolveBlobs));
+  if (typeof value === 'object' && value !== null) {
+    const entries = await Promise.all(
+      Object.entries(value).map(async ([key, item]) => [key, await resolveBlobs(item)] as const)
+    );
+    return Object.fromEntries(entries);
+  }
+  return value;
+}
@@ -1,5 +1,5 @@
 import { Database } from 'bun:sqlite';
-import type { HookEvent, FilterOptions, Theme, ThemeSearchQuery } from './types';
+import type { HookEvent, FilterOptions, EventPageQuery, Theme, ThemeSearchQuery } from './types';
 
 let db: Database;
 
@@ -47,6 +47,16 @@ export function initDatabase(): void {
   db.exec('CREATE INDEX IF NOT EXISTS idx_hook_event_type ON events(hook_event_type)');
   db.exec('CREATE INDEX IF NOT EXISTS idx_timestamp ON events(timestamp)');
   
+  // Content of large payload fields, referenced from events as {"$blob": "sha256:<hex>"}
+  db.exec(`
+    CREATE TABLE IF NOT EXISTS blobs (
+      hash TEXT PRIMARY KEY,
+      content TEXT NOT NULL,
+      size INTEGER NOT NULL,
+      createdAt INTEGER NOT NULL
+    )
+  `);
+  
   // Create themes table
   db.exec(`
     CREATE TABLE IF NOT EXISTS themes (
@@ -162,6 +172,76 @@ export function getRecentEvents(limit: number = 100): HookEvent[] {
   })).reverse();
 }
 
+export function getLatestEventId(): number {
+  const row = db.prepare('SELECT MAX(id) AS id FROM events').get() as { id: number | null };
+  return row.id || 0;
+}
+
+export function hasBlob(hash: string): boolean {
+  return db.prepare('SELECT 1 FROM blobs WHERE hash = ?').get(hash) != null;
+}
+
+export function getBlob(hash: string): string | null {
+  const row = db.prepare('SELECT content FROM blobs WHERE hash = ?').get(hash) as { content: string } | null;
+  return row ? row.content : null;
+}
+
+// Blobs are content-addressed, so storing one twice is a no-op
+export function insertBlob(hash: string, content: string): void {
+  db.prepare('INSERT OR IGNORE INTO blobs (hash, content, size, createdAt) VALUES (?, ?, ?, ?)')
+    .run(hash, content, Buffer.byteLength(content, 'utf8'), Date.now());
+}
+
+export function getEventsPage(query: EventPageQuery): HookEvent[] {
+  const conditions: string[] = [];
+  const params: (string | number)[] = [];
+
+  if (query.afterId !== undefined) {
+    conditions.push('id > ?');
+    params.push(query.afterId);
+  }
+  if (query.beforeId !== undefined) {
+    conditions.push('id < ?');
+    params.push(query.beforeId);
+  }
+  if (query.sourceApp) {
+    conditions.push('source_app = ?');
+    params.push(query.sourceApp);
+  }
+  if (query.sessionId) {
+    conditions.push('session_id = ?');
+    params.push(query.sessionId);
+  }
+  if (query.hookEventType) {
+    conditions.push('hook_event_type = ?');
+    params.push(query.hookEventType);
+  }
+
+  // Paging backwards from before_id walks ids downwards; results are always returned oldest first
+  const descending = query.beforeId !== undefined && query.afterId === undefined;
+  const where = conditions.length ? `WHERE ${conditions.join(' AND ')}` : '';
+  const stmt = db.prepare(`
+    SELECT id, source_app, session_id, hook_event_type, payload, chat, summary, timestamp
+    FROM events
+    ${where}
+    ORDER BY id ${descending ? 'DESC' : 'ASC'}
+    LIMIT ?
+  `);
+
+  const rows = stmt.all(...params, query.limit) as any[];
+  const events = rows.map(row => ({
+    id: row.id,
+    source_app: row.source_app,
+    session_id: row.session_id,
+    hook_event_type: row.hook_event_type,
+    payload: JSON.parse(row.payload),
+    chat: row.chat ? JSON.parse(row.chat) : undefined,
+    summary: row.summary || undefined,
+    timestamp: row.timestamp
+  }));
+  return descending ? events.reverse() : events;
+}
+
 // Theme database functions
 export function insertTheme(theme: Theme): Theme {
   const stmt = db.prepare(`
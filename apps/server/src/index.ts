@@ -1,4 +1,4 @@
-import { initDatabase, insertEvent, getFilterOptions, getRecentEvents } from './db';
+import { initDatabase, insertEvent, getFilterOptions, getRecentEvents, getEventsPage, getLatestEventId, hasBlob, getBlob, insertBlob } from './db';
 import type { HookEvent } from './types';
 import { 
   createTheme, 
@@ -27,8 +27,17 @@ const server = Bun.serve({
     // Handle CORS
     const headers = {
       'Access-Control-Allow-Origin': '*',
-      'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-      'Access-Control-Allow-Headers': 'Content-Type',
+      'Access-Control-Allow-Methods': 'GET, HEAD, POST, PUT, DELETE, OPTIONS',
+      'Access-Control-Allow-Headers': 'Content-Type, If-None-Match',
+      'Access-Control-Expose-Headers': 'ETag',
+    };
+
+    // Events are append-only, so the latest id versions every event listing
+    const notModified = (etag: string) => {
+      if (req.headers.get('If-None-Match') === etag) {
+        return new Response(null, { status: 304, headers: { ...headers, ETag: etag } });
+      }
+      return null;
     };
     
     // Handle preflight
@@ -77,21 +86,94 @@ const server = Bun.serve({
     
     // GET /events/filter-options - Get available filter options
     if (url.pathname === '/events/filter-options' && req.method === 'GET') {
+      const etag = `"${getLatestEventId()}"`;
+      const cached = notModified(etag);
+      if (cached) return cached;
+
       const options = getFilterOptions();
       return new Response(JSON.stringify(options), {
-        headers: { ...headers, 'Content-Type': 'application/json' }
+        headers: { ...headers, 'Content-Type': 'application/json', ETag: etag }
       });
     }
     
     // GET /events/recent - Get recent events
     if (url.pathname === '/events/recent' && req.method === 'GET') {
+      const etag = `"${getLatestEventId()}"`;
+      const cached = notModified(etag);
+      if (cached) return cached;
+
       const limit = parseInt(url.searchParams.get('limit') || '100');
       const events = getRecentEvents(limit);
       return new Response(JSON.stringify(events), {
-        headers: { ...headers, 'Content-Type': 'application/json' }
+        headers: { ...headers, 'Content-Type': 'application/json', ETag: etag }
       });
     }
     
+    // GET /events - Page through events by id (keyset pagination)
+    // ?after_id=N returns the events after N, ?before_id=N the events before N,
+    // optionally filtered by source_app, session_id and hook_event_type; oldest first
+    if (url.pathname === '/events' && req.method === 'GET') {
+      const etag = `"${getLatestEventId()}"`;
+      const cached = notModified(etag);
+      if (cached) return cached;
+
+      const afterId = url.searchParams.get('after_id');
+      const beforeId = url.searchParams.get('before_id');
+      const limit = Math.min(parseInt(url.searchParams.get('limit') || '100'), 1000);
+      const events = getEventsPage({
+        afterId: afterId !== null ? parseInt(afterId) : undefined,
+        beforeId: beforeId !== null ? parseInt(beforeId) : undefined,
+        limit,
+        sourceApp: url.searchParams.get('source_app') || undefined,
+        sessionId: url.searchParams.get('session_id') || undefined,
+        hookEventType: url.searchParams.get('hook_event_type') || undefined,
+      });
+      return new Response(JSON.stringify(events), {
+        headers: { ...headers, 'Content-Type': 'application/json', ETag: etag }
+      });
+    }
+    
+    // Blobs: content of large payload fields, which events carry as {"$blob": "sha256:<hex>"}
+    // PUT /blobs/:hash stores content (the hooks upload it before the event),
+    // HEAD /blobs/:hash checks for it, GET /blobs/:hash returns it
+    const blobMatch = url.pathname.match(/^\/blobs\/(?:sha256:)?([0-9a-f]{64})$/);
+    if (blobMatch) {
+      const hash = blobMatch[1];
+      // Content never changes for a hash
+      const blobHeaders = { ...headers, 'Cache-Control': 'public, max-age=31536000, immutable' };
+
+      if (req.method === 'HEAD') {
+        return new Response(null, { status: hasBlob(hash) ? 200 : 404, headers: blobHeaders });
+      }
+
+      if (req.method === 'GET') {
+        const content = getBlob(hash);
+        if (content === null) {
+          return new Response(JSON.stringify({ error: 'Blob not found' }), {
+            status: 404,
+            headers: { ...headers, 'Content-Type': 'application/json' }
+          });
+        }
+        return new Response(content, {
+          headers: { ...blobHeaders, 'Content-Type': 'text/plain; charset=utf-8' }
+        });
+      }
+
+      if (req.method === 'PUT') {
+        const content = await req.text();
+        const actual = new Bun.CryptoHasher('sha256').update(content).digest('hex');
+        if (actual !== hash) {
+          return new Response(JSON.stringify({ error: 'Content does not match hash' }), {
+            status: 400,
+            headers: { ...headers, 'Content-Type': 'application/json' }
+          });
+        }
+        const existed = hasBlob(hash);
+        insertBlob(hash, content);
+        return new Response(null, { status: existed ? 200 : 201, headers });
+      }
+    }
+    
     // Theme API endpoints
     
     // POST /api/themes - Create a new theme
@@ -311,4 +393,5 @@ const server = Bun.serve({
 
 console.log(`🚀 Server running on http://localhost:${server.port}`);
 console.log(`📊 WebSocket endpoint: ws://localhost:${server.port}/stream`);
-console.log(`📮 POST events to: http://localhost:${server.port}/events`);
\ No newline at end of file
+console.log(`📮 POST events to: http://localhost:${server.port}/events`);
+console.log(`🗄️  Blobs at: http://localhost:${server.port}/blobs/:hash`);
\ No newline at end of file
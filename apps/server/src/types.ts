@@ -15,6 +15,15 @@ export interface FilterOptions {
   hook_event_types: string[];
 }
 
+export interface EventPageQuery {
+  afterId?: number;
+  beforeId?: number;
+  limit: number;
+  sourceApp?: string;
+  sessionId?: string;
+  hookEventType?: string;
+}
+
 // Theme-related interfaces for server-side storage and API
 export interface ThemeColors {
   primary: string;
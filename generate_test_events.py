@@ -1,109 +1,347 @@
 #!/usr/bin/env python3
 """
-Generate test events for multi-agent observability dashboard
+Load generator for the multi-agent observability server
+
+Simulates concurrent agents posting hook events to POST /events in the
+server's schema (source_app, session_id, hook_event_type, payload). Each
+agent runs sessions of a prompt followed by Pre/PostToolUse pairs with a
+realistic tool mix and log-normal response sizes, the occasional
+notification, and a Stop.
+
+Load is open-loop: events are scheduled at the target rate regardless of
+how fast the server answers, and latency is measured from each event's
+scheduled time, so a slow server shows up as latency rather than as a
+lower send rate.
+
+Usage:
+- ./generate_test_events.py                                  # 10 agents, 50 events/s for 10s
+- ./generate_test_events.py --agents 50 --rate 1000 --duration 60
+- ./generate_test_events.py --events 25 --rate 5             # Fill a dashboard with a few events
+- ./generate_test_events.py --output report.json
+
+Prints a JSON report: throughput, error rate and latency percentiles.
 """
 
-import requests
+import argparse
+import asyncio
 import json
-import time
+import math
 import random
-from datetime import datetime
+import sys
+import time
+import uuid
+from collections import Counter
+from urllib.parse import urlsplit
 
 # Server endpoint
 SERVER_URL = "http://localhost:4000"
 
-def send_event(event_data):
-    """Send event to observability server"""
-    try:
-        response = requests.post(f"{SERVER_URL}/events", json=event_data)
-        print(f"✅ Sent event: {event_data['type']} - Response: {response.status_code}")
-        return response.status_code == 200
-    except Exception as e:
-        print(f"❌ Error sending event: {e}")
-        return False
-
-def generate_test_events():
-    """Generate various test events"""
-    
-    agents = ["primary-agent", "code-reviewer", "planner", "coder", "tester"]
-    tools = ["Write", "Read", "Bash", "Edit", "MultiEdit"]
-    
-    events = []
-    
-    # Generate some PreToolUse events
-    for i in range(10):
-        agent = random.choice(agents)
-        tool = random.choice(tools)
-        
-        event = {
-            "type": "PreToolUse",
-            "timestamp": datetime.now().isoformat(),
-            "agent_name": agent,
-            "data": {
-                "tool_name": tool,
-                "tool_input": f"Test input for {tool} #{i}",
-                "session_id": f"session_{random.randint(1000, 9999)}"
-            }
-        }
-        events.append(event)
-        
-        # Add corresponding PostToolUse event
-        time.sleep(0.1)
-        post_event = {
-            "type": "PostToolUse",
-            "timestamp": datetime.now().isoformat(),
-            "agent_name": agent,
-            "data": {
-                "tool_name": tool,
-                "success": random.choice([True, True, True, False]),  # Mostly successful
-                "duration_ms": random.randint(100, 2000),
-                "session_id": f"session_{random.randint(1000, 9999)}"
-            }
+# Share of tool calls per tool, roughly as seen in coding sessions
+TOOL_MIX = {
+    "Read": 30, "Bash": 20, "Edit": 15, "Grep": 10, "Glob": 8,
+    "Write": 6, "TodoWrite": 5, "MultiEdit": 3, "WebFetch": 2, "Task": 1,
+}
+# Median tool response size in bytes; sizes are log-normal around it
+RESPONSE_MEDIAN_BYTES = {
+    "Read": 6000, "Bash": 1500, "Edit": 800, "Grep": 2500, "Glob": 1200,
+    "Write": 300, "TodoWrite": 400, "MultiEdit": 1200, "WebFetch": 12000, "Task": 4000,
+}
+RESPONSE_SIGMA = 1.2
+
+AGENT_NAMES = ["primary-agent", "code-reviewer", "planner", "coder", "tester", "researcher"]
+PROMPTS = ["Fix the failing tests", "Add input validation to the API", "Refactor the session log writer",
+           "Review the last commit", "Update the README examples"]
+NOTIFICATIONS = ["Claude needs your permission to use Bash", "Claude is waiting for your input"]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Agent:
+    """One simulated agent producing the hook events of successive sessions."""
+
+    def __init__(self, name, source_app, rng, max_payload_bytes):
+        self.name = name
+        self.source_app = source_app
+        self.rng = rng
+        self.max_payload_bytes = max_payload_bytes
+        self.tools = list(TOOL_MIX)
+        self.weights = list(TOOL_MIX.values())
+        self._pending = []
+        self._new_session()
+
+    def _new_session(self):
+        self.session_id = str(uuid.UUID(int=self.rng.getrandbits(128)))
+        self.calls_left = self.rng.randint(5, 40)
+        self._pending.append(("UserPromptSubmit", {"prompt": self.rng.choice(PROMPTS)}))
+
+    def _tool_call(self):
+        tool = self.rng.choices(self.tools, self.weights)[0]
+        tool_use_id = f"toolu_{self.rng.getrandbits(64):016x}"
+        tool_input = self._tool_input(tool)
+        size = int(self.rng.lognormvariate(math.log(RESPONSE_MEDIAN_BYTES[tool]), RESPONSE_SIGMA))
+        size = min(size, self.max_payload_bytes)
+        failed = self.rng.random() < 0.04
+        response = {"stdout": "x" * size, "stderr": "error: exit 1" if failed else "", "interrupted": False}
+        duration_ms = int(self.rng.lognormvariate(math.log(120), 1.0))
+        base = {"tool_name": tool, "tool_input": tool_input, "tool_use_id": tool_use_id}
+        self._pending.append(("PreToolUse", dict(base)))
+        self._pending.append(("PostToolUse", dict(base, tool_response=response, duration_ms=duration_ms,
+                                                  outcome="error" if failed else "success",
+                                                  response_bytes=size)))
+
+    def _tool_input(self, tool):
+        n = self.rng.randint(1, 500)
+        if tool == "Bash":
+            return {"command": self.rng.choice(["pytest -q", "git status", "ls -la", "npm test"]) + f" # {n}"}
+        if tool in ("Grep", "Glob"):
+            return {"pattern": f"def handler_{n}" if tool == "Grep" else f"src/**/*_{n}.py"}
+        if tool == "WebFetch":
+            return {"url": f"https://example.com/docs/{n}", "prompt": "Summarize"}
+        if tool == "Task":
+            return {"description": f"Subtask {n}", "prompt": "Investigate the failure"}
+        return {"file_path": f"/project/src/module_{n}.py"}
+
+    def next_event(self, now_ms):
+        """The agent's next event, in the schema POST /events expects."""
+        if not self._pending:
+            if self.calls_left <= 0:
+                self._pending.append(("Stop", {"stop_hook_active": False, "_session_id": self.session_id}))
+                self._new_session()
+            elif self.rng.random() < 0.03:
+                self._pending.append(("Notification", {"message": self.rng.choice(NOTIFICATIONS)}))
+            elif self.rng.random() < 0.02:
+                self._pending.append(("SubagentStop", {"stop_hook_active": False}))
+            else:
+                self.calls_left -= 1
+                self._tool_call()
+        event_type, fields = self._pending.pop(0)
+        # Stop is queued before the next session starts, so it keeps its own session id
+        session_id = fields.pop("_session_id", self.session_id)
+        payload = dict(fields, session_id=session_id, hook_event_name=event_type,
+                       transcript_path=f"/home/{self.name}/.claude/projects/{session_id}.jsonl")
+        return {
+            "source_app": self.source_app,
+            "session_id": session_id,
+            "hook_event_type": event_type,
+            "payload": payload,
+            "timestamp": now_ms,
         }
-        events.append(post_event)
-    
-    # Generate SubagentStop events
-    for i in range(5):
-        agent = random.choice(agents)
-        event = {
-            "type": "SubagentStop",
-            "timestamp": datetime.now().isoformat(),
-            "agent_name": agent,
-            "data": {
-                "reason": random.choice(["task_completed", "user_interrupt", "error"]),
-                "session_id": f"session_{random.randint(1000, 9999)}"
-            }
+
+
+class HTTPPool:
+    """Minimal asyncio HTTP/1.1 client with a bounded pool of kept-alive connections."""
+
+    def __init__(self, base_url, size, timeout):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 80
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+        self.opened = 0
+
+    async def _open(self):
+        self.opened += 1
+        return await asyncio.open_connection(self.host, self.port)
+
+    async def post_json(self, path, body):
+        """
+        POST a body once a connection is free.
+
+        Returns:
+            (status code, seconds from getting the connection to the response)
+
+        Raises:
+            OSError, asyncio.IncompleteReadError on connection errors,
+            asyncio.TimeoutError after the timeout
+        """
+        async with self._slots:
+            started = time.perf_counter()
+            conn = self._idle.pop() if self._idle else None
+            reused = conn is not None
+            try:
+                status = await asyncio.wait_for(self._exchange(conn or await self._open(), path, body),
+                                                self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if not reused:
+                    raise
+                # The server closed an idle connection; retry once on a new one
+                status = await asyncio.wait_for(self._exchange(await self._open(), path, body), self.timeout)
+            return status, time.perf_counter() - started
+
+    async def _exchange(self, conn, path, body):
+        reader, writer = conn
+        try:
+            writer.write((f"POST {self.base_path}{path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode()
+                         + body)
+            status_line = await reader.readuntil(b"\r\n")
+            status = int(status_line.split()[1])
+            headers = {}
+            while True:
+                line = await reader.readuntil(b"\r\n")
+                if line == b"\r\n":
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if "content-length" in headers:
+                await reader.readexactly(int(headers["content-length"]))
+            elif headers.get("transfer-encoding", "").lower() == "chunked":
+                while True:
+                    chunk_size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                    await reader.readexactly(chunk_size + 2)
+                    if chunk_size == 0:
+                        break
+            else:
+                await reader.read()
+                headers["connection"] = "close"
+        except BaseException:
+            writer.close()
+            raise
+        if headers.get("connection", "").lower() == "close":
+            writer.close()
+        else:
+            self._idle.append(conn)
+        return status
+
+    def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+async def run_load(args):
+    rng = random.Random(args.seed)
+    agents = [Agent(f"{AGENT_NAMES[i % len(AGENT_NAMES)]}-{i}", args.source_app, rng, args.max_payload_kb * 1024)
+              for i in range(args.agents)]
+    pool = HTTPPool(args.server, args.connections, args.timeout)
+    total = args.events if args.events else int(args.rate * args.duration)
+
+    latencies = []
+    service_times = []
+    errors = Counter()
+    event_types = Counter()
+    bytes_sent = 0
+    late_starts = 0
+    in_flight = set()
+
+    async def send(body, scheduled):
+        nonlocal late_starts
+        # The generator could not keep its schedule; the results understate the offered load
+        if time.perf_counter() - scheduled > 0.1:
+            late_starts += 1
+        try:
+            status, service_time = await pool.post_json("/events", body)
+            service_times.append(service_time * 1000)
+            if status != 200:
+                errors[f"http_{status}"] += 1
+        except asyncio.TimeoutError:
+            errors["timeout"] += 1
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+            errors[e.__class__.__name__] += 1
+        latencies.append((time.perf_counter() - scheduled) * 1000)
+
+    loop_start = time.perf_counter()
+    scheduled = loop_start
+    for i in range(total):
+        if args.arrival == "poisson":
+            scheduled += rng.expovariate(args.rate)
+        else:
+            scheduled = loop_start + i / args.rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        event = agents[i % len(agents)].next_event(int(time.time() * 1000))
+        body = json.dumps(event).encode()
+        bytes_sent += len(body)
+        event_types[event["hook_event_type"]] += 1
+        task = asyncio.ensure_future(send(body, scheduled))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        if args.progress and i and i % max(1, int(args.rate)) == 0:
+            print(f"... {i}/{total} scheduled, {len(in_flight)} in flight, "
+                  f"{sum(errors.values())} errors", file=sys.stderr)
+    send_end = time.perf_counter()
+    if in_flight:
+        await asyncio.wait(in_flight)
+    elapsed = time.perf_counter() - loop_start
+    pool.close()
+
+    latencies.sort()
+    service_times.sort()
+    error_count = sum(errors.values())
+    completed = len(latencies)
+
+    def summary(values):
+        return {
+            "p50": round(percentile(values, 0.50), 2) if values else None,
+            "p90": round(percentile(values, 0.90), 2) if values else None,
+            "p99": round(percentile(values, 0.99), 2) if values else None,
+            "max": round(values[-1], 2) if values else None,
+            "mean": round(sum(values) / len(values), 2) if values else None,
         }
-        events.append(event)
-    
-    return events
+
+    return {
+        "server": args.server,
+        "agents": args.agents,
+        "connections": args.connections,
+        "arrival": args.arrival,
+        "target_rate": args.rate,
+        "events": total,
+        "completed": completed,
+        "succeeded": completed - error_count,
+        "errors": dict(errors),
+        "error_rate": round(error_count / completed, 4) if completed else None,
+        "duration_s": round(elapsed, 3),
+        "offered_rate": round(total / (send_end - loop_start), 1) if send_end > loop_start else None,
+        "throughput": round((completed - error_count) / elapsed, 1) if elapsed else None,
+        "late_starts": late_starts,
+        "bytes_sent": bytes_sent,
+        "connections_opened": pool.opened,
+        "event_types": dict(event_types),
+        # From each event's scheduled time, including time queued for a connection
+        "latency_ms": summary(latencies),
+        # From getting a connection to the response, for the requests answered
+        "service_ms": summary(service_times),
+    }
+
 
 def main():
-    print("🧪 Generating Test Events for Multi-Agent Observability Dashboard")
-    print("=" * 60)
-    
-    # Check if server is running
-    try:
-        response = requests.get(f"{SERVER_URL}/")
-        print(f"✅ Server is running: {response.text.strip()}")
-    except Exception as e:
-        print(f"❌ Server not accessible: {e}")
-        return
-    
-    # Generate and send events
-    events = generate_test_events()
-    
-    print(f"\n📤 Sending {len(events)} test events...")
-    
-    successful = 0
-    for event in events:
-        if send_event(event):
-            successful += 1
-        time.sleep(0.2)  # Small delay between events
-    
-    print(f"\n📊 Results: {successful}/{len(events)} events sent successfully")
-    print(f"🌐 Check dashboard at: http://localhost:4000")
-    print(f"🔍 API test: curl http://localhost:4000/api/events/recent")
+    parser = argparse.ArgumentParser(description="Generate hook event load for the observability server")
+    parser.add_argument("--server", default=SERVER_URL, help="Server origin (default: %(default)s)")
+    parser.add_argument("--source-app", default="load-test", help="source_app of the generated events")
+    parser.add_argument("--agents", type=int, default=10, help="Concurrent simulated agents")
+    parser.add_argument("--rate", type=float, default=50.0, help="Target events per second, all agents together")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    parser.add_argument("--events", type=int, help="Send this many events instead of --duration worth")
+    parser.add_argument("--arrival", choices=["uniform", "poisson"], default="poisson",
+                        help="Spacing of events at the target rate")
+    parser.add_argument("--connections", type=int, default=64, help="Maximum concurrent connections")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument("--max-payload-kb", type=int, default=512, help="Cap on tool response sizes")
+    parser.add_argument("--seed", type=int, help="Random seed, for repeatable event streams")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--progress", action="store_true", help="Print progress to stderr every second")
+    args = parser.parse_args()
+
+    if args.rate <= 0 or args.agents <= 0 or args.connections <= 0:
+        parser.error("--rate, --agents and --connections must be positive")
+
+    report = asyncio.run(run_load(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    sys.exit(1 if report["completed"] and report["succeeded"] == 0 else 0)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "anthropic",
+#     "orjson",
+#     "python-dotenv",
+# ]
+# ///
+
+"""
+Single entry point that runs every configured handler for a hook event.
+
+Instead of one process per handler, each parsing the same stdin:
+
+    uv run .claude/hooks/dispatch.py PostToolUse --log --send --summarize \\
+        --source-app cc-hook-multi-agent-obvs
+
+reads stdin once and runs the selected handlers in-process. Blocking
+handlers (--guard, --validate) run first, on the raw bytes: they decode
+only the fields they check (utils/json_select.py), so a multi-MB Write
+is not decoded before the allow/block decision. Stdin is then decoded
+once for the remaining handlers, which are independent and run
+concurrently in threads under the hook deadline of utils/side_effects.py.
+TTS, chat export and digest folds are handed to a detached worker that
+runs them after the hook has exited.
+
+Exit codes are merged the way Claude Code reads them: 2 if any handler
+blocked (its message is already on stderr), otherwise the first non-zero
+code, otherwise 0.
+"""
+
+import argparse
+import json
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from utils import codec, metrics, profiling, rollup, side_effects, tracing
+
+# Handlers that can block the event, run before everything else on the raw stdin bytes
+BLOCKING_HANDLERS = ('guard', 'validate')
+# Independent handlers, run concurrently
+HANDLERS = ('log', 'chat', 'notify', 'announce', 'send', 'session_summary', 'digest', 'archive')
+
+
+def log_name_for(event_type):
+    """Map an event type to its session log file, e.g. PreToolUse -> pre_tool_use.json."""
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', event_type).lower() + '.json'
+
+
+def handle_guard(raw, args):
+    """Block dangerous tool calls (PreToolUse), decoding only the fields the checks read."""
+    from pre_tool_use import check_tool_call, select_guard_input
+
+    block_messages = check_tool_call(*select_guard_input(raw))
+    for message in block_messages:
+        print(message, file=sys.stderr)
+    return 2 if block_messages else 0
+
+
+def handle_validate(raw, args):
+    """Block prompts that fail validation (UserPromptSubmit)."""
+    from user_prompt_submit import validate_prompt
+    from utils.json_select import select
+
+    is_valid, reason = validate_prompt(select(raw, ['prompt']).get('prompt', ''))
+    if not is_valid:
+        print(f"Prompt blocked: {reason}", file=sys.stderr)
+        return 2
+    return 0
+
+
+def handle_log(input_data, args):
+    """Append the event to its session log."""
+    from utils.session_log import append_session_log
+
+    append_session_log(input_data.get('session_id', 'unknown'), log_name_for(args.event_type), input_data)
+    return 0
+
+
+def handle_chat(input_data, args):
+    """Copy the transcript to the session's chat.json (Stop, SubagentStop), after the hook exits."""
+    from stop import export_chat
+    from utils.constants import ensure_session_log_dir
+
+    if 'transcript_path' in input_data:
+        log_dir = ensure_session_log_dir(input_data.get('session_id', ''))
+        side_effects.defer('chat_export', export_chat, input_data['transcript_path'], log_dir)
+    return 0
+
+
+def handle_notify(input_data, args):
+    """Announce that the agent needs input (Notification), after the hook exits."""
+    from notification import announce_coalesced
+
+    # Skip TTS for the generic "Claude is waiting for your input" message
+    if input_data.get('message') != 'Claude is waiting for your input':
+        side_effects.defer('tts', announce_coalesced, input_data)
+    return 0
+
+
+def handle_announce(input_data, args):
+    """Announce completion via TTS (Stop, SubagentStop), after the hook exits."""
+    if args.event_type == 'SubagentStop':
+        from subagent_stop import announce_subagent_completion
+        side_effects.defer('tts', announce_subagent_completion)
+    else:
+        from stop import announce_completion
+        side_effects.defer('tts', announce_completion)
+    return 0
+
+
+def handle_send(input_data, args):
+    """Send the event to the observability server."""
+    from send_event import build_event, send_deferred, send_event_to_server
+
+    event_data = build_event(input_data, args.source_app, args.event_type,
+                             add_chat=args.add_chat, summarize=args.summarize, blocked=args.blocked,
+                             server_url=args.server_url)
+    if event_data is not None:
+        with metrics.span('http_send'):
+            success = send_event_to_server(event_data, args.server_url)
+        if not success:
+            metrics.set_outcome('send_failed')
+    # Events whose summary was deferred by the rate limit go out from later runs' workers
+    if args.summarize:
+        send_deferred(args.server_url, final=args.event_type == 'Stop')
+    # Never block Claude Code operations on delivery failures
+    return 0
+
+
+def handle_session_summary(input_data, args):
+    """Send the session's rollup statistics to the server (Stop)."""
+    from stop import send_session_summary
+
+    send_session_summary(input_data.get('session_id', ''), args.source_app, args.server_url)
+    return 0
+
+
+def handle_digest(input_data, args):
+    """Add the event to the session's rolling digest; a due fold and its send run after the hook exits."""
+    from utils import digest
+
+    pending = digest.add(args.event_type, input_data)
+    if digest.fold_due(args.event_type, pending):
+        side_effects.defer('digest', send_digest, args.event_type, input_data.get('session_id') or 'unknown',
+                           args.source_app, args.server_url)
+    return 0
+
+
+def send_digest(event_type, session_id, source_app, server_url):
+    """Fold the session's digest and send it if it changed."""
+    from send_event import send_event_to_server
+    from utils import digest
+
+    event_data = digest.fold_event(event_type, session_id, source_app)
+    if event_data is not None:
+        with metrics.span('http_send'):
+            send_event_to_server(event_data, server_url)
+
+
+def handle_archive(input_data, args):
+    """Archive the transcript lines added since the last compaction (PreCompact)."""
+    from pre_compact import archive_transcript
+
+    archive_transcript(input_data)
+    return 0
+
+
+def run_handler(name, input_data, args):
+    """Run one handler inside its own span; errors never escape a handler.
+
+    Blocking handlers get the raw stdin bytes as input_data, the others the decoded input.
+    """
+    handler = globals()[f'handle_{name}']
+    with metrics.span(name):
+        try:
+            return handler(input_data, args)
+        except Exception:
+            metrics.set_outcome('error')
+            return 0
+
+
+def merge_exit_codes(codes):
+    """2 if any handler blocked, otherwise the first non-zero code, otherwise 0."""
+    if 2 in codes:
+        return 2
+    return next((code for code in codes if code), 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run all configured hook handlers in one process')
+    parser.add_argument('event_type', help='Hook event type (PreToolUse, PostToolUse, etc.)')
+    parser.add_argument('--guard', action='store_true', help='Block dangerous tool calls')
+    parser.add_argument('--validate', action='store_true', help='Validate user prompts')
+    parser.add_argument('--log', action='store_true', help='Append the event to the session log')
+    parser.add_argument('--chat', action='store_true', help='Copy transcript to chat.json')
+    parser.add_argument('--notify', action='store_true', help='Enable TTS notifications')
+    parser.add_argument('--announce', action='store_true', help='Announce completion via TTS')
+    parser.add_argument('--send', action='store_true', help='Send the event to the observability server')
+    parser.add_argument('--session-summary', action='store_true',
+                        help="Send the session's rollup statistics to the server")
+    parser.add_argument('--digest', action='store_true',
+                        help="Fold the event into the session's rolling digest and send it when updated")
+    parser.add_argument('--archive', action='store_true',
+                        help='Archive the transcript since the last compaction')
+    parser.add_argument('--source-app', default='', help='Source application name (with --send)')
+    parser.add_argument('--server-url', default='http://localhost:4000/events', help='Server URL (with --send)')
+    parser.add_argument('--add-chat', action='store_true', help='Include chat transcript (with --send)')
+    parser.add_argument('--summarize', action='store_true', help='Generate AI summary (with --send)')
+    args = parser.parse_args()
+
+    if (args.send or args.session_summary or args.digest) and not args.source_app:
+        parser.error('--send, --session-summary and --digest require --source-app')
+
+    metrics.start('dispatch', args.event_type)
+
+    # Read hook data from stdin, once for all handlers
+    with metrics.span('stdin_read'):
+        raw = sys.stdin.buffer.read()
+
+    codes = []
+    for name in BLOCKING_HANDLERS:
+        if getattr(args, name):
+            codes.append(run_handler(name, raw, args))
+
+    # Handlers see whether the event was blocked
+    args.blocked = 2 in codes
+    # The decision is made; nothing after it may hold up Claude Code for long
+    side_effects.arm_deadline(exit_code=merge_exit_codes(codes))
+
+    selected = [name for name in HANDLERS if getattr(args, name)]
+    if not selected and not args.log:
+        # A guard-only hook never decodes the rest of its input
+        exit_code = merge_exit_codes(codes)
+        if exit_code == 2:
+            metrics.set_outcome('blocked')
+        sys.exit(exit_code)
+
+    try:
+        with metrics.span('stdin_parse'):
+            input_data = codec.loads(raw)
+    except json.JSONDecodeError as e:
+        metrics.set_outcome('invalid_input')
+        if args.blocked:
+            sys.exit(2)
+        # Only send_event treated invalid input as an error; the other hooks ignore it
+        if args.send:
+            print(f"Failed to parse JSON input: {e}", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(0)
+    tracing.bind_input(input_data)
+
+    # Update the session rollup before the handlers run, so a session summary includes this event
+    if args.log:
+        with metrics.span('rollup'):
+            rollup.record(args.event_type, input_data, blocked=args.blocked)
+
+    if len(selected) == 1:
+        codes.append(run_handler(selected[0], input_data, args))
+    elif selected:
+        with ThreadPoolExecutor(max_workers=len(selected), thread_name_prefix='hook') as pool:
+            futures = [pool.submit(run_handler, name, input_data, args) for name in selected]
+            codes.extend(future.result() for future in futures)
+
+    # TTS, chat export, digest folds and notification bursts finish after the hook has exited
+    side_effects.run_detached()
+
+    exit_code = merge_exit_codes(codes)
+    if exit_code == 2:
+        metrics.set_outcome('blocked')
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    profiling.run(main, 'dispatch')
@@ -13,7 +13,8 @@ import sys
 import subprocess
 import random
 from pathlib import Path
-from utils.constants import ensure_session_log_dir
+from utils import codec, debounce, metrics, profiling, rollup, side_effects, tracing
+from utils.session_log import append_session_log
 
 try:
     from dotenv import load_dotenv
@@ -51,8 +52,8 @@ def get_tts_script_path():
     return None
 
 
-def announce_notification():
-    """Announce that the agent needs user input."""
+def announce_notification(count=1):
+    """Announce that the agent needs user input, or that `count` agents do."""
     try:
         tts_script = get_tts_script_path()
         if not tts_script:
@@ -62,10 +63,11 @@ def announce_notification():
         engineer_name = os.getenv('ENGINEER_NAME', '').strip()
         
         # Create notification message with 30% chance to include name
+        needs_input = f"{count} agents need your input" if count > 1 else "your agent needs your input"
         if engineer_name and random.random() < 0.3:
-            notification_message = f"{engineer_name}, your agent needs your input"
+            notification_message = f"{engineer_name}, {needs_input}"
         else:
-            notification_message = "Your agent needs your input"
+            notification_message = needs_input.capitalize()
         
         # Call the TTS script with the notification message
         subprocess.run([
@@ -83,53 +85,67 @@ def announce_notification():
         pass
 
 
+def announce_coalesced(input_data):
+    """
+    Announce a notification, merged with the others of its burst.
+    
+    Only the first notification of a burst speaks, once the debounce window
+    has passed; the rest return immediately.
+    
+    Returns:
+        True if this notification made the announcement
+    """
+    burst = debounce.coalesce('notification-tts', {
+        'session_id': input_data.get('session_id', ''),
+        'message': input_data.get('message', ''),
+    })
+    if burst is None:
+        metrics.set_outcome('coalesced')
+        return False
+    announce_notification(burst['count'])
+    return True
+
+
 def main():
     try:
         # Parse command line arguments
         parser = argparse.ArgumentParser()
         parser.add_argument('--notify', action='store_true', help='Enable TTS notifications')
         args = parser.parse_args()
+        metrics.start('notification', 'Notification')
+        side_effects.arm_deadline()
         
         # Read JSON input from stdin
-        input_data = json.loads(sys.stdin.read())
+        with metrics.span('stdin_parse'):
+            input_data = codec.read_stdin()
+        tracing.bind_input(input_data)
         
         # Extract session_id
         session_id = input_data.get('session_id', 'unknown')
         
-        # Ensure session log directory exists
-        log_dir = ensure_session_log_dir(session_id)
-        log_file = log_dir / 'notification.json'
-        
-        # Read existing log data or initialize empty list
-        if log_file.exists():
-            with open(log_file, 'r') as f:
-                try:
-                    log_data = json.load(f)
-                except (json.JSONDecodeError, ValueError):
-                    log_data = []
-        else:
-            log_data = []
-        
-        # Append new data
-        log_data.append(input_data)
-        
-        # Write back to file with formatting
-        with open(log_file, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        # Append to the session log
+        with metrics.span('log_write'):
+            append_session_log(session_id, 'notification.json', input_data)
+        with metrics.span('rollup'):
+            rollup.record('Notification', input_data)
         
         # Announce notification via TTS only if --notify flag is set
         # Skip TTS for the generic "Claude is waiting for your input" message
         if args.notify and input_data.get('message') != 'Claude is waiting for your input':
-            announce_notification()
+            # Waiting out the debounce window and speaking happen after the hook has exited
+            side_effects.defer('tts', announce_coalesced, input_data)
+            side_effects.run_detached()
         
         sys.exit(0)
         
     except json.JSONDecodeError:
         # Handle JSON decode errors gracefully
+        metrics.set_outcome('invalid_input')
         sys.exit(0)
     except Exception:
         # Handle any other errors gracefully
+        metrics.set_outcome('error')
         sys.exit(0)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    profiling.run(main, 'notification')
\ No newline at end of file
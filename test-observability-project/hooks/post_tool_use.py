@@ -7,45 +7,36 @@ import json
 import os
 import sys
 from pathlib import Path
-from utils.constants import ensure_session_log_dir
+from utils import codec, metrics, profiling, rollup, tracing
+from utils.session_log import append_session_log
 
 def main():
+    metrics.start('post_tool_use', 'PostToolUse')
     try:
         # Read JSON input from stdin
-        input_data = json.load(sys.stdin)
+        with metrics.span('stdin_parse'):
+            input_data = codec.read_stdin()
+        tracing.bind_input(input_data)
         
         # Extract session_id
         session_id = input_data.get('session_id', 'unknown')
         
-        # Ensure session log directory exists
-        log_dir = ensure_session_log_dir(session_id)
-        log_path = log_dir / 'post_tool_use.json'
-        
-        # Read existing log data or initialize empty list
-        if log_path.exists():
-            with open(log_path, 'r') as f:
-                try:
-                    log_data = json.load(f)
-                except (json.JSONDecodeError, ValueError):
-                    log_data = []
-        else:
-            log_data = []
-        
-        # Append new data
-        log_data.append(input_data)
-        
-        # Write back to file with formatting
-        with open(log_path, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        # Append to the session log, large fields go to the blob store
+        with metrics.span('log_write'):
+            append_session_log(session_id, 'post_tool_use.json', input_data)
+        with metrics.span('rollup'):
+            rollup.record('PostToolUse', input_data)
         
         sys.exit(0)
         
     except json.JSONDecodeError:
         # Handle JSON decode errors gracefully
+        metrics.set_outcome('invalid_input')
         sys.exit(0)
     except Exception:
         # Exit cleanly on any other error
+        metrics.set_outcome('error')
         sys.exit(0)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    profiling.run(main, 'post_tool_use')
\ No newline at end of file
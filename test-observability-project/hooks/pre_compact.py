@@ -0,0 +1,82 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "python-dotenv",
+# ]
+# ///
+
+import argparse
+import json
+import sys
+from utils import codec, metrics, profiling, rollup, tracing
+from utils.session_log import append_session_log
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass  # dotenv is optional
+
+
+def archive_transcript(input_data):
+    """
+    Archive the transcript lines added since the last compaction.
+
+    Args:
+        input_data: The PreCompact hook input
+
+    Returns:
+        dict: The snapshot appended (see utils/transcript_archive.py), or
+        None if there was no transcript or nothing new in it
+    """
+    from utils.transcript_archive import append_snapshot
+
+    transcript_path = input_data.get('transcript_path')
+    if not transcript_path:
+        return None
+    try:
+        return append_snapshot(input_data.get('session_id') or 'unknown', transcript_path)
+    except OSError:
+        # Fail silently: a missing transcript must not hold up compaction
+        return None
+
+
+def main():
+    try:
+        # Parse command line arguments
+        parser = argparse.ArgumentParser()
+        parser.add_argument('--archive', action='store_true',
+                            help='Archive the transcript since the last compaction')
+        args = parser.parse_args()
+        metrics.start('pre_compact', 'PreCompact')
+
+        # Read JSON input from stdin
+        with metrics.span('stdin_parse'):
+            input_data = codec.read_stdin()
+        tracing.bind_input(input_data)
+
+        # Append to the session log
+        with metrics.span('log_write'):
+            append_session_log(input_data.get('session_id', ''), 'pre_compact.json', input_data)
+        with metrics.span('rollup'):
+            rollup.record('PreCompact', input_data)
+
+        if args.archive:
+            with metrics.span('archive'):
+                archive_transcript(input_data)
+
+        sys.exit(0)
+
+    except json.JSONDecodeError:
+        # Handle JSON decode errors gracefully
+        metrics.set_outcome('invalid_input')
+        sys.exit(0)
+    except Exception:
+        # Handle any other errors gracefully
+        metrics.set_outcome('error')
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    profiling.run(main, "pre_compact")
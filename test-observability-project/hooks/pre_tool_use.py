@@ -7,7 +7,9 @@ import json
 import sys
 import re
 from pathlib import Path
-from utils.constants import ensure_session_log_dir
+from utils import metrics, profiling, rollup, tracing
+from utils.json_select import select
+from utils.session_log import append_raw_session_log
 
 def is_dangerous_rm_command(command):
     """
@@ -82,61 +84,106 @@ def is_env_file_access(tool_name, tool_input):
     
     return False
 
+# Fields each tool's guard checks need from tool_input
+GUARD_FIELDS = {
+    'Bash': ['tool_input.command'],
+    'Read': ['tool_input.file_path'],
+    'Edit': ['tool_input.file_path'],
+    'MultiEdit': ['tool_input.file_path'],
+    'Write': ['tool_input.file_path'],
+}
+
+def check_tool_call(tool_name, tool_input):
+    """
+    Run the safety checks for one tool call.
+    
+    Args:
+        tool_name: Name of the tool being called
+        tool_input: The tool's input; only the GUARD_FIELDS need to be present
+    
+    Returns:
+        Messages explaining why the call is blocked, empty if it is allowed
+    """
+    # Check for .env file access (blocks access to sensitive environment files)
+    if is_env_file_access(tool_name, tool_input):
+        return [
+            "BLOCKED: Access to .env files containing sensitive data is prohibited",
+            "Use .env.sample for template files instead",
+        ]
+    
+    # Block rm -rf commands with comprehensive pattern matching
+    if tool_name == 'Bash' and is_dangerous_rm_command(tool_input.get('command', '')):
+        return ["BLOCKED: Dangerous rm command detected and prevented"]
+    
+    return []
+
+def select_guard_input(raw):
+    """
+    Decode only what check_tool_call needs from raw hook input.
+    
+    Args:
+        raw: The hook's JSON input as bytes
+    
+    Returns:
+        (tool_name, tool_input) with just the GUARD_FIELDS in tool_input
+    
+    Raises:
+        json.JSONDecodeError: If the input is not valid JSON
+    """
+    # One pass over the input: tool_name and every tool's guarded fields
+    fields = select(raw, ['tool_name'] + sorted({path for paths in GUARD_FIELDS.values() for path in paths}))
+    tool_name = fields.get('tool_name', '')
+    guarded = GUARD_FIELDS.get(tool_name, [])
+    return tool_name, {
+        'command': fields.get('tool_input.command', '') if 'tool_input.command' in guarded else '',
+        'file_path': fields.get('tool_input.file_path', '') if 'tool_input.file_path' in guarded else '',
+    }
+
 def main():
+    metrics.start('pre_tool_use', 'PreToolUse')
     try:
-        # Read JSON input from stdin
-        input_data = json.load(sys.stdin)
+        # Read raw JSON input from stdin, only the fields the guards need are decoded
+        with metrics.span('stdin_parse'):
+            raw = sys.stdin.buffer.read()
+            tool_name, tool_input = select_guard_input(raw)
         
-        tool_name = input_data.get('tool_name', '')
-        tool_input = input_data.get('tool_input', {})
+        # tool_use_id may follow a large tool_input, so only look for it when tracing
+        if tracing.enabled():
+            ids = select(raw, ['session_id', 'tool_use_id'])
+            tracing.bind(ids.get('session_id', ''), ids.get('tool_use_id', ''), tool_name)
         
-        # Check for .env file access (blocks access to sensitive environment files)
-        if is_env_file_access(tool_name, tool_input):
-            print("BLOCKED: Access to .env files containing sensitive data is prohibited", file=sys.stderr)
-            print("Use .env.sample for template files instead", file=sys.stderr)
-            sys.exit(2)  # Exit code 2 blocks tool call and shows error to Claude
+        with metrics.span('guard'):
+            block_messages = check_tool_call(tool_name, tool_input)
         
-        # Check for dangerous rm -rf commands
-        if tool_name == 'Bash':
-            command = tool_input.get('command', '')
-            
-            # Block rm -rf commands with comprehensive pattern matching
-            if is_dangerous_rm_command(command):
-                print("BLOCKED: Dangerous rm command detected and prevented", file=sys.stderr)
-                sys.exit(2)  # Exit code 2 blocks tool call and shows error to Claude
+        if block_messages:
+            for message in block_messages:
+                print(message, file=sys.stderr)
+            ids = select(raw, ['session_id'])
+            with metrics.span('rollup'):
+                rollup.record('PreToolUse', {'session_id': ids.get('session_id'), 'tool_name': tool_name},
+                              blocked=True)
+            metrics.set_outcome('blocked')
+            sys.exit(2)  # Exit code 2 blocks tool call and shows error to Claude
         
         # Extract session_id
-        session_id = input_data.get('session_id', 'unknown')
-        
-        # Ensure session log directory exists
-        log_dir = ensure_session_log_dir(session_id)
-        log_path = log_dir / 'pre_tool_use.json'
-        
-        # Read existing log data or initialize empty list
-        if log_path.exists():
-            with open(log_path, 'r') as f:
-                try:
-                    log_data = json.load(f)
-                except (json.JSONDecodeError, ValueError):
-                    log_data = []
-        else:
-            log_data = []
-        
-        # Append new data
-        log_data.append(input_data)
+        session_id = select(raw, ['session_id']).get('session_id', 'unknown')
         
-        # Write back to file with formatting
-        with open(log_path, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        # Append the raw input to the session log, large fields go to the blob store
+        with metrics.span('log_write'):
+            append_raw_session_log(session_id, 'pre_tool_use.json', raw)
+        with metrics.span('rollup'):
+            rollup.record('PreToolUse', {'session_id': session_id, 'tool_name': tool_name})
         
         sys.exit(0)
         
     except json.JSONDecodeError:
         # Gracefully handle JSON decode errors
+        metrics.set_outcome('invalid_input')
         sys.exit(0)
     except Exception:
         # Handle any other errors gracefully
+        metrics.set_outcome('error')
         sys.exit(0)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    profiling.run(main, 'pre_tool_use')
\ No newline at end of file
@@ -3,6 +3,7 @@
 # requires-python = ">=3.8"
 # dependencies = [
 #     "anthropic",
+#     "orjson",
 #     "python-dotenv",
 # ]
 # ///
@@ -15,40 +16,222 @@ Sends Claude Code hook events to the observability server.
 import json
 import sys
 import os
+import time
 import argparse
-import urllib.request
-import urllib.error
 from datetime import datetime
-from utils.summarizer import generate_event_summary
+from urllib.parse import urlsplit
+from utils import (
+    codec, debounce, metrics, pending_calls, profiling, ratelimit, rollup, sampling, side_effects, tracing,
+)
+from utils.blobstore import externalize
+from utils.obs_client import ObservabilityError, get_client
+from utils.summarizer import generate_event_summary, reserve_summary
+
+# Deferred events sent per hook run, besides the run's own event
+DEFERRED_PER_RUN = 4
 
 def send_event_to_server(event_data, server_url='http://localhost:4000/events'):
     """Send event data to the observability server."""
+    parts = urlsplit(server_url)
     try:
-        # Prepare the request
-        req = urllib.request.Request(
-            server_url,
-            data=json.dumps(event_data).encode('utf-8'),
-            headers={
-                'Content-Type': 'application/json',
-                'User-Agent': 'Claude-Code-Hook/1.0'
-            }
-        )
-        
-        # Send the request
-        with urllib.request.urlopen(req, timeout=5) as response:
-            if response.status == 200:
-                return True
-            else:
-                print(f"Server returned status: {response.status}", file=sys.stderr)
-                return False
-                
-    except urllib.error.URLError as e:
+        # The client keeps its connection open for further events from this process
+        client = get_client(f"{parts.scheme}://{parts.netloc}")
+        # Large fields are sent as blob references; the server needs the content first
+        try:
+            client.upload_blobs(event_data)
+        except ObservabilityError as e:
+            print(f"Failed to upload blobs: {e}", file=sys.stderr)
+        client.send_event(event_data, path=parts.path or '/events')
+        return True
+    except ObservabilityError as e:
         print(f"Failed to send event: {e}", file=sys.stderr)
         return False
     except Exception as e:
         print(f"Unexpected error: {e}", file=sys.stderr)
         return False
 
+def build_event(input_data, source_app, event_type, add_chat=False, summarize=False, blocked=False,
+                server_url='http://localhost:4000/events'):
+    """
+    Build the event sent to the observability server from hook input.
+    
+    Args:
+        input_data: The decoded hook input
+        source_app: Source application name
+        event_type: Hook event type (PreToolUse, PostToolUse, etc.)
+        add_chat: Include the chat transcript if available
+        summarize: Generate an AI summary of the event
+        blocked: Whether a guard blocked the event, such events are never sampled out
+        server_url: Where a notification burst is sent once its window has passed
+    
+    Returns:
+        The event dict, ready for send_event_to_server(), or None if the
+        sampling policy dropped the event, it was merged into another
+        notification, it leads a notification burst (sent by the worker of
+        side_effects.run_detached()), or its summary was deferred
+        (a later run's worker sends it, see send_deferred())
+    """
+    # Prepare event data for server, large fields are sent as blob references
+    with metrics.span('prepare'):
+        event_data = {
+            'source_app': source_app,
+            'session_id': input_data.get('session_id', 'unknown'),
+            'hook_event_type': event_type,
+            'payload': externalize(input_data),
+            'timestamp': int(datetime.now().timestamp() * 1000)
+        }
+    
+    # Correlate tool calls across the Pre and Post hook processes
+    recorder = metrics.current()
+    hook_start_ns = recorder.start_ns if recorder else None
+    if event_type == 'PreToolUse':
+        pending_calls.record_start(input_data.get('tool_use_id', ''), input_data.get('session_id', ''),
+                                   input_data.get('tool_name', ''), hook_start_ns)
+    elif event_type == 'PostToolUse':
+        with metrics.span('correlate'):
+            call = pending_calls.resolve(input_data.get('tool_use_id', ''), hook_start_ns)
+            tool_response = input_data.get('tool_response')
+            # Copy, the payload may be the caller's input_data
+            event_data['payload'] = dict(
+                event_data['payload'],
+                duration_ms=call['duration_ms'] if call else None,
+                outcome=pending_calls.tool_outcome(tool_response),
+                response_bytes=pending_calls.response_size(tool_response),
+            )
+    
+    # Sample after correlation, so dropped PreToolUse events still record their start,
+    # and before the chat and summary work
+    sample_rate = sampling.sample(event_type, input_data, blocked)
+    if sample_rate is None:
+        rollup.add(event_data['session_id'], sampled_out=1)
+        metrics.incr('claude_hook_events_sampled_out_total')
+        metrics.set_outcome('sampled_out')
+        return None
+    if sample_rate < 1.0:
+        event_data['payload'] = dict(event_data['payload'], sample_rate=sample_rate)
+    
+    # Send one event per burst of notifications, from the first one of the burst
+    ticket = None
+    if event_type == 'Notification':
+        with metrics.span('coalesce'):
+            ticket = debounce.join('notification-send', {
+                'session_id': event_data['session_id'],
+                'message': input_data.get('message', ''),
+                'timestamp': event_data['timestamp'],
+            })
+        if ticket is None:
+            metrics.incr('claude_hook_notifications_coalesced_total')
+            metrics.set_outcome('coalesced')
+            return None
+    
+    # Handle --add-chat option
+    if add_chat and 'transcript_path' in input_data:
+        with metrics.span('chat_read'):
+            transcript_path = input_data['transcript_path']
+            if os.path.exists(transcript_path):
+                # Read .jsonl file and convert to JSON array
+                chat_data = []
+                try:
+                    with open(transcript_path, 'r') as f:
+                        for line in f:
+                            line = line.strip()
+                            if line:
+                                try:
+                                    chat_data.append(codec.loads(line))
+                                except json.JSONDecodeError:
+                                    pass  # Skip invalid lines
+                
+                    # Add chat to event data
+                    event_data['chat'] = chat_data
+                except Exception as e:
+                    print(f"Failed to read transcript: {e}", file=sys.stderr)
+    
+    # Generate summary if requested
+    if summarize:
+        rate_policy = None
+        if ratelimit.RATE_POLICY == ratelimit.DEFER:
+            # Without a free slot now, queue the event with its reserved slot
+            delay = reserve_summary(event_data)
+            if delay:
+                if ratelimit.defer('summary', event_data, delay):
+                    metrics.incr('claude_hook_summaries_deferred_total')
+                    metrics.set_outcome('summary_deferred')
+                    return None
+                # Could not queue it: send it now, without a summary
+            rate_policy = ratelimit.ACQUIRED if delay == 0 else ratelimit.SKIP
+        with metrics.span('summarize'):
+            summary = generate_event_summary(event_data, rate_policy=rate_policy)
+        if summary:
+            event_data['summary'] = summary
+        # Continue even if summary generation fails
+    
+    if ticket is not None and ticket['token'] is not None:
+        # The burst is sent once its window has passed; the worker waits for it, not the hook
+        side_effects.defer_first('notification_send', send_notification_burst, event_data, ticket, server_url)
+        return None
+    
+    return event_data
+
+def send_notification_burst(event_data, ticket, server_url):
+    """
+    Send a Notification event for its whole burst, once the burst's window has passed.
+    
+    Args:
+        event_data: The burst leader's event, from build_event()
+        ticket: The leader's ticket from debounce.join()
+        server_url: Server URL
+    """
+    burst = debounce.collect(ticket)
+    if burst is None:
+        return  # Taken over as stale; the new leader sends the burst
+    if burst['count'] > 1:
+        event_data = dict(event_data, payload=dict(
+            event_data['payload'],
+            coalesced_count=burst['count'],
+            coalesced_sessions=debounce.burst_sessions(burst),
+            coalesced_messages=[item['message'] for item in burst['items']],
+        ))
+    with metrics.span('http_send'):
+        send_event_to_server(event_data, server_url)
+
+def send_deferred(server_url, final=False):
+    """
+    Have the side-effect worker summarize and send events deferred by the rate limit.
+
+    Nothing is taken from the queue here: the worker leases the events
+    when it runs, so one killed at its deadline leaves them to a later run.
+
+    Args:
+        server_url: Server URL
+        final: Also wait for events due within the maximum wait (Stop), as
+            no later hook run may come to send them
+    """
+    horizon = ratelimit.MAX_WAIT if final else 0.0
+    if ratelimit.count_due('summary', horizon):
+        side_effects.defer('deferred_summaries', send_due_summaries, server_url,
+                           DEFERRED_PER_RUN * (4 if final else 1), horizon)
+
+def send_due_summaries(server_url, limit, horizon):
+    """
+    Summarize and send deferred events whose slot has come (side-effect worker).
+
+    Args:
+        server_url: Server URL
+        limit: Most events to send
+        horizon: Also wait for events due within this many seconds
+    """
+    for lease, run_at, event_data, expired in ratelimit.take_due('summary', limit, horizon):
+        if not expired:
+            # The slot was reserved when the event was deferred
+            time.sleep(max(0.0, run_at - time.time()))
+            with metrics.span('summarize'):
+                summary = generate_event_summary(event_data, rate_policy=ratelimit.ACQUIRED)
+            if summary:
+                event_data['summary'] = summary
+        with metrics.span('http_send'):
+            send_event_to_server(event_data, server_url)
+        ratelimit.done(lease)
+
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Send Claude Code hook events to observability server')
@@ -59,56 +242,33 @@ def main():
     parser.add_argument('--summarize', action='store_true', help='Generate AI summary of the event')
     
     args = parser.parse_args()
+    metrics.start('send_event', args.event_type)
     
     try:
         # Read hook data from stdin
-        input_data = json.load(sys.stdin)
+        with metrics.span('stdin_parse'):
+            input_data = codec.read_stdin()
     except json.JSONDecodeError as e:
         print(f"Failed to parse JSON input: {e}", file=sys.stderr)
+        metrics.set_outcome('invalid_input')
         sys.exit(1)
+    tracing.bind_input(input_data)
     
-    # Prepare event data for server
-    event_data = {
-        'source_app': args.source_app,
-        'session_id': input_data.get('session_id', 'unknown'),
-        'hook_event_type': args.event_type,
-        'payload': input_data,
-        'timestamp': int(datetime.now().timestamp() * 1000)
-    }
-    
-    # Handle --add-chat option
-    if args.add_chat and 'transcript_path' in input_data:
-        transcript_path = input_data['transcript_path']
-        if os.path.exists(transcript_path):
-            # Read .jsonl file and convert to JSON array
-            chat_data = []
-            try:
-                with open(transcript_path, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line:
-                            try:
-                                chat_data.append(json.loads(line))
-                            except json.JSONDecodeError:
-                                pass  # Skip invalid lines
-                
-                # Add chat to event data
-                event_data['chat'] = chat_data
-            except Exception as e:
-                print(f"Failed to read transcript: {e}", file=sys.stderr)
-    
-    # Generate summary if requested
-    if args.summarize:
-        summary = generate_event_summary(event_data)
-        if summary:
-            event_data['summary'] = summary
-        # Continue even if summary generation fails
-    
+    event_data = build_event(input_data, args.source_app, args.event_type,
+                             add_chat=args.add_chat, summarize=args.summarize, server_url=args.server_url)
     # Send to server
-    success = send_event_to_server(event_data, args.server_url)
+    if event_data is not None:
+        with metrics.span('http_send'):
+            success = send_event_to_server(event_data, args.server_url)
+        if not success:
+            metrics.set_outcome('send_failed')
+    if args.summarize:
+        send_deferred(args.server_url, final=args.event_type == 'Stop')
+    # A notification burst and deferred events are sent after the hook has exited
+    side_effects.run_detached()
     
     # Always exit with 0 to not block Claude Code operations
     sys.exit(0)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    profiling.run(main, 'send_event')
\ No newline at end of file
@@ -14,7 +14,8 @@ import random
 import subprocess
 from pathlib import Path
 from datetime import datetime
-from utils.constants import ensure_session_log_dir
+from utils import codec, metrics, profiling, rollup, side_effects, tracing
+from utils.session_log import append_session_log, atomic_write
 
 try:
     from dotenv import load_dotenv
@@ -121,14 +122,16 @@ def announce_completion():
             return  # No TTS scripts available
 
         # Get completion message (LLM-generated or fallback)
-        completion_message = get_llm_completion_message()
+        with metrics.span("llm"):
+            completion_message = get_llm_completion_message()
 
         # Call the TTS script with the completion message
-        subprocess.run(
-            ["uv", "run", tts_script, completion_message],
-            capture_output=True,  # Suppress output
-            timeout=10,  # 10-second timeout
-        )
+        with metrics.span("tts"):
+            subprocess.run(
+                ["uv", "run", tts_script, completion_message],
+                capture_output=True,  # Suppress output
+                timeout=10,  # 10-second timeout
+            )
 
     except (subprocess.TimeoutExpired, subprocess.SubprocessError, FileNotFoundError):
         # Fail silently if TTS encounters issues
@@ -138,6 +141,55 @@ def announce_completion():
         pass
 
 
+def export_chat(transcript_path, log_dir):
+    """
+    Copy a .jsonl transcript into log_dir/chat.json as a JSON array.
+
+    Args:
+        transcript_path: Path to the session's .jsonl transcript
+        log_dir: Session log directory to write chat.json into
+    """
+    if not os.path.exists(transcript_path):
+        return
+
+    # Read .jsonl file and convert to JSON array
+    chat_data = []
+    try:
+        with open(transcript_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        chat_data.append(codec.loads(line))
+                    except json.JSONDecodeError:
+                        pass  # Skip invalid lines
+
+        # Write to logs/chat.json; Stop and SubagentStop may export at once
+        atomic_write(os.path.join(log_dir, "chat.json"), codec.dumpb(chat_data))
+    except Exception:
+        pass  # Fail silently
+
+
+def send_session_summary(session_id, source_app, server_url):
+    """
+    Send the session's rollup as a SessionSummary event.
+
+    Args:
+        session_id: The Claude session ID
+        source_app: Source application name
+        server_url: The observability server's events endpoint
+
+    Returns:
+        True if the event was delivered
+    """
+    from send_event import send_event_to_server
+
+    event_data = rollup.summary_event(session_id, source_app)
+    if event_data is None:
+        return False
+    return send_event_to_server(event_data, server_url)
+
+
 def main():
     try:
         # Parse command line arguments
@@ -145,71 +197,63 @@ def main():
         parser.add_argument(
             "--chat", action="store_true", help="Copy transcript to chat.json"
         )
+        parser.add_argument(
+            "--session-summary",
+            action="store_true",
+            help="Send the session's rollup statistics to the server",
+        )
+        parser.add_argument(
+            "--source-app", default="", help="Source application name (with --session-summary)"
+        )
+        parser.add_argument(
+            "--server-url",
+            default="http://localhost:4000/events",
+            help="Server URL (with --session-summary)",
+        )
         args = parser.parse_args()
+        metrics.start("stop", "Stop")
+        side_effects.arm_deadline()
 
         # Read JSON input from stdin
-        input_data = json.load(sys.stdin)
+        with metrics.span("stdin_parse"):
+            input_data = codec.read_stdin()
+        tracing.bind_input(input_data)
 
         # Extract required fields
         session_id = input_data.get("session_id", "")
         stop_hook_active = input_data.get("stop_hook_active", False)
 
-        # Ensure session log directory exists
-        log_dir = ensure_session_log_dir(session_id)
-        log_path = log_dir / "stop.json"
-
-        # Read existing log data or initialize empty list
-        if log_path.exists():
-            with open(log_path, "r") as f:
-                try:
-                    log_data = json.load(f)
-                except (json.JSONDecodeError, ValueError):
-                    log_data = []
-        else:
-            log_data = []
-
-        # Append new data
-        log_data.append(input_data)
-
-        # Write back to file with formatting
-        with open(log_path, "w") as f:
-            json.dump(log_data, f, indent=2)
+        # Append to the session log
+        with metrics.span("log_write"):
+            log_path = append_session_log(session_id, "stop.json", input_data)
+        log_dir = log_path.parent
+        with metrics.span("rollup"):
+            rollup.record("Stop", input_data)
 
         # Handle --chat switch
         if args.chat and "transcript_path" in input_data:
-            transcript_path = input_data["transcript_path"]
-            if os.path.exists(transcript_path):
-                # Read .jsonl file and convert to JSON array
-                chat_data = []
-                try:
-                    with open(transcript_path, "r") as f:
-                        for line in f:
-                            line = line.strip()
-                            if line:
-                                try:
-                                    chat_data.append(json.loads(line))
-                                except json.JSONDecodeError:
-                                    pass  # Skip invalid lines
-
-                    # Write to logs/chat.json
-                    chat_file = os.path.join(log_dir, "chat.json")
-                    with open(chat_file, "w") as f:
-                        json.dump(chat_data, f, indent=2)
-                except Exception:
-                    pass  # Fail silently
-
-        # Announce completion via TTS
-        announce_completion()
+            side_effects.defer("chat_export", export_chat, input_data["transcript_path"], log_dir)
+
+        # Flush the session rollup to the server as one compact event
+        if args.session_summary and args.source_app:
+            with metrics.span("session_summary"):
+                send_session_summary(session_id, args.source_app, args.server_url)
+
+        # Announce completion via TTS, after the hook has exited
+        side_effects.defer("tts", announce_completion)
+        side_effects.run_detached()
 
         sys.exit(0)
 
     except json.JSONDecodeError:
         # Handle JSON decode errors gracefully
+        metrics.set_outcome("invalid_input")
         sys.exit(0)
     except Exception:
         # Handle any other errors gracefully
+        metrics.set_outcome("error")
         sys.exit(0)
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main, "stop")
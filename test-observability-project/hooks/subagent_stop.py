@@ -13,7 +13,8 @@ import sys
 import subprocess
 from pathlib import Path
 from datetime import datetime
-from utils.constants import ensure_session_log_dir
+from utils import codec, metrics, profiling, rollup, side_effects, tracing
+from utils.session_log import append_session_log
 
 try:
     from dotenv import load_dotenv
@@ -62,12 +63,13 @@ def announce_subagent_completion():
         completion_message = "Subagent Complete"
         
         # Call the TTS script with the completion message
-        subprocess.run([
-            "uv", "run", tts_script, completion_message
-        ], 
-        capture_output=True,  # Suppress output
-        timeout=10  # 10-second timeout
-        )
+        with metrics.span('tts'):
+            subprocess.run([
+                "uv", "run", tts_script, completion_message
+            ], 
+            capture_output=True,  # Suppress output
+            timeout=10  # 10-second timeout
+            )
         
     except (subprocess.TimeoutExpired, subprocess.SubprocessError, FileNotFoundError):
         # Fail silently if TTS encounters issues
@@ -83,70 +85,45 @@ def main():
         parser = argparse.ArgumentParser()
         parser.add_argument('--chat', action='store_true', help='Copy transcript to chat.json')
         args = parser.parse_args()
+        metrics.start('subagent_stop', 'SubagentStop')
+        side_effects.arm_deadline()
         
         # Read JSON input from stdin
-        input_data = json.load(sys.stdin)
+        with metrics.span('stdin_parse'):
+            input_data = codec.read_stdin()
+        tracing.bind_input(input_data)
 
         # Extract required fields
         session_id = input_data.get("session_id", "")
         stop_hook_active = input_data.get("stop_hook_active", False)
 
-        # Ensure session log directory exists
-        log_dir = ensure_session_log_dir(session_id)
-        log_path = log_dir / "subagent_stop.json"
-
-        # Read existing log data or initialize empty list
-        if log_path.exists():
-            with open(log_path, 'r') as f:
-                try:
-                    log_data = json.load(f)
-                except (json.JSONDecodeError, ValueError):
-                    log_data = []
-        else:
-            log_data = []
-        
-        # Append new data
-        log_data.append(input_data)
-        
-        # Write back to file with formatting
-        with open(log_path, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        # Append to the session log
+        with metrics.span('log_write'):
+            log_path = append_session_log(session_id, "subagent_stop.json", input_data)
+        with metrics.span('rollup'):
+            rollup.record('SubagentStop', input_data)
+        log_dir = log_path.parent
         
-        # Handle --chat switch (same as stop.py)
+        # Handle --chat switch (same as stop.py), after the hook has exited
         if args.chat and 'transcript_path' in input_data:
-            transcript_path = input_data['transcript_path']
-            if os.path.exists(transcript_path):
-                # Read .jsonl file and convert to JSON array
-                chat_data = []
-                try:
-                    with open(transcript_path, 'r') as f:
-                        for line in f:
-                            line = line.strip()
-                            if line:
-                                try:
-                                    chat_data.append(json.loads(line))
-                                except json.JSONDecodeError:
-                                    pass  # Skip invalid lines
-                    
-                    # Write to logs/chat.json
-                    chat_file = os.path.join(log_dir, 'chat.json')
-                    with open(chat_file, 'w') as f:
-                        json.dump(chat_data, f, indent=2)
-                except Exception:
-                    pass  # Fail silently
+            from stop import export_chat
+            side_effects.defer('chat_export', export_chat, input_data['transcript_path'], log_dir)
 
         # Announce subagent completion via TTS
-        announce_subagent_completion()
+        side_effects.defer('tts', announce_subagent_completion)
+        side_effects.run_detached()
 
         sys.exit(0)
 
     except json.JSONDecodeError:
         # Handle JSON decode errors gracefully
+        metrics.set_outcome('invalid_input')
         sys.exit(0)
     except Exception:
         # Handle any other errors gracefully
+        metrics.set_outcome('error')
         sys.exit(0)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    profiling.run(main, "subagent_stop")
\ No newline at end of file
@@ -0,0 +1,13 @@
+"""Shared setup for the hook tests: the import path and scratch state directories."""
+
+import os
+import sys
+import tempfile
+
+HOOKS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HOOKS_DIR)
+
+# Modules read their settings from the environment when imported, so every
+# store (logs, blobs, SQLite state) is pointed at scratch space first
+os.environ["CLAUDE_HOOKS_LOG_DIR"] = tempfile.mkdtemp(prefix="claude-hooks-tests-")
+os.environ["CLAUDE_HOOKS_DETACH"] = "0"
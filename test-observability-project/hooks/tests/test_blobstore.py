@@ -0,0 +1,69 @@
+import pytest
+
+from utils import blobstore
+
+
+@pytest.fixture(autouse=True)
+def blob_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(blobstore, "BLOB_DIR", str(tmp_path / "blobs"))
+    return tmp_path / "blobs"
+
+
+def test_put_and_get_round_trip():
+    ref = blobstore.put_blob("hello " * 1000)
+    assert ref.startswith("sha256:")
+    assert blobstore.get_blob(ref) == "hello " * 1000
+    assert blobstore.get_blob(ref.split(":", 1)[1]) == "hello " * 1000
+
+
+def test_identical_content_is_stored_once(blob_dir):
+    assert blobstore.put_blob("same") == blobstore.put_blob("same")
+    assert len([p for p in blob_dir.rglob("*") if p.is_file()]) == 1
+
+
+def test_missing_blob_is_none():
+    assert blobstore.get_blob("sha256:" + "0" * 64) is None
+
+
+@pytest.mark.parametrize("ref", [
+    "sha256:../../x",
+    "sha256:" + "A" * 64,
+    "sha256:" + "0" * 63,
+    "../" + "0" * 62,
+    "",
+])
+def test_invalid_references_are_rejected(ref):
+    with pytest.raises(ValueError):
+        blobstore.get_blob(ref)
+
+
+def test_resolve_leaves_invalid_and_missing_references():
+    bad = {"$blob": "sha256:../../etc/passwd", "size": 1}
+    missing = {"$blob": "sha256:" + "1" * 64, "size": 1}
+    assert blobstore.resolve({"a": bad, "b": [missing]}) == {"a": bad, "b": [missing]}
+
+
+def test_externalize_replaces_large_strings_only():
+    event = {"tool_input": {"content": "x" * 200, "file_path": "a.py"}, "n": 1}
+    result = blobstore.externalize(event, threshold=50)
+    ref = result["tool_input"]["content"]
+    assert blobstore.is_blob_ref(ref)
+    assert ref["size"] == 200
+    assert ref["preview"] == "x" * blobstore.PREVIEW_CHARS
+    assert result["tool_input"]["file_path"] == "a.py"
+    assert event["tool_input"]["content"] == "x" * 200
+    assert blobstore.resolve(result) == event
+    assert list(blobstore.blob_refs(result)) == [ref["$blob"]]
+
+
+def test_lone_surrogates_are_stored():
+    text = "output \udce2 " * 20
+    ref = blobstore.externalize(text, threshold=10)
+    assert blobstore.is_blob_ref(ref)
+    assert blobstore.get_blob(ref["$blob"]) == text.replace("\udce2", "?")
+
+
+def test_uncompressed_blobs_are_read(monkeypatch):
+    monkeypatch.setattr(blobstore, "BLOB_COMPRESS", False)
+    ref = blobstore.put_blob("plain")
+    assert blobstore.get_blob(ref) == "plain"
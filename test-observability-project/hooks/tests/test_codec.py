@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from utils import codec
+
+
+def test_round_trip_is_compact():
+    obj = {"tool_name": "Bash", "tool_input": {"command": "ls -la"}, "n": [1, 2.5, None, True], "u": "é"}
+    data = codec.dumpb(obj)
+    assert b" " not in data.replace(b"ls -la", b"")
+    assert codec.loads(data) == obj
+    assert codec.loads(codec.dumps(obj)) == obj
+
+
+def test_indent():
+    assert codec.dumps({"a": 1}, indent=True) == '{\n  "a": 1\n}'
+
+
+def test_wide_integers_fall_back_to_json():
+    assert codec.loads(codec.dumpb({"n": 2 ** 70})) == {"n": 2 ** 70}
+
+
+def test_invalid_json_raises_json_decode_error():
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads(b'{"a": ')
+
+
+@pytest.mark.skipif(not codec.msgpack_available(), reason="needs msgspec or msgpack")
+def test_record_stream_ignores_a_truncated_last_record():
+    stream = codec.pack_record({"a": 1}) + codec.pack_record([2, 3])
+    assert list(codec.iter_records(stream)) == [{"a": 1}, [2, 3]]
+    assert list(codec.iter_records(stream[:-1])) == [{"a": 1}]
+
+
+def test_msgpack_needs_a_library(monkeypatch):
+    monkeypatch.setattr(codec, "msgspec", None)
+    monkeypatch.setattr(codec, "msgpack", None)
+    assert not codec.msgpack_available()
+    with pytest.raises(RuntimeError):
+        codec.packb({})
@@ -0,0 +1,38 @@
+from utils import blobstore
+from utils.compactor import abbreviate, compact_payload, estimate_tokens, salient_fields
+
+
+def test_telling_fields_come_first_and_context_is_dropped():
+    payload = {
+        "session_id": "s", "cwd": "/repo", "transcript_path": "/t.jsonl",
+        "tool_name": "Bash",
+        "tool_response": {"stdout": "ok", "stderr": ""},
+        "tool_input": {"description": "list", "command": "ls -la"},
+    }
+    paths = [path for path, _ in salient_fields("PostToolUse", payload)]
+    assert paths == ["tool_name", "tool_input.command", "tool_input.description", "tool_response.stdout"]
+
+
+def test_long_values_keep_both_ends_within_the_budget():
+    payload = {"tool_name": "Bash", "tool_input": {"command": "start " + "x" * 5000 + " end"}}
+    text = compact_payload("PreToolUse", payload, budget_tokens=50)
+    assert estimate_tokens(text) <= 50
+    assert "start" in text and "end" in text and "[5010ch]" in text
+    assert abbreviate("short", 10) == "short"
+
+
+def test_blob_refs_are_shown_by_preview_and_size(tmp_path, monkeypatch):
+    monkeypatch.setattr(blobstore, "BLOB_DIR", str(tmp_path))
+    payload = blobstore.externalize({
+        "tool_name": "Write",
+        "tool_input": {"file_path": "/repo/big.py", "content": "import os\n" + "pass\n" * 4000},
+    }, threshold=1000)
+    text = compact_payload("PreToolUse", payload, budget_tokens=200)
+    assert "tool_input.content: import os pass" in text
+    assert "[20010 bytes]" in text
+    assert "$blob" not in text and "sha256:" not in text
+
+    # Refs outside the tool's listed fields are not split into their keys
+    payload["extra"] = payload["tool_input"].pop("content")
+    assert [path for path, _ in salient_fields("PreToolUse", payload)] == [
+        "tool_name", "tool_input.file_path", "extra"]
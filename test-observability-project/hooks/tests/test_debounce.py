@@ -0,0 +1,64 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from utils import debounce
+
+
+@pytest.fixture(autouse=True)
+def debounce_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(debounce, "DEBOUNCE_DIR", tmp_path)
+    return tmp_path
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_first_event_leads_and_collects_the_burst():
+    ticket = debounce.join("k", {"session_id": "a"}, window_ms=50)
+    assert ticket["token"] is not None
+    assert debounce.join("k", {"session_id": "b"}, window_ms=50) is None
+    assert debounce.join("k", {"session_id": "a"}, window_ms=50) is None
+    burst = debounce.collect(ticket)
+    assert burst["count"] == 3
+    assert debounce.burst_sessions(burst) == ["a", "b"]
+    # The next event starts a new burst
+    assert debounce.join("k", {}, window_ms=50) is not None
+
+
+def test_disabled_window_reports_every_event_alone():
+    ticket = debounce.join("k", {"n": 1}, window_ms=0)
+    assert ticket["token"] is None
+    assert debounce.collect(ticket) == {"count": 1, "items": [{"n": 1}]}
+
+
+def test_a_dead_leaders_burst_is_taken_over(debounce_dir):
+    ticket = debounce.join("k", {"n": 1}, window_ms=60000)
+    state = json.loads((debounce_dir / "k.json").read_text())
+    state["leader_pid"] = dead_pid()
+    (debounce_dir / "k.json").write_text(json.dumps(state))
+
+    takeover = debounce.join("k", {"n": 2}, window_ms=10)
+    assert takeover is not None
+    assert debounce.collect(ticket) is None
+    assert debounce.collect(takeover) == {"count": 2, "items": [{"n": 1}, {"n": 2}]}
+
+
+def test_collecting_claims_the_burst_for_the_collector(debounce_dir):
+    ticket = debounce.join("k", {"n": 1}, window_ms=10)
+    state = json.loads((debounce_dir / "k.json").read_text())
+    state["leader_pid"] = dead_pid()  # The hook that joined has exited
+    (debounce_dir / "k.json").write_text(json.dumps(state))
+    assert debounce.collect(ticket) == {"count": 1, "items": [{"n": 1}]}
+
+
+def test_stale_burst_is_taken_over(debounce_dir, monkeypatch):
+    ticket = debounce.join("k", {"n": 1}, window_ms=1)
+    monkeypatch.setattr(debounce, "STALE_GRACE_MS", 0)
+    monkeypatch.setattr(debounce, "_now_ms", lambda: ticket["window_end"] + 10)
+    assert debounce.join("k", {"n": 2}, window_ms=1) is not None
@@ -0,0 +1,110 @@
+import itertools
+
+import pytest
+
+from utils import digest
+from utils.llm import anth
+from utils.sqlite_state import StateDB
+
+
+_commands = itertools.count()
+
+
+@pytest.fixture(autouse=True)
+def digest_db(tmp_path, monkeypatch):
+    global _commands
+    _commands = itertools.count()
+    monkeypatch.setattr(digest, "_db", StateDB(str(tmp_path / "digest.db"), digest._SCHEMA, digest._db.columns))
+    monkeypatch.setattr(digest, "DIGEST_BATCH", 3)
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Replies to fold prompts, in order; None stands for a failed call."""
+    replies, prompts = [], []
+
+    def prompt_llm(prompt, **kwargs):
+        prompts.append(prompt)
+        return replies.pop(0)
+    monkeypatch.setattr(anth, "prompt_llm", prompt_llm)
+    return replies, prompts
+
+
+def add(n, session_id="s"):
+    for _ in range(n):
+        command = f"cmd{next(_commands)}"
+        pending = digest.add("PreToolUse", {"session_id": session_id, "tool_name": "Bash",
+                                            "tool_input": {"command": command}})
+    return pending
+
+
+def test_a_full_batch_folds_into_the_digest(llm):
+    replies, prompts = llm
+    replies.append("Runs commands")
+    assert add(2) == 2 and digest.fold("s") is None
+    assert add(1) == 3
+    assert digest.fold("s") == "Runs commands"
+    assert "cmd0" in prompts[0] and "cmd2" in prompts[0]
+    state = digest.get("s")
+    assert (state["digest"], state["events_folded"], state["folds"], state["events_pending"]) == (
+        "Runs commands", 3, 1, 0)
+
+
+def test_a_live_lease_keeps_other_folds_out_and_an_expired_one_is_taken_over(llm, monkeypatch):
+    replies, prompts = llm
+    add(3)
+    (lease_id, _, rows), _ = digest._claim("s", force=False)
+    assert len(rows) == 3
+    claimed, busy_until_ms = digest._claim("s", force=True)
+    assert claimed is None and busy_until_ms > digest._now_ms()
+
+    # The first fold died: once its lease has expired its lines are folded again
+    monkeypatch.setattr(digest, "_now_ms", lambda: busy_until_ms + 1)
+    replies.append("Taken over")
+    assert digest.fold("s") == "Taken over"
+    assert "cmd0" in prompts[0]
+    assert digest.get("s")["events_pending"] == 0
+    # The late first fold's digest is dropped
+    assert not digest._release("s", lease_id, "Too late")
+    assert digest.get("s")["digest"] == "Taken over"
+
+
+def test_failed_folds_back_off_exponentially(llm, monkeypatch):
+    replies, _ = llm
+    now = [1_000_000]
+    monkeypatch.setattr(digest, "_now_ms", lambda: now[0])
+    add(3)
+    replies.append(None)
+    assert digest.fold("s") is None
+    assert digest.get("s")["events_pending"] == 3
+    # Batch folds are not due while backing off, so events fork no worker for them
+    assert add(1) == 0
+    assert not digest.fold_due("PreToolUse", 0)
+    assert digest.fold("s") is None and replies == []
+
+    now[0] += digest.FOLD_BACKOFF_MS
+    assert add(1) == 5
+    replies.append(None)
+    assert digest.fold("s") is None
+    # The second failure in a row waits twice as long
+    now[0] += digest.FOLD_BACKOFF_MS
+    assert add(1) == 0
+    now[0] += digest.FOLD_BACKOFF_MS
+    assert add(1) == 7
+
+    # Stop tries anyway, and a success ends the backoff
+    now[0] -= 1
+    replies.append("Recovered")
+    assert digest.fold("s", force=True) == "Recovered"
+    assert add(3) == 3
+
+
+def test_failed_fold_keeps_line_order(llm):
+    replies, prompts = llm
+    add(3)
+    replies.extend([None, "Done"])
+    digest.fold("s")
+    digest.add("Stop", {"session_id": "s"})
+    assert digest.fold("s", force=True) == "Done"
+    events = prompts[1].split("New events, oldest first:\n", 1)[1].split("\n\n", 1)[0]
+    assert [line.rsplit(" ", 1)[-1] for line in events.splitlines()] == ["cmd0", "cmd1", "cmd2", "Stop"]
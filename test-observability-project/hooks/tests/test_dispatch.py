@@ -0,0 +1,80 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import HOOKS_DIR
+from dispatch import log_name_for, merge_exit_codes
+
+
+class EventSink(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.server.events.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), EventSink)
+    httpd.events = []
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def dispatch(tmp_path, stdin, *args):
+    env = dict(os.environ, CLAUDE_HOOKS_LOG_DIR=str(tmp_path))
+    return subprocess.run([sys.executable, os.path.join(HOOKS_DIR, "dispatch.py"), *args],
+                          input=stdin, capture_output=True, env=env, timeout=30)
+
+
+def test_exit_codes_merge_the_way_claude_code_reads_them():
+    assert merge_exit_codes([]) == 0
+    assert merge_exit_codes([0, 1, 2, 3]) == 2
+    assert merge_exit_codes([0, 3, 1]) == 3
+    assert log_name_for("PreToolUse") == "pre_tool_use.json"
+    assert log_name_for("Stop") == "stop.json"
+
+
+def test_one_run_logs_and_sends_the_event(tmp_path, server):
+    event = {"session_id": "s1", "tool_name": "Read", "tool_input": {"file_path": "/repo/a.py"}}
+    url = "http://127.0.0.1:%d/events" % server.server_address[1]
+    result = dispatch(tmp_path, json.dumps(event).encode(), "PreToolUse", "--guard", "--log", "--send",
+                      "--source-app", "app", "--server-url", url)
+    assert result.returncode == 0, result.stderr
+
+    (logged,) = json.loads((tmp_path / "s1" / "pre_tool_use.json").read_text())
+    assert logged["tool_input"] == event["tool_input"]
+    (sent,) = server.events
+    assert (sent["source_app"], sent["hook_event_type"], sent["payload"]["tool_name"]) == ("app", "PreToolUse", "Read")
+
+
+def test_blocked_event_still_goes_to_the_other_handlers(tmp_path):
+    event = {"session_id": "s1", "tool_name": "Bash", "tool_input": {"command": "rm -rf /"}}
+    result = dispatch(tmp_path, json.dumps(event).encode(), "PreToolUse", "--guard", "--log")
+    assert result.returncode == 2
+    assert b"BLOCKED" in result.stderr
+    assert (tmp_path / "s1" / "pre_tool_use.json").exists()
+
+
+def test_invalid_input_is_an_error_only_for_send(tmp_path):
+    assert dispatch(tmp_path, b"{not json", "Stop", "--log").returncode == 0
+    result = dispatch(tmp_path, b"{not json", "Stop", "--send", "--source-app", "app",
+                      "--server-url", "http://127.0.0.1:9/events")
+    assert result.returncode == 1
+    assert b"Failed to parse JSON input" in result.stderr
+
+
+def test_send_requires_a_source_app(tmp_path):
+    assert dispatch(tmp_path, b"{}", "Stop", "--send").returncode == 2
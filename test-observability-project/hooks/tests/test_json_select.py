@@ -0,0 +1,67 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from conftest import HOOKS_DIR
+from pre_tool_use import check_tool_call, select_guard_input
+from utils.json_select import SkippedString, select
+
+
+def test_selects_nested_paths_only():
+    raw = b'{"tool_name": "Write", "tool_input": {"file_path": "a.py", "content": "x"}, "n": [1, {"a": 2}]}'
+    assert select(raw, ["tool_name", "tool_input.file_path"]) == {"tool_name": "Write", "tool_input.file_path": "a.py"}
+
+
+def test_missing_paths_are_absent():
+    assert select(b'{"tool_input": 5}', ["tool_input.command", "tool_name"]) == {}
+
+
+def test_duplicate_key_uses_the_last_copy_like_json_loads():
+    raw = b'{"tool_input":{"command":"ls","command":"rm -rf /"}}'
+    assert select(raw, ["tool_input.command"]) == {"tool_input.command": json.loads(raw)["tool_input"]["command"]}
+
+
+def test_duplicate_parent_key_replaces_earlier_fields():
+    raw = b'{"tool_input":{"command":"rm -rf /"},"tool_input":{"file_path":"x"}}'
+    assert select(raw, ["tool_input.command", "tool_input.file_path"]) == {"tool_input.file_path": "x"}
+    raw = b'{"tool_input":{"command":"rm -rf /"},"tool_input":null}'
+    assert select(raw, ["tool_input.command"]) == {}
+
+
+def test_escaped_keys_and_values_are_decoded():
+    raw = '{"tool_n\\u0061me":"Bash","tool_input":{"command":"rm \\"-rf\\" /é"}}'.encode()
+    assert select(raw, ["tool_name", "tool_input.command"]) == {"tool_name": "Bash", "tool_input.command": 'rm "-rf" /é'}
+
+
+def test_braces_inside_skipped_strings():
+    raw = b'{"a": "}{][\\"", "b": {"c": "]"}, "d": 1}'
+    assert select(raw, ["d", "b.c"]) == {"d": 1, "b.c": "]"}
+
+
+def test_long_strings_can_be_skipped():
+    found = select(b'{"content": "' + b"x" * 100 + b'"}', ["content"], max_string=10)
+    assert isinstance(found["content"], SkippedString)
+    assert found["content"].size == 100
+
+
+def test_malformed_input_raises():
+    with pytest.raises(json.JSONDecodeError):
+        select(b'{"tool_name" "Bash"}', ["tool_name"])
+
+
+@pytest.mark.parametrize("raw", [
+    b'{"tool_name":"Bash","tool_input":{"command":"ls","command":"rm -rf /"}}',
+    b'{"tool_name":"Read","tool_name":"Bash","tool_input":{"command":"rm -rf /"}}',
+    b'{"tool_name":"Bash","tool_input":{"command":"ls"},"tool_input":{"command":"rm -rf /"}}',
+])
+def test_guard_sees_what_claude_code_runs(raw):
+    assert check_tool_call(*select_guard_input(raw))
+
+
+@pytest.mark.parametrize("script", [["pre_tool_use.py"], ["dispatch.py", "PreToolUse", "--guard"]])
+def test_hooks_block_a_duplicated_command(script):
+    raw = b'{"session_id":"s","tool_name":"Bash","tool_input":{"command":"ls","command":"rm -rf /"}}'
+    result = subprocess.run([sys.executable, *script], input=raw, cwd=HOOKS_DIR, capture_output=True)
+    assert result.returncode == 2
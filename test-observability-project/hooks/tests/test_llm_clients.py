@@ -0,0 +1,84 @@
+import os
+import sys
+import types
+
+import pytest
+
+from utils import ratelimit
+from utils.llm import clients
+from utils.sqlite_state import StateDB
+
+
+class FakeClient:
+    def __init__(self, api_key, base_url):
+        self.api_key, self.base_url = api_key, base_url
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients(monkeypatch):
+    monkeypatch.setattr(clients, "_clients", {})
+    monkeypatch.setattr(clients, "_env_loaded", True)
+    monkeypatch.setenv("TEST_API_KEY", "key-1")
+    monkeypatch.delenv("TEST_BASE_URL", raising=False)
+
+
+def get():
+    return clients._get("test", "TEST_API_KEY", "TEST_BASE_URL", FakeClient)
+
+
+def test_a_client_is_shared_per_key_and_endpoint(monkeypatch):
+    client = get()
+    assert get() is client and client.base_url is None
+    monkeypatch.setenv("TEST_BASE_URL", "http://127.0.0.1:9")
+    assert get() is not client and get().base_url == "http://127.0.0.1:9"
+    monkeypatch.setenv("TEST_API_KEY", "key-2")
+    assert get().api_key == "key-2"
+    assert len(clients._clients) == 3
+
+
+def test_no_client_without_an_api_key(monkeypatch):
+    monkeypatch.setenv("TEST_API_KEY", "")
+    assert get() is None
+    assert clients._clients == {}
+
+
+def test_env_is_loaded_once(monkeypatch):
+    calls = []
+    monkeypatch.setitem(sys.modules, "dotenv", types.SimpleNamespace(load_dotenv=lambda: calls.append(1)))
+    monkeypatch.setattr(clients, "_env_loaded", False)
+    get()
+    get()
+    clients.load_env()
+    assert calls == [1]
+
+
+def test_close_clients_closes_them_and_starts_over():
+    client = get()
+    clients.close_clients()
+    assert client.closed and clients._clients == {}
+    assert get() is not client
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_a_forked_child_creates_its_own_clients():
+    client = get()
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if clients._clients == {} and get() is not client else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert get() is client
+
+
+def test_take_slot_applies_the_shared_rate_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(ratelimit, "_db", StateDB(str(tmp_path / "ratelimit.db"), ratelimit._SCHEMA,
+                                                  ratelimit._db.columns))
+    monkeypatch.setenv("CLAUDE_HOOKS_TEST_RPM", "1")
+    monkeypatch.setenv("CLAUDE_HOOKS_TEST_TPM", "0")
+    assert clients.take_slot("test", "x" * 400, 100, ratelimit.SKIP)
+    assert not clients.take_slot("test", "x" * 400, 100, ratelimit.SKIP)
+    assert clients.take_slot("test", "x" * 400, 100, ratelimit.ACQUIRED)
@@ -0,0 +1,64 @@
+import os
+import time
+
+import pytest
+
+from conftest import HOOKS_DIR
+from utils.llm.stream import first_line
+
+
+def chunks(*parts):
+    """Yield parts, recording how many were consumed."""
+    chunks.consumed = 0
+    for part in parts:
+        chunks.consumed += 1
+        yield part
+
+
+def test_reading_stops_at_the_first_newline():
+    assert first_line(chunks("Ran ", "the tests", "\nSecond", " line")) == "Ran the tests"
+    assert chunks.consumed == 3
+
+
+def test_leading_blank_lines_and_empty_chunks_are_skipped():
+    assert first_line(chunks(None, "", "\n\n  ", "Edited", " main.py  \n", "more")) == "Edited main.py"
+    assert chunks.consumed == 5
+
+
+def test_reading_stops_at_max_chars():
+    assert first_line(chunks("abcd", "efgh", "ijkl"), max_chars=6) == "abcdef"
+    assert chunks.consumed == 2
+
+
+def test_a_stream_without_a_newline_is_read_to_the_end():
+    assert first_line(chunks("All ", "done ")) == "All done"
+    assert first_line(chunks()) == ""
+
+
+@pytest.mark.parametrize("provider,module,key_var,url_var", [
+    ("anthropic", "anth", "ANTHROPIC_API_KEY", "ANTHROPIC_BASE_URL"),
+    ("openai", "oai", "OPENAI_API_KEY", "OPENAI_BASE_URL"),
+])
+def test_the_stream_is_closed_after_the_first_line(provider, module, key_var, url_var, monkeypatch):
+    pytest.importorskip(provider)
+    monkeypatch.syspath_prepend(os.path.join(HOOKS_DIR, "tools"))
+    from mock_providers import MockProviderServer
+
+    from utils.llm import anth, clients, oai
+
+    reply = "Updated the handler\n" + " ".join(["more"] * 95)
+    with MockProviderServer(replies=[reply], token_ms=10) as server:
+        monkeypatch.setenv(key_var, "test-key")
+        monkeypatch.setenv(url_var, server.url + ("/v1" if provider == "openai" else ""))
+        monkeypatch.setenv(f"CLAUDE_HOOKS_{provider.upper()}_RPM", "0")
+        try:
+            started = time.monotonic()
+            line = {"anth": anth, "oai": oai}[module].prompt_llm_first_line("Summarize")
+            elapsed = time.monotonic() - started
+        finally:
+            clients.close_clients()
+        time.sleep(0.2)
+        generated = server.words_generated
+    assert line == "Updated the handler"
+    # The whole reply would take about a second
+    assert elapsed < 0.6 and generated < 50
@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+
+from conftest import HOOKS_DIR
+from tools.mock_server import MockObservabilityServer
+
+# generate_test_events.py lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(HOOKS_DIR)))
+
+from generate_test_events import Agent, percentile, run_load  # noqa: E402
+
+
+def load_args(server, **overrides):
+    args = dict(server=server.url, source_app="load-test", agents=3, rate=500.0, duration=1.0, events=60,
+                arrival="uniform", connections=4, timeout=5.0, max_payload_kb=4, seed=7, progress=False)
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+def test_percentiles_use_the_nearest_rank():
+    values = list(range(1, 101))
+    assert (percentile(values, 0.5), percentile(values, 0.99), percentile(values, 1.0)) == (50, 99, 100)
+    assert percentile([], 0.5) is None
+
+
+def test_agents_produce_whole_sessions_in_the_server_schema():
+    agent = Agent("coder-0", "app", random.Random(1), max_payload_bytes=1024)
+    events = [agent.next_event(0) for _ in range(400)]
+    assert events[0]["hook_event_type"] == "UserPromptSubmit"
+    assert all(set(e) == {"source_app", "session_id", "hook_event_type", "payload", "timestamp"} for e in events)
+    assert all(len(e["payload"].get("tool_response", {}).get("stdout", "")) <= 1024 for e in events)
+    # Every tool call is a PreToolUse/PostToolUse pair with one tool_use_id
+    for pre, post in zip(events, events[1:]):
+        if pre["hook_event_type"] == "PreToolUse":
+            assert post["hook_event_type"] == "PostToolUse"
+            assert post["payload"]["tool_use_id"] == pre["payload"]["tool_use_id"]
+    # A Stop ends its own session, and the next prompt starts a new one
+    stops = [i for i, e in enumerate(events) if e["hook_event_type"] == "Stop"]
+    assert stops
+    for i in stops:
+        assert events[i]["session_id"] == events[i - 1]["session_id"]
+        assert events[i + 1]["hook_event_type"] == "UserPromptSubmit"
+        assert events[i + 1]["session_id"] != events[i]["session_id"]
+
+
+def test_load_is_sent_over_a_bounded_pool_of_kept_alive_connections():
+    with MockObservabilityServer() as server:
+        report = asyncio.run(run_load(load_args(server)))
+        assert len(server.events) == 60
+        assert server.connections_opened <= 4
+    assert (report["completed"], report["succeeded"], report["errors"]) == (60, 60, {})
+    assert report["connections_opened"] <= 4
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["max"]
+
+
+def test_failures_are_counted_by_kind():
+    with MockObservabilityServer(error_rate=0.5, error_status=503, seed=3) as server:
+        report = asyncio.run(run_load(load_args(server, events=40)))
+        failed = sum(1 for r in server.requests if r.fault)
+    assert report["errors"] == {"http_503": failed}
+    assert report["succeeded"] == 40 - failed and report["error_rate"] == round(failed / 40, 4)
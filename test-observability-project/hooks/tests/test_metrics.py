@@ -0,0 +1,56 @@
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+from conftest import HOOKS_DIR
+from utils import metrics
+
+
+def run(code, metrics_dir, **env):
+    """Run code in a hook-like process, flushing at exit, and return the merged state."""
+    script = "import sys; sys.path.insert(0, %r)\n" % HOOKS_DIR + textwrap.dedent(code)
+    environ = dict(os.environ, CLAUDE_HOOKS_METRICS_DIR=str(metrics_dir), **env)
+    subprocess.run([sys.executable, "-c", script], env=environ, check=True, timeout=20)
+    state_path = metrics_dir / metrics.STATE_FILE
+    return json.loads(state_path.read_text()) if state_path.exists() else None
+
+
+def test_spans_and_counters_are_merged_across_processes(tmp_path):
+    code = """
+        from utils import metrics
+        metrics.start("pre_tool_use", "PreToolUse")
+        with metrics.span("stdin_parse"):
+            pass
+        metrics.incr("claude_hook_things_total", 2)
+    """
+    run(code, tmp_path)
+    state = run(code, tmp_path)
+    counters = [c["value"] for c in state["counters"].values()]
+    assert counters == [4]
+    stages = {h["labels"].get("stage"): h["count"] for h in state["histograms"].values()}
+    assert stages == {None: 2, "stdin_parse": 2}
+    assert "claude_hook_stage_duration_seconds_bucket" in (tmp_path / metrics.PROM_FILE).read_text()
+
+
+def test_restart_does_not_flush_the_old_recorder(tmp_path):
+    state = run("""
+        from utils import metrics
+        metrics.start("stop", "Stop")
+        metrics.incr("claude_hook_parent_total")
+        metrics.restart("side_effects", "Stop")
+        metrics.incr("claude_hook_worker_total")
+    """, tmp_path)
+    assert sorted(c["name"] for c in state["counters"].values()) == ["claude_hook_worker_total"]
+
+
+def test_a_held_lock_drops_the_observations(tmp_path):
+    with open(tmp_path / metrics.LOCK_FILE, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        state = run("""
+            from utils import metrics
+            metrics.start("stop", "Stop")
+        """, tmp_path, CLAUDE_HOOKS_METRICS_LOCK_TIMEOUT_MS="100")
+    assert state is None
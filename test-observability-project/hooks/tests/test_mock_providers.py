@@ -0,0 +1,89 @@
+import http.client
+import json
+import os
+import sys
+import time
+
+from conftest import HOOKS_DIR
+
+# mock_providers imports mock_server as a sibling script
+sys.path.insert(0, os.path.join(HOOKS_DIR, "tools"))
+
+from mock_providers import MockProviderServer  # noqa: E402
+
+REPLY = "Runs the test suite after updating the handler"
+
+
+def post(server, path, body):
+    conn = http.client.HTTPConnection(server.host, server.port, timeout=10)
+    conn.request("POST", path, json.dumps(body), {"Content-Type": "application/json"})
+    return conn, conn.getresponse()
+
+
+def sse_data(response):
+    return [json.loads(line[6:]) for line in response.read().decode().splitlines()
+            if line.startswith("data: ") and line != "data: [DONE]"]
+
+
+def test_anthropic_replies_are_cut_at_max_tokens():
+    with MockProviderServer(replies=[REPLY], token_ms=0) as server:
+        _, response = post(server, "/v1/messages", {"model": "m", "max_tokens": 3, "messages": []})
+        message = json.loads(response.read())
+        assert message["content"][0]["text"] == "Runs the test"
+        assert message["stop_reason"] == "max_tokens"
+        _, response = post(server, "/v1/messages", {"model": "m", "max_tokens": 100, "messages": []})
+        assert json.loads(response.read())["stop_reason"] == "end_turn"
+
+
+def test_anthropic_stream_sends_one_word_per_delta():
+    with MockProviderServer(replies=[REPLY], token_ms=0) as server:
+        _, response = post(server, "/v1/messages", {"max_tokens": 100, "stream": True, "messages": []})
+        assert response.getheader("Content-Type") == "text/event-stream"
+        events = sse_data(response)
+    assert [e["type"] for e in events[:3]] == ["message_start", "content_block_start", "ping"]
+    deltas = [e["delta"]["text"] for e in events if e["type"] == "content_block_delta"]
+    assert len(deltas) == len(REPLY.split()) and "".join(deltas) == REPLY
+    assert events[-1]["type"] == "message_stop"
+
+
+def test_openai_stream_ends_with_a_finish_reason():
+    with MockProviderServer(replies=[REPLY], token_ms=0) as server:
+        _, response = post(server, "/v1/chat/completions", {"max_tokens": 2, "stream": True, "messages": []})
+        chunks = sse_data(response)
+    text = "".join(c["choices"][0]["delta"].get("content", "") for c in chunks)
+    assert text == "Runs the" and chunks[-1]["choices"][0]["finish_reason"] == "length"
+
+
+def test_closing_a_stream_stops_generation():
+    with MockProviderServer(replies=[" ".join(["word"] * 200)], token_ms=5) as server:
+        conn, response = post(server, "/v1/messages", {"max_tokens": 1000, "stream": True, "messages": []})
+        response.fp.readline()
+        conn.sock.close()
+        conn.close()
+        time.sleep(0.3)
+        generated = server.words_generated
+        time.sleep(0.3)
+        assert server.words_generated == generated < 200
+
+
+def test_speech_is_sized_like_real_speech():
+    with MockProviderServer(audio_chunk_ms=0) as server:
+        _, response = post(server, "/v1/text-to-speech/voice/stream", {"text": "one two three four five"})
+        audio = response.read()
+        assert response.getheader("Content-Type") == "audio/mpeg" and audio[:2] == b"\xff\xfb"
+        # 5 words at 0.4 s, in 26 ms frames of 417 bytes
+        assert len(audio) == 76 * 417
+        _, response = post(server, "/v1/audio/speech", {"input": "hi", "response_format": "wav"})
+        wav = response.read()
+    assert wav[:4] == b"RIFF" and len(wav) == 44 + 2 * int(0.4 * 24000)
+
+
+def test_injected_errors_use_each_providers_format():
+    with MockProviderServer(throttle_rate=1.0) as server:
+        _, response = post(server, "/v1/messages", {"messages": []})
+        assert response.status == 429 and response.getheader("Retry-After") == "1"
+        assert json.loads(response.read())["error"]["type"] == "rate_limit_error"
+        _, response = post(server, "/v1/chat/completions", {"messages": []})
+        assert json.loads(response.read())["error"]["code"] == "rate_limit_exceeded"
+        _, response = post(server, "/v1/text-to-speech/voice", {"text": "hi"})
+        assert json.loads(response.read())["detail"]["status"] == "too_many_concurrent_requests"
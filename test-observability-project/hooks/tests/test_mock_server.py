@@ -0,0 +1,118 @@
+import base64
+import json
+import os
+import random
+import socket
+import struct
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from tools.mock_server import MockObservabilityServer, parse_latency
+
+
+def call(server, method, path, body=None, headers=None):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(server.url + path, data=data, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            raw = response.read()
+            return response.status, json.loads(raw) if raw else None, response.headers
+    except urllib.error.HTTPError as e:
+        raw = e.read()
+        return e.code, json.loads(raw) if raw else None, e.headers
+
+
+def event(n, app="app", event_type="PostToolUse"):
+    return {"source_app": app, "session_id": "s", "hook_event_type": event_type, "payload": {"n": n},
+            "timestamp": 1000 + n}
+
+
+def test_latency_models():
+    rng = random.Random(1)
+    assert parse_latency("200")(rng) == 200
+    assert 100 <= parse_latency("uniform:100:400")(rng) <= 400
+    assert parse_latency("normal:0:50")(rng) >= 0
+    script = parse_latency("script:1,2,3")
+    assert [script(rng) for _ in range(4)] == [1, 2, 3, 1]
+    with pytest.raises(ValueError):
+        parse_latency("pareto:1:2")
+
+
+def test_events_are_saved_listed_and_versioned():
+    with MockObservabilityServer() as server:
+        assert call(server, "POST", "/events", {"source_app": "app"})[0] == 400
+        for n in range(3):
+            status, saved, _ = call(server, "POST", "/events", event(n, app=f"app{n % 2}"))
+            assert status == 200 and saved["id"] == n + 1
+
+        status, page, headers = call(server, "GET", "/events?after_id=1&limit=1")
+        assert [e["id"] for e in page] == [2]
+        assert [e["id"] for e in call(server, "GET", "/events?source_app=app0")[1]] == [1, 3]
+        assert [e["id"] for e in call(server, "GET", "/events/recent?limit=2")[1]] == [2, 3]
+        assert call(server, "GET", "/events/filter-options")[1]["source_apps"] == ["app0", "app1"]
+
+        etag = headers["ETag"]
+        assert call(server, "GET", "/events", headers={"If-None-Match": etag})[0] == 304
+        call(server, "POST", "/events", event(3))
+        assert call(server, "GET", "/events", headers={"If-None-Match": etag})[0] == 200
+
+
+def test_injected_faults_are_recorded_and_control_requests_are_spared():
+    with MockObservabilityServer(error_rate=1.0, error_status=502) as server:
+        assert call(server, "POST", "/events", event(0))[0] == 502
+        assert call(server, "POST", "/_mock/faults", {"error_rate": 0, "throttle_rate": 1})[0] == 200
+        status, _, headers = call(server, "GET", "/events")
+        assert status == 429 and headers["Retry-After"] == "1"
+        call(server, "POST", "/_mock/faults", {"throttle_rate": 0, "reset_rate": 1})
+        with pytest.raises((urllib.error.URLError, ConnectionError)):
+            call(server, "GET", "/events")
+        assert [r.fault for r in server.requests if r.path == "/events"] == ["http_502", "http_429", "reset"]
+        assert call(server, "POST", "/_mock/faults", {"nonsense": 1})[0] == 400
+        # The listing includes its own request
+        assert len(call(server, "GET", "/_mock/requests")[1]) == len(server.requests)
+        call(server, "DELETE", "/_mock/requests")
+        assert server.events == [] and len(server.requests) == 0
+
+
+def test_latency_applies_to_api_requests():
+    with MockObservabilityServer(latency_ms=200) as server:
+        started = time.monotonic()
+        call(server, "GET", "/_mock/requests")
+        assert time.monotonic() - started < 0.15
+        call(server, "GET", "/events")
+        assert time.monotonic() - started >= 0.2
+
+
+def read_frame(sock):
+    header = sock.recv(2)
+    length = header[1] & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", sock.recv(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", sock.recv(8))[0]
+    data = b""
+    while len(data) < length:
+        data += sock.recv(length - len(data))
+    return json.loads(data)
+
+
+def test_stream_sends_recent_events_then_new_ones():
+    with MockObservabilityServer() as server:
+        call(server, "POST", "/events", event(0))
+        sock = socket.create_connection((server.host, server.port), timeout=5)
+        key = base64.b64encode(os.urandom(16)).decode()
+        sock.sendall(f"GET /stream HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode())
+        response = b""
+        while not response.endswith(b"\r\n\r\n"):
+            response += sock.recv(1)
+        assert response.startswith(b"HTTP/1.1 101")
+        initial = read_frame(sock)
+        assert initial["type"] == "initial" and [e["id"] for e in initial["data"]] == [1]
+        call(server, "POST", "/events", event(1))
+        live = read_frame(sock)
+        assert live["type"] == "event" and live["data"]["id"] == 2
+        sock.close()
@@ -0,0 +1,147 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils import blobstore, obs_client
+from utils.obs_client import ObservabilityClient, ObservabilityError
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.posts += 1
+        if self.server.hang_posts:
+            time.sleep(1)
+            return
+        self.reply(200, b"{}")
+
+    def do_GET(self):
+        self.server.gets.append(self.path)
+        etag = '"%s"' % self.path
+        if self.headers.get("If-None-Match") == etag:
+            return self.reply(304, headers={"ETag": etag})
+        if self.path.startswith("/blobs/"):
+            return self.reply(200, self.server.blobs[self.path[7:]])
+        self.reply(200, json.dumps([self.path]).encode(), {"ETag": etag})
+
+    def do_HEAD(self):
+        self.reply(200 if self.path[7:] in self.server.blobs else 404)
+
+    def do_PUT(self):
+        self.server.blobs[self.path[7:]] = self.rfile.read(int(self.headers["Content-Length"]))
+        self.reply(201)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.posts, httpd.gets, httpd.blobs, httpd.hang_posts = 0, [], {}, False
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def client_for(server, **kwargs):
+    return ObservabilityClient("http://127.0.0.1:%d" % server.server_address[1], **kwargs)
+
+
+def test_post_is_not_retried_after_a_read_timeout(server, tmp_path):
+    client = client_for(server, timeout=0.3, cache_dir=None)
+    client.request("POST", "/events", b"{}")
+    server.hang_posts = True
+    with pytest.raises(ObservabilityError):
+        client.request("POST", "/events", b"{}")
+    time.sleep(1)
+    assert server.posts == 2
+
+
+def test_idempotent_request_is_retried_on_a_reused_connection(server, monkeypatch):
+    client = client_for(server, cache_dir=None)
+    client.get_json("/events/recent")
+    real = client._connection
+    calls = []
+
+    def broken_once():
+        conn = real()
+        if not calls:
+            calls.append(1)
+            conn.sock.close()  # Fails while sending, then reconnects
+        return conn
+    monkeypatch.setattr(client, "_connection", broken_once)
+    monkeypatch.setattr(ObservabilityClient, "_closed_by_server", staticmethod(lambda conn: False))
+    assert client.get_json("/events/filter-options") == ["/events/filter-options"]
+
+
+def test_connection_closed_while_idle_is_replaced_before_sending():
+    requests = []
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+
+    def serve():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            requests.append(conn.recv(65536))
+            conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}")
+            conn.close()  # Without saying so in the response
+    threading.Thread(target=serve, daemon=True).start()
+    client = ObservabilityClient("http://127.0.0.1:%d" % listener.getsockname()[1], cache_dir=None)
+    try:
+        for _ in range(3):
+            assert client.request("POST", "/events", b"{}")[0] == 200
+            time.sleep(0.1)
+    finally:
+        listener.close()
+    assert len(requests) == 3
+
+
+def test_listings_are_revalidated_with_their_etag(server, tmp_path):
+    client = client_for(server, cache_dir=str(tmp_path))
+    assert client.recent_events(5) == ["/events/recent?limit=5"]
+    assert client.recent_events(5) == ["/events/recent?limit=5"]
+    # A new client revalidates the copy on disk
+    assert client_for(server, cache_dir=str(tmp_path)).recent_events(5) == ["/events/recent?limit=5"]
+    assert len(server.gets) == 3
+
+
+def test_pages_are_not_cached_and_the_cache_is_bounded(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(obs_client, "CLIENT_CACHE_ENTRIES", 2)
+    client = client_for(server, cache_dir=str(tmp_path))
+    client.events_page(after_id=10)
+    assert list(tmp_path.iterdir()) == []
+    for limit in range(5):
+        client.recent_events(limit)
+    assert len(client._memory) == 2
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+def test_blobs_are_uploaded_once(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(blobstore, "BLOB_DIR", str(tmp_path))
+    event = blobstore.externalize({"content": "x" * 100}, threshold=10)
+    client = client_for(server, cache_dir=None)
+    assert client.upload_blobs(event) == 1
+    assert client.upload_blobs(event) == 0
+    assert client.get_blob(event["content"]["$blob"]) == "x" * 100
+    with pytest.raises(ObservabilityError):
+        client.get_blob("sha256:../events")
@@ -0,0 +1,45 @@
+import time
+
+import pytest
+
+from utils import pending_calls
+from utils.sqlite_state import StateDB
+
+
+@pytest.fixture(autouse=True)
+def pending_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(pending_calls, "_db", StateDB(str(tmp_path / "pending.db"), pending_calls._SCHEMA))
+
+
+def test_duration_is_fixed_by_the_first_lookup():
+    start = time.time_ns()
+    assert pending_calls.record_start("toolu_1", "s", "Bash", started_ns=start)
+    assert not pending_calls.record_start("toolu_1", "s", "Bash", started_ns=start + 10 ** 9)
+    first = pending_calls.resolve("toolu_1", ended_ns=start + 250_000_000)
+    assert first["duration_ms"] == 250.0
+    assert pending_calls.resolve("toolu_1", ended_ns=start + 9 * 10 ** 9) == first
+
+
+def test_unknown_calls_resolve_to_none():
+    assert pending_calls.resolve("toolu_missing") is None
+    assert pending_calls.resolve("") is None
+    assert not pending_calls.record_start("")
+
+
+def test_one_caller_claims_the_trace():
+    pending_calls.record_start("toolu_1", "s", "Bash")
+    assert not pending_calls.claim_trace("toolu_1")  # Not resolved yet
+    pending_calls.resolve("toolu_1")
+    assert pending_calls.claim_trace("toolu_1")
+    assert not pending_calls.claim_trace("toolu_1")
+
+
+def test_expired_and_excess_calls_are_dropped(monkeypatch):
+    monkeypatch.setattr(pending_calls, "PENDING_MAX_ROWS", 2)
+    for i in range(3):
+        pending_calls.record_start(f"toolu_{i}")
+    assert pending_calls.resolve("toolu_0") is None
+    assert pending_calls.resolve("toolu_2") is not None
+    monkeypatch.setattr(pending_calls, "PENDING_TTL", 0)
+    pending_calls.record_start("toolu_3")
+    assert pending_calls.resolve("toolu_2") is None
@@ -0,0 +1,80 @@
+import os
+import pstats
+import time
+
+import pytest
+
+from utils import profiling
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def busy_hook():
+    time.sleep(0.05)
+
+
+def exiting_hook():
+    busy_hook()
+    raise SystemExit(2)
+
+
+def folded_stacks(profile_dir):
+    (path,) = profile_dir.glob("*.folded")
+    return profiling.merge_folded([path])
+
+
+def test_without_a_mode_main_just_runs(profile_dir, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_MODE", "")
+    ran = []
+    profiling.run(lambda: ran.append(1), "hook")
+    assert ran == [1] and list(profile_dir.iterdir()) == []
+
+
+def test_trace_attributes_self_time_to_exact_stacks(profile_dir, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_MODE", "trace")
+    with pytest.raises(SystemExit) as exit_info:
+        profiling.run(exiting_hook, "stop")
+    assert exit_info.value.code == 2
+    stacks = folded_stacks(profile_dir)
+    assert all(stack.startswith("stop;") for stack in stacks)
+    (sleep_stack,) = [stack for stack in stacks if stack.endswith("sleep (builtin)")]
+    assert "exiting_hook" in sleep_stack and "busy_hook" in sleep_stack
+    # Microseconds of the 50 ms sleep
+    assert stacks[sleep_stack] >= 40000
+
+
+def test_sample_records_the_main_thread_stack(profile_dir, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_MODE", "sample")
+    profiling.run(busy_hook, "notification")
+    stacks = folded_stacks(profile_dir)
+    assert any("busy_hook" in stack and stack.startswith("notification;MainThread") for stack in stacks)
+    assert not any("hook-profiler" in stack for stack in stacks)
+
+
+def test_cprofile_writes_pstats(profile_dir, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_MODE", "cprofile")
+    profiling.run(busy_hook, "send_event")
+    (path,) = profile_dir.glob("send_event-*.prof")
+    functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+    assert "busy_hook" in functions
+
+
+def test_only_the_newest_profiles_are_kept(tmp_path):
+    for i in range(5):
+        path = tmp_path / f"hook-{i}.folded"
+        path.write_text("a 1\n")
+        os.utime(path, (i, i))
+    (tmp_path / "notes.txt").write_text("")
+    profiling._rotate(tmp_path, 2)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["hook-3.folded", "hook-4.folded", "notes.txt"]
+
+
+def test_merge_sums_stacks_and_skips_bad_lines(tmp_path):
+    (tmp_path / "a.folded").write_text("h;main;f 3\nh;main 1\n")
+    (tmp_path / "b.folded").write_text("h;main;f 2\ngarbage\n")
+    merged = profiling.merge_folded(sorted(tmp_path.iterdir()))
+    assert merged == {"h;main;f": 5, "h;main": 1}
@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+
+from utils import ratelimit, side_effects, summarizer
+from utils.sqlite_state import StateDB
+
+
+@pytest.fixture(autouse=True)
+def ratelimit_db(tmp_path, monkeypatch):
+    db = StateDB(str(tmp_path / "ratelimit.db"), ratelimit._SCHEMA, ratelimit._db.columns)
+    monkeypatch.setattr(ratelimit, "_db", db)
+    monkeypatch.setenv("CLAUDE_HOOKS_TEST_RPM", "2")
+    monkeypatch.setenv("CLAUDE_HOOKS_TEST_TPM", "0")
+    return db
+
+
+def test_slots_are_reserved_in_arrival_order():
+    assert ratelimit.acquire("test", policy=ratelimit.SKIP) == 0.0
+    assert ratelimit.acquire("test", policy=ratelimit.SKIP) == 0.0
+    assert ratelimit.acquire("test", policy=ratelimit.SKIP) is None
+    # Each further slot comes 30 s after the one before it
+    assert ratelimit.acquire("test", policy=ratelimit.DEFER, max_wait=60) == pytest.approx(30, abs=0.5)
+    assert ratelimit.acquire("test", policy=ratelimit.DEFER, max_wait=60) == pytest.approx(60, abs=0.5)
+    assert ratelimit.acquire("test", policy=ratelimit.DEFER, max_wait=60) is None
+
+
+def test_taken_items_are_leased_until_done():
+    ratelimit.defer("summary", {"n": 1}, 0)
+    ratelimit.defer("summary", {"n": 2}, 30)
+    assert ratelimit.count_due("summary") == 1
+    assert ratelimit.count_due("summary", horizon=60) == 2
+
+    (lease, _, item, expired), = ratelimit.take_due("summary", 10)
+    assert item == {"n": 1} and not expired
+    assert ratelimit.take_due("summary", 10) == []
+    assert ratelimit.count_due("summary") == 0
+    assert ratelimit.done(lease)
+    assert not ratelimit.done(lease)
+    assert [item for _, _, item, _ in ratelimit.take_due("summary", 10, horizon=60)] == [{"n": 2}]
+
+
+def test_work_of_a_runner_that_died_is_taken_again(monkeypatch):
+    ratelimit.defer("summary", {"n": 1}, 0)
+    monkeypatch.setattr(ratelimit, "DEFER_LEASE", 0)
+    (lease, _, _, _), = ratelimit.take_due("summary", 10)
+    monkeypatch.setattr(ratelimit, "DEFER_LEASE", 60)
+    (retaken, _, item, _), = ratelimit.take_due("summary", 10)
+    assert item == {"n": 1}
+    # The first runner's lease is gone, so only the second one removes it
+    assert not ratelimit.done(lease)
+    assert ratelimit.done(retaken)
+    assert ratelimit.take_due("summary", 10) == []
+
+
+def test_queue_without_lease_columns_is_migrated(tmp_path, monkeypatch):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE deferred (id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, "
+                 "run_at_ms INTEGER NOT NULL, created_ms INTEGER NOT NULL, item TEXT NOT NULL)")
+    conn.execute("INSERT INTO deferred (kind, run_at_ms, created_ms, item) VALUES ('summary', 0, 0, '{}')")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(ratelimit, "_db", StateDB(path, ratelimit._SCHEMA, ratelimit._db.columns))
+    (_, _, item, expired), = ratelimit.take_due("summary", 10)
+    assert item == {} and expired
+
+
+def test_no_slot_is_reserved_without_an_api_key(monkeypatch):
+    monkeypatch.setattr(summarizer, "anthropic_client", lambda: None)
+    monkeypatch.setenv("CLAUDE_HOOKS_ANTHROPIC_RPM", "1")
+    for _ in range(3):
+        assert summarizer.reserve_summary({"hook_event_type": "Stop", "payload": {}}) is None
+    assert ratelimit.status() == []
+
+
+def test_deferred_events_are_sent_by_the_worker(monkeypatch):
+    import send_event
+
+    sent, jobs = [], []
+    monkeypatch.setattr(send_event, "send_event_to_server", lambda event, url: sent.append(event) or True)
+    monkeypatch.setattr(side_effects, "defer", lambda name, fn, *args: jobs.append((fn, args)))
+    ratelimit.defer("summary", {"n": 1}, 0)
+    monkeypatch.setattr(ratelimit, "DEFER_MAX_AGE", -1)  # Send without summarizing
+
+    send_event.send_deferred("http://localhost/events")
+    assert sent == [] and ratelimit.count_due("summary") == 1
+    (fn, args), = jobs
+    fn(*args)
+    assert sent == [{"n": 1}]
+    assert ratelimit.count_due("summary") == 0 and ratelimit.status() == []
+
+    jobs.clear()
+    send_event.send_deferred("http://localhost/events")
+    assert jobs == []
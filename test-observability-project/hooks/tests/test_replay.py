@@ -0,0 +1,88 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import HOOKS_DIR
+from tools.mock_server import MockObservabilityServer
+from tools.replay import build_schedule, hook_commands, load_session
+
+
+def write_log(session_dir, name, entries):
+    session_dir.mkdir(parents=True, exist_ok=True)
+    (session_dir / name).write_text(json.dumps(entries))
+
+
+def test_hook_logs_merge_in_logged_order(tmp_path):
+    session = tmp_path / "s1"
+    write_log(session, "pre_tool_use.json", [
+        {"session_id": "s1", "tool_use_id": "a", "logged_at": 1000},
+        {"session_id": "s1", "tool_use_id": "b", "logged_at": 3000},
+    ])
+    write_log(session, "post_tool_use.json", [
+        {"session_id": "s1", "tool_use_id": "a", "logged_at": 2000},
+        {"session_id": "s1", "tool_use_id": "b", "logged_at": 3000},
+    ])
+    write_log(session, "chat.json", [{"logged_at": 0}])
+    events, estimated = load_session(session)
+    assert estimated == 0
+    assert [(e.event_type, e.entry["tool_use_id"]) for e in events] == [
+        ("PreToolUse", "a"), ("PostToolUse", "a"), ("PostToolUse", "b"), ("PreToolUse", "b")]
+    assert all("logged_at" not in e.entry for e in events)
+
+
+def test_unstamped_entries_take_transcript_times_or_the_next_stamp(tmp_path):
+    transcript = tmp_path / "t.jsonl"
+    transcript.write_text(json.dumps({"timestamp": "2025-08-04T10:00:05Z", "message": {"content": [
+        {"type": "tool_use", "id": "a"}]}}) + "\n")
+    session = tmp_path / "s1"
+    write_log(session, "pre_tool_use.json", [
+        {"session_id": "s1", "tool_use_id": "a", "transcript_path": str(transcript)},
+        {"session_id": "s1", "tool_use_id": "x"},
+        {"session_id": "s1", "logged_at": 9e12},
+    ])
+    events, estimated = load_session(session)
+    assert estimated == 1
+    assert [e.time_ms for e in events] == [1754301605000.0, 9e12, 9e12]
+    assert [e.order for e in events] == [0, 1, 2]
+
+
+def test_schedule_scales_caps_gaps_and_copies_sessions(tmp_path):
+    write_log(tmp_path / "a", "stop.json", [{"session_id": "a", "logged_at": t} for t in (0, 1000, 61000)])
+    write_log(tmp_path / "b", "stop.json", [{"session_id": "b", "logged_at": 4000, "tool_use_id": "t"}])
+    sessions = [load_session(tmp_path / "a")[0], load_session(tmp_path / "b")[0]]
+
+    schedule = build_schedule(sessions, speed=2, max_gap=5, align="recorded", copies=1)
+    assert [(offset, e.session_id) for offset, e in schedule] == [(0, "a"), (0.5, "a"), (2, "b"), (3, "a")]
+    schedule = build_schedule(sessions, speed=None, max_gap=None, align="start", copies=2)
+    assert all(offset == 0 for offset, _ in schedule)
+    copied = [e for _, e in schedule if e.session_id == "b-replay1"]
+    assert copied[0].entry["tool_use_id"] == "t-replay1" and copied[0].entry["session_id"] == "b-replay1"
+
+
+def test_hook_commands_run_this_checkout_without_side_effects(tmp_path):
+    settings = tmp_path / "settings.json"
+    settings.write_text(json.dumps({"hooks": {"Stop": [{"hooks": [{
+        "command": "uv run .claude/hooks/dispatch.py Stop --log --announce --send --summarize --source-app x"}]}]}}))
+    (argv,) = hook_commands(settings, keep_side_effects=False, server_url="http://127.0.0.1:1/events")["Stop"]
+    assert argv == [sys.executable, os.path.join(HOOKS_DIR, "dispatch.py"), "Stop", "--log", "--send",
+                    "--source-app", "x", "--server-url", "http://127.0.0.1:1/events"]
+    (argv,) = hook_commands(settings, keep_side_effects=True, server_url=None)["Stop"]
+    assert "--announce" in argv and "--server-url" not in argv
+
+
+def test_replay_to_the_server(tmp_path):
+    for session in ("s1", "s2"):
+        write_log(tmp_path / session, "post_tool_use.json",
+                  [{"session_id": session, "tool_name": "Bash", "logged_at": 1000 + i} for i in range(3)])
+    with MockObservabilityServer() as server:
+        result = subprocess.run(
+            [sys.executable, os.path.join(HOOKS_DIR, "tools", "replay.py"), str(tmp_path), "--target", "server",
+             "--speed", "max", "--copies", "2", "--server", server.url, "--json"],
+            capture_output=True, timeout=60)
+        events = list(server.events)
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout)
+    assert (report["events"], report["sessions"], report["outcomes"]) == (12, 4, {"ok": 12})
+    assert sorted({e["session_id"] for e in events}) == ["s1", "s1-replay1", "s2", "s2-replay1"]
+    assert {e["hook_event_type"] for e in events} == {"PostToolUse"}
@@ -0,0 +1,53 @@
+import pytest
+
+from utils import rollup
+from utils.sqlite_state import StateDB
+
+
+@pytest.fixture(autouse=True)
+def rollup_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(rollup, "_db", StateDB(str(tmp_path / "rollup.db"), rollup._SCHEMA))
+
+
+def test_events_add_to_session_and_tool_counters():
+    rollup.record("UserPromptSubmit", {"session_id": "s", "prompt": "hi"})
+    rollup.record("PreToolUse", {"session_id": "s", "tool_name": "Bash"}, blocked=True)
+    rollup.record("PostToolUse", {"session_id": "s", "tool_name": "Write",
+                                  "tool_input": {"content": "héllo"}, "tool_response": {"success": True}})
+    rollup.record("PostToolUse", {"session_id": "s", "tool_name": "MultiEdit",
+                                  "tool_input": {"edits": [{"new_string": "ab"}, {"new_string": "c"}]}})
+    rollup.add("s", sampled_out=2)
+
+    report = rollup.get("s")
+    assert (report["events"], report["prompts"], report["blocked"], report["tool_calls"]) == (4, 1, 1, 2)
+    assert report["bytes_written"] == 9
+    assert report["sampled_out"] == 2
+    assert report["tools"]["Bash"]["blocked"] == 1
+    assert report["tools"]["Write"] == {"calls": 1, "failures": 0, "blocked": 0, "bytes_written": 6}
+    assert report["first_ms"] <= report["last_ms"]
+
+
+def test_unknown_session_has_no_rollup():
+    assert rollup.get("missing") is None
+    assert rollup.summary_event("missing", "app") is None
+
+
+def test_summary_event():
+    rollup.record("Stop", {"session_id": "s"})
+    event = rollup.summary_event("s", "app")
+    assert event["hook_event_type"] == "SessionSummary"
+    assert event["payload"]["stops"] == 1
+    assert event["summary"].startswith("0 tool calls")
+
+
+def test_counters_added_later_are_migrated(tmp_path, monkeypatch):
+    path = str(tmp_path / "old.db")
+    old = StateDB(path, rollup._SCHEMA.replace(", sampled_out INTEGER NOT NULL DEFAULT 0", ""))
+    with old.lock:
+        conn = old.connect()
+        conn.execute("INSERT INTO sessions (session_id, first_ms, last_ms) VALUES ('s', 1, 1)")
+        assert "sampled_out" not in {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+    monkeypatch.setattr(rollup, "_db", StateDB(path, rollup._SCHEMA, {
+        "sessions": [f"{name} INTEGER NOT NULL DEFAULT 0" for name in rollup.SESSION_COUNTERS]}))
+    assert rollup.add("s", sampled_out=1)
+    assert rollup.get("s")["sampled_out"] == 1
@@ -0,0 +1,47 @@
+import json
+
+from utils import sampling
+
+POLICY = {
+    "default_rate": 1.0,
+    "events": {"PreToolUse": 0.5, "PostToolUse": 0.5},
+    "tools": {"Read": 0.1, "Bash": 0},
+    "always_keep": sampling.DEFAULT_ALWAYS_KEEP,
+}
+
+
+def test_rates_prefer_tool_then_event_then_default():
+    assert sampling.rate_for("PostToolUse", "Read", POLICY) == 0.1
+    assert sampling.rate_for("PostToolUse", "Write", POLICY) == 0.5
+    assert sampling.rate_for("Notification", "", POLICY) == 1.0
+    assert sampling.rate_for("PostToolUse", "", {"default_rate": 7}) == 1.0
+
+
+def test_pre_and_post_of_one_call_are_kept_together():
+    for i in range(200):
+        call = {"tool_name": "Write", "tool_use_id": f"toolu_{i}"}
+        assert sampling.sample("PreToolUse", call, config=POLICY) == sampling.sample("PostToolUse", call, config=POLICY)
+
+
+def test_lower_rates_keep_a_subset():
+    ids = [f"toolu_{i}" for i in range(500)]
+    at_half = {i for i in ids if sampling.sample("PostToolUse", {"tool_name": "Write", "tool_use_id": i}, config=POLICY)}
+    at_tenth = {i for i in ids if sampling.sample("PostToolUse", {"tool_name": "Read", "tool_use_id": i}, config=POLICY)}
+    assert at_tenth <= at_half
+    assert 0 < len(at_tenth) < len(at_half) < len(ids)
+
+
+def test_errors_blocks_and_stops_are_always_kept():
+    assert sampling.sample("PostToolUse", {"tool_name": "Bash", "tool_response": {"is_error": True}}, config=POLICY) == 1.0
+    assert sampling.sample("PreToolUse", {"tool_name": "Bash"}, blocked=True, config=POLICY) == 1.0
+    assert sampling.sample("Stop", {}, config=dict(POLICY, default_rate=0)) == 1.0
+    assert sampling.sample("PostToolUse", {"tool_name": "Bash", "tool_response": {}}, config=POLICY) is None
+
+
+def test_missing_or_invalid_config_keeps_everything(tmp_path):
+    assert sampling.load_config(str(tmp_path / "missing.json"))["always_keep"] == sampling.DEFAULT_ALWAYS_KEEP
+    (tmp_path / "bad.json").write_text("[1, 2]")
+    config = sampling.load_config(str(tmp_path / "bad.json"))
+    assert sampling.rate_for("PostToolUse", "Read", config) == 1.0
+    (tmp_path / "ok.json").write_text(json.dumps({"events": {"Notification": 0}}))
+    assert sampling.sample("Notification", {}, config=sampling.load_config(str(tmp_path / "ok.json"))) is None
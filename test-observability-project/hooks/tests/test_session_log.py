@@ -0,0 +1,67 @@
+import fcntl
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from utils import constants, session_log
+
+
+@pytest.fixture(autouse=True)
+def log_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(constants, "LOG_BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(session_log.codec, "LOG_FORMAT", "json")
+    return tmp_path
+
+
+def _append_many(args):
+    writer, count = args
+    for i in range(count):
+        session_log.append_session_log("s", "post_tool_use.json", {"writer": writer, "i": i})
+
+
+def test_concurrent_appends_keep_every_entry(log_dir):
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        pool.map(_append_many, [(w, 50) for w in range(4)])
+    entries = json.loads((log_dir / "s" / "post_tool_use.json").read_bytes())
+    assert sorted((e["writer"], e["i"]) for e in entries) == [(w, i) for w in range(4) for i in range(50)]
+    assert all("logged_at" in e for e in entries)
+
+
+def test_raw_appends_are_stamped_without_reencoding(log_dir):
+    path = session_log.append_raw_session_log("s", "pre_tool_use.json", b'{"tool_name": "Bash"}')
+    session_log.append_raw_session_log("s", "pre_tool_use.json", b"{}")
+    first, second = session_log.read_session_log(path)
+    assert first["tool_name"] == "Bash" and first["logged_at"] > 0
+    assert set(second) == {"logged_at"}
+
+
+def test_a_held_lock_sends_entries_to_the_overflow_file(log_dir, monkeypatch):
+    monkeypatch.setattr(session_log, "LOCK_TIMEOUT", 0.05)
+    path = session_log.append_session_log("s", "stop.json", {"n": 1})
+    fd = os.open(path, os.O_RDWR)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        session_log.append_session_log("s", "stop.json", {"n": 2})
+    finally:
+        os.close(fd)
+    assert session_log.overflow_path(path).exists()
+    assert [e["n"] for e in session_log.read_session_log(path)] == [1, 2]
+
+
+def test_a_corrupt_log_is_moved_aside(log_dir):
+    path = log_dir / "s" / "stop.json"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b'[{"n": 1}, {"n": ')
+    session_log.append_session_log("s", "stop.json", {"n": 2})
+    assert [e["n"] for e in session_log.read_session_log(path)] == [2]
+    assert [p.name.startswith("stop.json.corrupt-") for p in path.parent.iterdir() if p != path] == [True]
+
+
+def test_empty_and_missing_logs():
+    assert session_log.read_session_log(constants.get_session_log_dir("s") / "none.json") == []
+    path = session_log.append_session_log("s", "empty.json", {"n": 1})
+    path.write_bytes(b"[ ]\n")
+    session_log.append_session_log("s", "empty.json", {"n": 2})
+    assert [e["n"] for e in session_log.read_session_log(path)] == [2]
@@ -0,0 +1,104 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+from conftest import HOOKS_DIR
+from utils import metrics, side_effects
+
+
+@pytest.fixture(autouse=True)
+def inline_jobs(monkeypatch):
+    monkeypatch.setattr(side_effects, "DETACH", False)
+    yield
+    side_effects._jobs.clear()
+    side_effects._first_jobs = 0
+
+
+def test_jobs_run_in_order_with_defer_first_jobs_ahead():
+    ran = []
+    side_effects.defer("tts", ran.append, "tts")
+    side_effects.defer_first("send", ran.append, "send")
+    side_effects.defer("export", ran.append, "export")
+    side_effects.defer_first("send2", ran.append, "send2")
+    assert side_effects.run_detached() is None
+    assert ran == ["send", "send2", "tts", "export"]
+    assert side_effects.run_detached() is None
+    assert len(ran) == 4
+
+
+def test_a_failing_job_does_not_stop_the_rest():
+    ran = []
+    side_effects.defer("bad", lambda: 1 / 0)
+    side_effects.defer("good", ran.append, 1)
+    side_effects.run_detached()
+    assert ran == [1]
+
+
+def run_hook(code, tmp_path, **env):
+    """Run code as a hook process with metrics; returns (exit code, seconds taken, merged metrics)."""
+    script = "import sys, time; sys.path.insert(0, %r)\n" % HOOKS_DIR + textwrap.dedent(code)
+    environ = dict(os.environ, CLAUDE_HOOKS_METRICS_DIR=str(tmp_path), CLAUDE_HOOKS_DETACH="1", **env)
+    started = time.monotonic()
+    result = subprocess.run([sys.executable, "-c", script], env=environ, timeout=20)
+    return result.returncode, time.monotonic() - started, counters(tmp_path)
+
+
+def counters(metrics_dir):
+    state_path = metrics_dir / metrics.STATE_FILE
+    state = json.loads(state_path.read_text()) if state_path.exists() else {"counters": {}}
+    return {c["name"]: c["value"] for c in state["counters"].values()}
+
+
+def wait_for(path, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return path.exists()
+
+
+def test_hook_exits_at_its_deadline_with_the_given_code(tmp_path):
+    code, elapsed, observed = run_hook("""
+        from utils import metrics, side_effects
+        metrics.start("stop", "Stop")
+        side_effects.arm_deadline(0.3, exit_code=2)
+        time.sleep(10)
+    """, tmp_path)
+    assert code == 2 and elapsed < 5
+    assert observed == {"claude_hook_deadline_overruns_total": 1}
+
+
+def test_jobs_run_after_the_hook_has_exited(tmp_path):
+    done = tmp_path / "done"
+    code, elapsed, _ = run_hook(f"""
+        from pathlib import Path
+        from utils import metrics, side_effects
+        metrics.start("stop", "Stop")
+        side_effects.defer("tts", lambda: (time.sleep(1), Path({str(done)!r}).touch()))
+        assert side_effects.run_detached() is not None
+    """, tmp_path)
+    assert code == 0 and elapsed < 1 and not done.exists()
+    assert wait_for(done)
+
+
+def test_worker_is_killed_at_the_side_effect_deadline(tmp_path):
+    started, finished = tmp_path / "started", tmp_path / "finished"
+    run_hook(f"""
+        from pathlib import Path
+        from utils import metrics, side_effects
+        metrics.start("stop", "Stop")
+        side_effects.defer("tts", lambda: (Path({str(started)!r}).touch(), time.sleep(2),
+                                           Path({str(finished)!r}).touch()))
+        side_effects.run_detached()
+    """, tmp_path, CLAUDE_HOOKS_SIDE_EFFECT_DEADLINE="0.3")
+    assert wait_for(started)
+    deadline = time.monotonic() + 10
+    while "claude_hook_side_effect_overruns_total" not in counters(tmp_path):
+        assert time.monotonic() < deadline
+        time.sleep(0.1)
+    time.sleep(2)
+    assert not finished.exists()
@@ -0,0 +1,45 @@
+import os
+import sqlite3
+
+from utils.sqlite_state import StateDB
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, name TEXT NOT NULL);"
+
+
+def test_opens_once_in_wal_mode(tmp_path):
+    db = StateDB(str(tmp_path / "state" / "a.db"), SCHEMA)
+    with db.lock:
+        conn = db.connect()
+        assert db.connect() is conn
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+        conn.execute("INSERT INTO items (name) VALUES ('x')")
+    assert sqlite3.connect(tmp_path / "state" / "a.db").execute("SELECT name FROM items").fetchall() == [("x",)]
+
+
+def test_adds_missing_columns_to_an_existing_database(tmp_path):
+    path = str(tmp_path / "a.db")
+    sqlite3.connect(path).executescript(SCHEMA + "INSERT INTO items (name) VALUES ('old');")
+    db = StateDB(path, SCHEMA, {"items": ["lease_id INTEGER NOT NULL DEFAULT 0", "name TEXT"]})
+    with db.lock:
+        assert db.connect().execute("SELECT name, lease_id FROM items").fetchall() == [("old", 0)]
+
+
+def test_forked_child_opens_its_own_connection(tmp_path):
+    db = StateDB(str(tmp_path / "a.db"), SCHEMA)
+    with db.lock:
+        parent_conn = db.connect()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            with db.lock:
+                conn = db.connect()
+                conn.execute("INSERT INTO items (name) VALUES ('child')")
+            os.write(write_fd, b"1" if conn is not parent_conn and db._inherited == [parent_conn] else b"0")
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(read_fd, 1) == b"1"
+    with db.lock:
+        assert db.connect() is parent_conn
+        assert parent_conn.execute("SELECT name FROM items").fetchall() == [("child",)]
@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+
+import pytest
+
+pytest.importorskip("websockets")
+
+from tools.tail import EventBuffer, EventFilter, Tail, format_event, format_notices  # noqa: E402
+
+
+def event(event_id, event_type="PostToolUse", tool="Bash", session="abc123", app="app"):
+    return {"id": event_id, "source_app": app, "session_id": session, "hook_event_type": event_type,
+            "payload": {"tool_name": tool, "tool_input": {"command": f"cmd {event_id}"}}}
+
+
+def make_tail(**overrides):
+    args = dict(source_app=[], session=[], event_type=[], tool=[], history=2, after_id=None,
+                buffer=100, overflow="drop", server="http://127.0.0.1:4000")
+    args.update(overrides)
+    return Tail(argparse.Namespace(**args))
+
+
+def take(buffer, max_items=100):
+    return asyncio.run(buffer.get_batch(max_items))
+
+
+def test_filter_matches_every_given_criterion():
+    matching = EventFilter(["app"], ["abc"], ["PostToolUse"], ["Bash", "Read"])
+    assert matching.matches(event(1))
+    assert not matching.matches(event(1, tool="Write"))
+    assert not matching.matches(event(1, session="xyz"))
+    assert not matching.matches(event(1, event_type="Stop"))
+    assert EventFilter([], [], [], []).matches({})
+    assert matching.server_params() == {"source_app": "app", "hook_event_type": "PostToolUse"}
+    assert EventFilter(["a", "b"], [], [], []).server_params() == {}
+
+
+def test_full_buffer_drops_the_oldest_events():
+    buffer = EventBuffer(2, "drop")
+    for i in range(5):
+        buffer.put(event(i))
+    dropped, batch, skipped = take(buffer)
+    assert dropped == 3 and [e["id"] for e in batch] == [3, 4] and not skipped
+    assert buffer.total_dropped == 3
+
+
+def test_full_buffer_aggregates_new_events_by_type():
+    buffer = EventBuffer(1, "aggregate")
+    buffer.put(event(1))
+    buffer.put(event(2))
+    buffer.put(event(3, event_type="Stop", tool=None))
+    dropped, batch, skipped = take(buffer)
+    assert dropped == 0 and [e["id"] for e in batch] == [1]
+    assert skipped == {"PostToolUse/Bash": 1, "Stop": 1}
+    assert format_notices(0, skipped) == ["... 2 events skipped: PostToolUse/Bash x1, Stop x1"]
+
+
+def test_events_already_seen_are_skipped_after_a_backfill():
+    tail = make_tail(event_type=["PostToolUse"])
+    tail.on_initial([event(3), event(1), event(2, event_type="Stop"), event(4)])
+    # Only the last `history` matching events are shown, and the stream resumes after the newest
+    assert tail.last_id == 4
+    tail.on_initial([event(9)])
+    for i in (4, 5, 5, 6):
+        tail.accept(event(i))
+    assert tail.received == 2
+    _, batch, _ = take(tail.buffer)
+    assert [e["id"] for e in batch] == [3, 4, 5, 6]
+
+
+def test_event_lines_are_single_line_and_bounded():
+    line = format_event(dict(event(7), summary="first\nsecond"), width=80)
+    assert "\n" not in line and len(line) <= 80
+    assert "#7" in line and "PostToolUse" in line
@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+from conftest import HOOKS_DIR
+from utils import tracing
+
+HOOK = """
+    import sys
+    sys.path.insert(0, {hooks!r})
+    from utils import metrics, tracing
+    metrics.start("{hook}", "{event}")
+    tracing.bind("s1", "toolu_1", "Bash")
+    with metrics.span("stdin_parse"):
+        pass
+    {extra}
+"""
+
+
+def run_hook(tmp_path, hook, event, extra=""):
+    env = dict(os.environ, CLAUDE_HOOKS_LOG_DIR=str(tmp_path / "logs"),
+               CLAUDE_HOOKS_OTLP_FILE=str(tmp_path / "traces.jsonl"))
+    code = textwrap.dedent(HOOK.format(hooks=HOOKS_DIR, hook=hook, event=event, extra=extra))
+    subprocess.run([sys.executable, "-c", code], env=env, check=True, timeout=20)
+
+
+def spans(tmp_path):
+    requests = [json.loads(line) for line in (tmp_path / "traces.jsonl").read_text().splitlines()]
+    return [span for request in requests
+            for resource in request["resourceSpans"] for scope in resource["scopeSpans"] for span in scope["spans"]]
+
+
+def test_hook_processes_are_linked_into_one_session_trace(tmp_path):
+    run_hook(tmp_path, "pre_tool_use", "PreToolUse")
+    run_hook(tmp_path, "post_tool_use", "PostToolUse")
+    run_hook(tmp_path, "send_event", "PostToolUse", extra='metrics.set_outcome("error")')
+    by_name = {}
+    for span in spans(tmp_path):
+        by_name.setdefault(span["name"], []).append(span)
+
+    assert {span["traceId"] for spans_ in by_name.values() for span in spans_} == {tracing.trace_id_for("s1")}
+    # The session root and the tool call are emitted once, however many hooks see them
+    (session,) = by_name["session s1"]
+    (tool,) = by_name["tool Bash"]
+    assert "parentSpanId" not in session
+    assert tool["spanId"] == tracing.tool_span_id("toolu_1")
+    assert tool["parentSpanId"] == session["spanId"]
+    hooks = by_name["pre_tool_use PreToolUse"] + by_name["post_tool_use PostToolUse"] + by_name["send_event PostToolUse"]
+    assert all(span["parentSpanId"] == tool["spanId"] for span in hooks)
+    assert by_name["send_event PostToolUse"][0]["status"]["code"] == tracing.STATUS_ERROR
+    assert sorted(span["parentSpanId"] for span in by_name["stdin_parse"]) == sorted(span["spanId"] for span in hooks)
+
+
+def test_nothing_is_exported_unless_configured(monkeypatch):
+    monkeypatch.setattr(tracing, "OTLP_FILE", "")
+    monkeypatch.setattr(tracing, "OTLP_ENDPOINT", "")
+    assert tracing.bind("s1") is None
+
+
+def test_attributes_are_typed_and_empty_values_dropped():
+    assert tracing._attributes({"a": True, "b": 3, "c": 0.5, "d": "x", "e": "", "f": None}) == [
+        {"key": "a", "value": {"boolValue": True}},
+        {"key": "b", "value": {"intValue": "3"}},
+        {"key": "c", "value": {"doubleValue": 0.5}},
+        {"key": "d", "value": {"stringValue": "x"}},
+    ]
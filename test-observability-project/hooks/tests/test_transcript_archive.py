@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from utils import transcript_archive
+from utils.transcript_archive import INDEX_NAME, TranscriptArchive, append_snapshot, read_index
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(transcript_archive, "_archive_dir", lambda session_id: tmp_path / session_id)
+    monkeypatch.setattr(transcript_archive, "CHUNK_LINES", 4)
+    return tmp_path / "s"
+
+
+def lines(start, stop):
+    return "".join(json.dumps({"n": i, "timestamp": f"2025-08-04T10:{i // 60:02d}:{i % 60:02d}Z"}) + "\n"
+                   for i in range(start, stop))
+
+
+def test_snapshots_archive_only_new_complete_lines(tmp_path):
+    transcript = tmp_path / "t.jsonl"
+    transcript.write_text(lines(0, 10) + '{"n": 10, "timest')
+    first = append_snapshot("s", transcript)
+    assert (first["snapshot"], first["first_line"], first["lines"]) == (1, 0, 10)
+    assert append_snapshot("s", transcript) is None
+
+    # The torn line is archived once it is complete
+    transcript.write_text(lines(0, 25))
+    second = append_snapshot("s", transcript)
+    assert (second["snapshot"], second["first_line"], second["total_lines"]) == (2, 10, 25)
+
+    archive = TranscriptArchive("s")
+    assert len(archive) == 25 and archive.run == 1
+    assert [record["n"] for record in archive.records(8, 13)] == [8, 9, 10, 11, 12]
+    assert b"".join(archive.lines()) == lines(0, 25).encode()
+    assert archive.line_at(transcript_archive._parse_time("2025-08-04T10:00:17Z")) == 17
+    assert [snapshot["lines"] for snapshot in archive.snapshots()] == [10, 15]
+
+
+def test_rewritten_transcript_starts_a_new_run(tmp_path):
+    transcript = tmp_path / "t.jsonl"
+    transcript.write_text(lines(0, 6))
+    append_snapshot("s", transcript)
+    # Same length, different content: the CRC of the last chunk no longer matches
+    transcript.write_text(lines(100, 103) + lines(3, 9))
+    rewritten = append_snapshot("s", transcript)
+    assert (rewritten["snapshot"], rewritten["first_line"], rewritten["lines"]) == (2, 0, 9)
+
+    assert [run["run"] for run in TranscriptArchive("s").runs()] == [1, 2]
+    assert [record["n"] for record in TranscriptArchive("s").records(0, 3)] == [100, 101, 102]
+    old = TranscriptArchive("s", run=1)
+    assert len(old) == 6 and [record["n"] for record in old.records(4)] == [4, 5]
+    with pytest.raises(ValueError):
+        TranscriptArchive("s", run=5)
+
+
+def test_torn_index_record_is_ignored_and_replaced(tmp_path, archive_dir):
+    transcript = tmp_path / "t.jsonl"
+    transcript.write_text(lines(0, 8))
+    append_snapshot("s", transcript)
+    index = archive_dir / INDEX_NAME
+    committed = read_index(index)
+    # An interrupted snapshot wrote half a record
+    with open(index, "ab") as f:
+        f.write(b"\x01" * 20)
+    assert read_index(index) == committed
+
+    transcript.write_text(lines(0, 12))
+    resumed = append_snapshot("s", transcript)
+    assert (resumed["first_line"], resumed["lines"]) == (8, 4)
+    assert index.stat().st_size == len(transcript_archive._MAGIC) + 3 * transcript_archive._RECORD.size
+    assert [record["n"] for record in TranscriptArchive("s").records()] == list(range(12))
+
+
+def test_missing_archive_reads_empty():
+    archive = TranscriptArchive("none")
+    assert archive.chunks == [] and len(archive) == 0
+    assert list(archive.lines()) == [] and archive.runs() == []
@@ -0,0 +1,168 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "orjson",
+#     "msgspec",
+# ]
+# ///
+
+"""
+Benchmark JSON/MessagePack codecs on PostToolUse payloads.
+
+Compares encode/decode time and encoded size for the stdlib json module
+(pretty, as the hooks used to write logs, and compact), orjson, msgspec and
+MessagePack, on payloads from 1 KB to 5 MB.
+
+Usage:
+- ./bench_codec.py                         # Synthetic Read/Write/Bash payloads
+- ./bench_codec.py --logs logs/            # Recorded post_tool_use logs
+- ./bench_codec.py --json                  # Machine-readable results
+"""
+
+import argparse
+import json
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.session_log import read_session_log  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 5_000_000]
+
+
+def _source_text(size):
+    """Generate code-like text of roughly the given size."""
+    rng = random.Random(size)
+    words = ["def", "return", "self", "import", "for", "in", "if", "else", "None", "value"]
+    lines = []
+    total = 0
+    while total < size:
+        indent = " " * (4 * rng.randint(0, 3))
+        line = indent + " ".join(rng.choice(words + ["".join(rng.choices(string.ascii_lowercase, k=6))])
+                                 for _ in range(rng.randint(2, 10)))
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)[:size]
+
+
+def synthetic_payloads(size):
+    """Build PostToolUse payloads shaped like real Read, Write and Bash events."""
+    base = {
+        "session_id": "8f3c2a1e-5b7d-4c9e-a0f1-2d3e4f5a6b7c",
+        "transcript_path": "/home/dev/.claude/projects/-home-dev-app/8f3c2a1e.jsonl",
+        "cwd": "/home/dev/app",
+        "hook_event_name": "PostToolUse",
+    }
+    text = _source_text(size)
+    # Write carries the content twice: in the input and echoed in the response
+    half = text[: size // 2]
+    return {
+        "Read": dict(base, tool_name="Read",
+                     tool_input={"file_path": "/home/dev/app/src/module.py"},
+                     tool_response={"type": "text", "file": {
+                         "filePath": "/home/dev/app/src/module.py", "content": text,
+                         "numLines": text.count("\n") + 1, "startLine": 1,
+                         "totalLines": text.count("\n") + 1}}),
+        "Write": dict(base, tool_name="Write",
+                      tool_input={"file_path": "/home/dev/app/src/new.py", "content": half},
+                      tool_response={"type": "create", "filePath": "/home/dev/app/src/new.py",
+                                     "content": half, "structuredPatch": []}),
+        "Bash": dict(base, tool_name="Bash",
+                     tool_input={"command": "pytest -q", "description": "Run tests"},
+                     tool_response={"stdout": text, "stderr": "", "interrupted": False,
+                                    "isImage": False}),
+    }
+
+
+def recorded_payloads(log_dir):
+    """Load recorded PostToolUse payloads from logs/<session>/post_tool_use.*"""
+    payloads = {}
+    for path in sorted(Path(log_dir).glob("*/post_tool_use.*")):
+        for entry in read_session_log(path):
+            size = len(json.dumps(entry))
+            payloads[f"{entry.get('tool_name', '?')}-{size}"] = entry
+    return payloads
+
+
+def codecs():
+    """Return (name, encode, decode) tuples for every available codec."""
+    result = [
+        ("json-indent", lambda o: json.dumps(o, indent=2).encode(), json.loads),
+        ("json-compact", lambda o: json.dumps(o, separators=(",", ":")).encode(), json.loads),
+    ]
+    if orjson is not None:
+        result.append(("orjson", orjson.dumps, orjson.loads))
+    if msgspec is not None:
+        result.append(("msgspec-json", msgspec.json.encode, msgspec.json.decode))
+        result.append(("msgpack", msgspec.msgpack.encode, msgspec.msgpack.decode))
+    return result
+
+
+def time_call(fn, arg, min_time=0.2):
+    """Return the best per-call time in seconds over repeated runs."""
+    best = float("inf")
+    elapsed = 0.0
+    runs = 0
+    while elapsed < min_time or runs < 3:
+        start = time.perf_counter()
+        fn(arg)
+        took = time.perf_counter() - start
+        best = min(best, took)
+        elapsed += took
+        runs += 1
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hook JSON codecs")
+    parser.add_argument("--logs", help="Use recorded payloads from this log directory")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if args.logs:
+        cases = recorded_payloads(args.logs)
+    else:
+        cases = {}
+        for size in SIZES:
+            for tool, payload in synthetic_payloads(size).items():
+                cases[f"{tool}-{size // 1000}KB"] = payload
+
+    results = []
+    for case, payload in cases.items():
+        for name, encode, decode in codecs():
+            encoded = encode(payload)
+            results.append({
+                "case": case,
+                "codec": name,
+                "bytes": len(encoded),
+                "encode_us": round(time_call(encode, payload) * 1e6, 1),
+                "decode_us": round(time_call(decode, encoded) * 1e6, 1),
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'case':<16}{'codec':<14}{'bytes':>12}{'encode µs':>14}{'decode µs':>14}")
+    print("-" * 70)
+    for r in results:
+        print(f"{r['case']:<16}{r['codec']:<14}{r['bytes']:>12}{r['encode_us']:>14}{r['decode_us']:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Measure summary prompt payloads: indented JSON cut at 1000 characters
+(what the summarizer sent before) vs utils/compactor.py.
+
+For each payload it reports estimated prompt tokens, compaction time, and
+whether the start and the end of the key field (the Bash command, the
+edited file path, the search pattern, the user prompt, ...) reached the
+prompt.
+
+Payloads come from:
+- --logs: recorded hook logs (logs/<session>/*.json)
+- --transcript: tool calls in Claude Code transcripts, rebuilt into the
+  PreToolUse/PostToolUse payloads the hooks receive
+- otherwise synthetic Read/Write/Bash payloads from bench_codec.py
+
+Usage:
+- ./bench_compactor.py --logs logs/
+- ./bench_compactor.py --transcript ~/.claude/projects/-home-dev-app/*.jsonl
+- ./bench_compactor.py --budget 120 --json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from utils.compactor import (  # noqa: E402
+    EVENT_FIELDS, TOOL_FIELDS, _get, _render, compact_payload, estimate_tokens,
+)
+
+OLD_LIMIT = 1000
+# Characters of the key field's start and end looked for in the prompt
+KEY_PROBE = 40
+
+
+def old_prompt_payload(payload: Dict[str, Any]) -> str:
+    """The summarizer's payload text before compaction."""
+    text = json.dumps(payload, indent=2)
+    return text[:OLD_LIMIT] + "..." if len(text) > OLD_LIMIT else text
+
+
+def key_field(event_type: str, payload: Dict[str, Any]) -> Tuple[str, Any]:
+    """The field a summary most needs: the first salient field after tool_name."""
+    tool_name = payload.get("tool_name")
+    paths = TOOL_FIELDS.get(tool_name, [])[:1] if tool_name else EVENT_FIELDS.get(event_type, [])[:1]
+    for path in paths:
+        found, value = _get(payload, path)
+        if found and value not in (None, ""):
+            return path, value
+    return "", None
+
+
+def from_logs(paths: List[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    from replay import load_session, session_dirs
+
+    for session_dir in session_dirs(paths):
+        events, _ = load_session(session_dir)
+        for event in events:
+            yield event.event_type, event.entry
+
+
+def from_transcripts(paths: List[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    for path in paths:
+        calls = {}
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                base = {"session_id": record.get("sessionId", ""), "transcript_path": path,
+                        "cwd": record.get("cwd", "")}
+                content = (record.get("message") or {}).get("content")
+                if record.get("type") == "user" and isinstance(content, str):
+                    yield "UserPromptSubmit", dict(base, hook_event_name="UserPromptSubmit", prompt=content)
+                    continue
+                for block in content if isinstance(content, list) else []:
+                    if not isinstance(block, dict):
+                        continue
+                    if block.get("type") == "tool_use":
+                        call = dict(base, tool_name=block.get("name"), tool_input=block.get("input") or {},
+                                    tool_use_id=block.get("id"))
+                        calls[block.get("id")] = call
+                        yield "PreToolUse", dict(call, hook_event_name="PreToolUse")
+                    elif block.get("type") == "tool_result" and block.get("tool_use_id") in calls:
+                        call = calls.pop(block["tool_use_id"])
+                        response = record.get("toolUseResult", block.get("content"))
+                        yield "PostToolUse", dict(call, hook_event_name="PostToolUse", tool_response=response)
+
+
+def synthetic() -> Iterator[Tuple[str, Dict[str, Any]]]:
+    from bench_codec import synthetic_payloads
+
+    for size in (200, 2_000, 20_000, 200_000):
+        for payload in synthetic_payloads(size).values():
+            yield "PostToolUse", payload
+
+
+def measure(event_type: str, payload: Dict[str, Any], budget: int) -> Dict[str, Any]:
+    old = old_prompt_payload(payload)
+    started = time.perf_counter()
+    new = compact_payload(event_type, payload, budget)
+    elapsed = time.perf_counter() - started
+    path, value = key_field(event_type, payload)
+    result = {"old_tokens": estimate_tokens(old), "new_tokens": estimate_tokens(new), "compact_us": elapsed * 1e6}
+    if path:
+        # Old text is indented JSON, new text is whitespace-collapsed
+        old_text = json.dumps(value)[1:-1] if isinstance(value, str) else json.dumps(value)
+        new_text, _ = _render(value)
+        result["old_head"] = old_text[:KEY_PROBE] in old
+        result["old_tail"] = old_text[-KEY_PROBE:] in old
+        result["new_head"] = new_text[:KEY_PROBE] in new
+        result["new_tail"] = new_text[-KEY_PROBE:] in new
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure summary prompt payload compaction")
+    parser.add_argument("--logs", action="append", help="Recorded log directory (repeatable)")
+    parser.add_argument("--transcript", action="append", help="Claude Code transcript .jsonl (repeatable)")
+    parser.add_argument("--budget", type=int, default=None, help="Token budget (default: CLAUDE_HOOKS_SUMMARY_TOKEN_BUDGET)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if args.logs or args.transcript:
+        payloads = list(from_logs(args.logs or [])) + list(from_transcripts(args.transcript or []))
+    else:
+        payloads = list(synthetic())
+
+    groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for event_type, payload in payloads:
+        if not isinstance(payload, dict):
+            continue
+        name = event_type + (f":{payload['tool_name']}" if payload.get("tool_name") else "")
+        result = measure(event_type, payload, args.budget)
+        groups[name].append(result)
+        groups["all"].append(result)
+
+    rows = []
+    for name in sorted(groups, key=lambda n: (n == "all", n)):
+        results = groups[name]
+        keyed = [r for r in results if "new_head" in r]
+
+        def kept(key):
+            return round(100 * sum(r[key] for r in keyed) / len(keyed), 1) if keyed else None
+
+        old_tokens = sum(r["old_tokens"] for r in results)
+        new_tokens = sum(r["new_tokens"] for r in results)
+        rows.append({
+            "group": name,
+            "payloads": len(results),
+            "old_tokens_mean": round(old_tokens / len(results), 1),
+            "new_tokens_mean": round(new_tokens / len(results), 1),
+            "tokens_saved_pct": round(100 * (1 - new_tokens / old_tokens), 1) if old_tokens else 0.0,
+            "old_key_head_pct": kept("old_head"),
+            "old_key_tail_pct": kept("old_tail"),
+            "new_key_head_pct": kept("new_head"),
+            "new_key_tail_pct": kept("new_tail"),
+            "compact_us_p50": round(statistics.median(r["compact_us"] for r in results), 1),
+        })
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    def pct(value):
+        return f"{value:.0f}%" if value is not None else "-"
+
+    print("key head/tail: share of payloads whose key field's first/last 40 characters reached the prompt")
+    print(f"{'group':<24}{'n':>6}{'old tok':>9}{'new tok':>9}{'saved':>8}{'old head/tail':>15}"
+          f"{'new head/tail':>15}{'µs p50':>9}")
+    print("-" * 95)
+    for r in rows:
+        old_key = f"{pct(r['old_key_head_pct'])}/{pct(r['old_key_tail_pct'])}"
+        new_key = f"{pct(r['new_key_head_pct'])}/{pct(r['new_key_tail_pct'])}"
+        print(f"{r['group']:<24}{r['payloads']:>6}{r['old_tokens_mean']:>9}{r['new_tokens_mean']:>9}"
+              f"{r['tokens_saved_pct']:>7}%{old_key:>15}{new_key:>15}{r['compact_us_p50']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "anthropic",
+#     "openai",
+#     "python-dotenv",
+# ]
+# ///
+
+"""
+Benchmark per-call overhead of the LLM helpers with cold and warm clients.
+
+- cold: what prompt_llm() used to do on every call: load .env, build a new
+  SDK client (and connection pool), connect, send
+- warm: prompt_llm() with the shared client from utils/llm/clients.py,
+  reusing its kept-alive connection
+
+By default both run against tools/mock_providers.py in-process with no
+injected latency, so the difference is pure client overhead. Against a
+real endpoint (--base-url, with the provider's API key set) the cold path
+also pays a TLS handshake per call.
+
+Usage:
+- ./bench_llm_clients.py
+- ./bench_llm_clients.py -n 500 --provider openai --json
+- ./bench_llm_clients.py --latency 200     # Mock with 200 ms per request
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_providers import MockProviderServer  # noqa: E402
+
+PROVIDERS = {
+    # provider: (API key variable, base URL variable, base URL suffix on the mock)
+    "anthropic": ("ANTHROPIC_API_KEY", "ANTHROPIC_BASE_URL", ""),
+    "openai": ("OPENAI_API_KEY", "OPENAI_BASE_URL", "/v1"),
+}
+
+
+def cold_call(provider: str, prompt: str):
+    """One call the way prompt_llm() made it before clients were shared."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    if provider == "anthropic":
+        import anthropic
+
+        client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"),
+                                     base_url=os.getenv("ANTHROPIC_BASE_URL"))
+        client.messages.create(model="claude-3-5-haiku-20241022", max_tokens=100,
+                               messages=[{"role": "user", "content": prompt}])
+    else:
+        from openai import OpenAI
+
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=os.getenv("OPENAI_BASE_URL"))
+        client.chat.completions.create(model="gpt-4.1-nano", max_tokens=100,
+                                       messages=[{"role": "user", "content": prompt}])
+
+
+def warm_call(provider: str, prompt: str):
+    """One call through the shared client."""
+    from utils.llm.clients import anthropic_client, openai_client
+
+    if provider == "anthropic":
+        anthropic_client().messages.create(model="claude-3-5-haiku-20241022", max_tokens=100,
+                                           messages=[{"role": "user", "content": prompt}])
+    else:
+        openai_client().chat.completions.create(model="gpt-4.1-nano", max_tokens=100,
+                                                messages=[{"role": "user", "content": prompt}])
+
+
+def measure(call, provider: str, count: int, server):
+    # One untimed call, so imports are not counted
+    call(provider, "warm up")
+    opened = server.connections_opened if server else None
+    times = []
+    for i in range(count):
+        started = time.perf_counter()
+        call(provider, f"prompt {i}")
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    return {
+        "mean_ms": round(statistics.mean(times), 3),
+        "p50_ms": round(times[len(times) // 2], 3),
+        "p99_ms": round(times[min(len(times) - 1, int(len(times) * 0.99))], 3),
+        "connections": server.connections_opened - opened if server else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold vs warm LLM client calls")
+    parser.add_argument("-n", "--count", type=int, default=200, help="Calls per provider and mode")
+    parser.add_argument("--provider", choices=sorted(PROVIDERS), action="append",
+                        help="Provider to benchmark (repeatable, default: all)")
+    parser.add_argument("--latency", help="Mock latency model, e.g. 200 or lognormal:300:0.5")
+    parser.add_argument("--base-url", help="Benchmark this endpoint instead of the in-process mock")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    server = None
+    if not args.base_url:
+        server = MockProviderServer(latency=args.latency, token_ms=0).start_in_thread()
+
+    results = []
+    try:
+        for provider in args.provider or sorted(PROVIDERS):
+            key_var, url_var, suffix = PROVIDERS[provider]
+            if server:
+                os.environ[key_var] = "mock"
+                os.environ[url_var] = server.url + suffix
+            else:
+                os.environ[url_var] = args.base_url
+            cold = measure(cold_call, provider, args.count, server)
+            warm = measure(warm_call, provider, args.count, server)
+            results.append({
+                "provider": provider,
+                "calls": args.count,
+                "cold": cold,
+                "warm": warm,
+                "overhead_saved_ms": round(cold["mean_ms"] - warm["mean_ms"], 3),
+            })
+    finally:
+        if server:
+            server.stop_thread()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        for mode in ("cold", "warm"):
+            m = r[mode]
+            connections = f", {m['connections']} connections" if m["connections"] is not None else ""
+            print(f"{r['provider']:>9} {mode}: mean {m['mean_ms']:.2f} ms, p50 {m['p50_ms']:.2f} ms, "
+                  f"p99 {m['p99_ms']:.2f} ms{connections}")
+        print(f"{r['provider']:>9} saved per call: {r['overhead_saved_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "anthropic",
+#     "openai",
+#     "python-dotenv",
+# ]
+# ///
+
+"""
+Compare time-to-summary of full responses with first-line streaming.
+
+- full: prompt_llm() waits for the whole response, then the first line is
+  kept (what the summarizer and completion messages did before)
+- first-line: prompt_llm_first_line() streams and closes the stream once
+  the first line is complete
+
+By default both run against tools/mock_providers.py in-process, replying
+with a one-line summary followed by a paragraph of explanation (what
+small models often add despite the prompt), with --latency time to first
+token and --token-ms per word. Words generated counts what the mock
+produced before the stream was closed, i.e. output tokens billed.
+
+Usage:
+- ./bench_llm_stream.py
+- ./bench_llm_stream.py -n 50 --latency lognormal:400:0.4 --token-ms 10 --json
+- ./bench_llm_stream.py --provider openai --base-url https://api.openai.com/v1
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_providers import MockProviderServer  # noqa: E402
+
+PROVIDERS = {
+    # provider: (module, API key variable, base URL variable, base URL suffix on the mock)
+    "anthropic": ("utils.llm.anth", "ANTHROPIC_API_KEY", "ANTHROPIC_BASE_URL", ""),
+    "openai": ("utils.llm.oai", "OPENAI_API_KEY", "OPENAI_BASE_URL", "/v1"),
+}
+
+EXPLANATION = (
+    "\n\nThis event shows the agent opening the settings file to understand how the hooks are wired "
+    "before it changes anything, which is a common first step when working in an unfamiliar repository "
+    "and usually precedes edits to the same file or to the scripts it references."
+)
+REPLIES = [
+    "Reads the project configuration from the repository root" + EXPLANATION,
+    "Runs the test suite after updating the request handler" + EXPLANATION,
+    "Edits database schema to add user table" + EXPLANATION,
+]
+
+PROMPT = "Generate a one-sentence summary of this hook event: Read settings.json"
+
+
+def measure(call, count: int, server):
+    """Time count calls; words generated comes from the mock."""
+    call(PROMPT)  # Untimed, so client setup is not counted
+    words = server.words_generated if server else None
+    times, failures = [], 0
+    for _ in range(count):
+        started = time.perf_counter()
+        result = call(PROMPT)
+        times.append((time.perf_counter() - started) * 1000)
+        failures += not result
+    times.sort()
+    return {
+        "mean_ms": round(statistics.mean(times), 1),
+        "p50_ms": round(times[len(times) // 2], 1),
+        "p99_ms": round(times[min(len(times) - 1, int(len(times) * 0.99))], 1),
+        "failures": failures,
+        "words_per_call": round((server.words_generated - words) / count, 1) if server else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full responses vs first-line streaming")
+    parser.add_argument("-n", "--count", type=int, default=20, help="Calls per provider and mode")
+    parser.add_argument("--provider", choices=sorted(PROVIDERS), action="append",
+                        help="Provider to benchmark (repeatable, default: all)")
+    parser.add_argument("--latency", default="300", help="Mock time to first token, e.g. 300 or lognormal:400:0.4")
+    parser.add_argument("--token-ms", type=float, default=15.0, help="Mock delay per generated word")
+    parser.add_argument("--base-url", help="Benchmark this endpoint instead of the in-process mock")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    server = None
+    if not args.base_url:
+        server = MockProviderServer(latency=args.latency, token_ms=args.token_ms, replies=REPLIES).start_in_thread()
+
+    results = []
+    try:
+        for provider in args.provider or sorted(PROVIDERS):
+            module_name, key_var, url_var, suffix = PROVIDERS[provider]
+            if server:
+                os.environ[key_var] = "mock"
+                os.environ[url_var] = server.url + suffix
+            else:
+                os.environ[url_var] = args.base_url
+            module = __import__(module_name, fromlist=["prompt_llm"])
+
+            def full(prompt):
+                response = module.prompt_llm(prompt)
+                return response.split("\n")[0].strip() if response else None
+
+            full_stats = measure(full, args.count, server)
+            stream_stats = measure(module.prompt_llm_first_line, args.count, server)
+            results.append({
+                "provider": provider,
+                "calls": args.count,
+                "full": full_stats,
+                "first_line": stream_stats,
+                "saved_ms": round(full_stats["mean_ms"] - stream_stats["mean_ms"], 1),
+            })
+    finally:
+        if server:
+            server.stop_thread()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        for mode in ("full", "first_line"):
+            m = r[mode]
+            words = f", {m['words_per_call']} words generated" if m["words_per_call"] is not None else ""
+            failures = f", {m['failures']} failed" if m["failures"] else ""
+            print(f"{r['provider']:>9} {mode:>10}: mean {m['mean_ms']:.1f} ms, p50 {m['p50_ms']:.1f} ms, "
+                  f"p99 {m['p99_ms']:.1f} ms{words}{failures}")
+        print(f"{r['provider']:>9} saved per call: {r['saved_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
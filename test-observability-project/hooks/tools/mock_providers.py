@@ -0,0 +1,289 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Stand-ins for the LLM and TTS provider APIs, for offline benchmarks.
+
+Serves, on one port, the endpoints the provider modules call:
+- Anthropic:  POST /v1/messages (JSON, or server-sent events with "stream")
+- OpenAI:     POST /v1/chat/completions (JSON or SSE), POST /v1/audio/speech
+- ElevenLabs: POST /v1/text-to-speech/<voice_id>[/stream]
+
+Text replies are canned (or --reply), cut to max_tokens words (reported as
+stop_reason "max_tokens" / finish_reason "length") and streamed a word at
+a time every --token-ms; unstreamed replies arrive after the same
+generation time. Audio is silent MP3 (or PCM/WAV) sized like real speech
+and streamed in chunks. The latency models, 429/5xx/reset injection and
+request recording of tools/mock_server.py apply, with errors in each
+provider's error format.
+
+Point the provider modules at it with their base-URL variables; the CLI
+prints them:
+
+    ./mock_providers.py --latency lognormal:600:0.5 --throttle-rate 0.05 &
+    export ANTHROPIC_BASE_URL=http://127.0.0.1:4200
+    export OPENAI_BASE_URL=http://127.0.0.1:4200/v1
+    export ELEVENLABS_BASE_URL=http://127.0.0.1:4200
+    uv run send_event.py --source-app bench --event-type PostToolUse --summarize < event.json
+
+In tests:
+
+    with MockProviderServer(latency="200") as server:
+        os.environ["ANTHROPIC_BASE_URL"] = server.url
+        ...
+"""
+
+import argparse
+import asyncio
+import json
+import struct
+import sys
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from mock_server import MockHTTPServer, RecordedRequest
+
+DEFAULT_REPLIES = [
+    "All done, ready for your next move!",
+    "Runs the test suite after updating the request handler",
+    "Work complete and everything is in place",
+    "Reads the project configuration from the repository root",
+]
+
+# Silent MPEG-1 Layer III frame: 128 kbps, 44.1 kHz; 417 bytes, 26 ms of audio
+_MP3_FRAME = b"\xff\xfb\x90\x00" + b"\x00" * 413
+_MP3_FRAME_SECONDS = 1152 / 44100
+# Speech pace used to size audio
+SECONDS_PER_WORD = 0.4
+
+ANTHROPIC_ERROR_TYPES = {400: "invalid_request_error", 401: "authentication_error", 429: "rate_limit_error",
+                         529: "overloaded_error"}
+
+
+def _sse(data: Any, event: Optional[str] = None) -> bytes:
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {data if isinstance(data, str) else json.dumps(data)}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+def _estimate_tokens(value: Any) -> int:
+    return max(1, len(json.dumps(value)) // 4)
+
+
+class MockProviderServer(MockHTTPServer):
+    """Anthropic, OpenAI and ElevenLabs stand-in with scripted latency and failures."""
+
+    def __init__(self, *args, replies: Optional[List[str]] = None, token_ms: float = 15.0,
+                 audio_chunk_bytes: int = 8192, audio_chunk_ms: float = 5.0, **kwargs):
+        """
+        Args:
+            *args, **kwargs: MockHTTPServer arguments (address, faults, latency model)
+            replies: Text replies, used in turn
+            token_ms: Delay between streamed text chunks (one word each)
+            audio_chunk_bytes: Size of streamed audio chunks
+            audio_chunk_ms: Delay between streamed audio chunks
+        """
+        super().__init__(*args, **kwargs)
+        self.replies = replies or DEFAULT_REPLIES
+        self.token_ms = token_ms
+        self.audio_chunk_bytes = audio_chunk_bytes
+        self.audio_chunk_ms = audio_chunk_ms
+        self._reply_index = 0
+        self._message_count = 0
+        # Words generated, streamed or not; a closed stream stops generation
+        self.words_generated = 0
+
+    def _next_reply(self, body: Dict[str, Any]) -> Tuple[str, bool]:
+        """The next canned reply, and whether it was cut short at max_tokens."""
+        reply = self.replies[self._reply_index % len(self.replies)]
+        self._reply_index += 1
+        # One word per token, cut at max_tokens like the real APIs
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+        words = reply.split(" ")
+        if isinstance(max_tokens, int) and 0 < max_tokens < len(words):
+            return " ".join(words[:max_tokens]), True
+        return reply, False
+
+    async def _generate(self, text: str):
+        """Wait as long as streaming text would take; unstreamed replies come after the last token."""
+        await asyncio.sleep(self.token_ms * (len(text.split(" ")) - 1) / 1000)
+        self.words_generated += len(text.split(" "))
+
+    def _next_id(self, prefix: str) -> str:
+        self._message_count += 1
+        return f"{prefix}_mock{self._message_count:08d}"
+
+    # Errors in each provider's format
+
+    def error_response(self, request: RecordedRequest, status: int):
+        message = "Injected failure"
+        if request.path == "/v1/messages":
+            error_type = ANTHROPIC_ERROR_TYPES.get(status, "api_error")
+            return {"type": "error", "error": {"type": error_type, "message": message}}, {}
+        if request.path.startswith("/v1/text-to-speech"):
+            detail = "too_many_concurrent_requests" if status == 429 else "internal_server_error"
+            return {"detail": {"status": detail, "message": message}}, {}
+        return {"error": {"message": message, "type": "requests" if status == 429 else "server_error",
+                          "param": None, "code": "rate_limit_exceeded" if status == 429 else None}}, {}
+
+    # Routing
+
+    async def respond(self, request: RecordedRequest, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> bool:
+        body = request.json if request.method == "POST" else None
+        if request.method == "POST" and not isinstance(body, dict) and request.path != "/":
+            return await self.write_json(writer, request, 400, *self.error_response(request, 400))
+        path = request.path
+        if path == "/v1/messages":
+            return await self._anthropic_messages(request, body, writer)
+        if path == "/v1/chat/completions":
+            return await self._openai_chat(request, body, writer)
+        if path == "/v1/audio/speech":
+            return await self._audio(request, writer, body.get("input", ""), body.get("response_format", "mp3"))
+        if path.startswith("/v1/text-to-speech/"):
+            output_format = request.query.get("output_format") or body.get("output_format") or "mp3_44100_128"
+            return await self._audio(request, writer, body.get("text", ""), output_format.split("_")[0])
+        return await super().respond(request, reader, writer)
+
+    async def _words(self, text: str) -> AsyncIterator[str]:
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(self.token_ms / 1000)
+            self.words_generated += 1
+            yield word if i == 0 else " " + word
+
+    async def _anthropic_messages(self, request: RecordedRequest, body: Dict[str, Any],
+                                  writer: asyncio.StreamWriter) -> bool:
+        text, truncated = self._next_reply(body)
+        stop_reason = "max_tokens" if truncated else "end_turn"
+        message_id = self._next_id("msg")
+        model = body.get("model", "claude-mock")
+        input_tokens = _estimate_tokens(body.get("messages", []))
+        output_tokens = len(text.split())
+        if not body.get("stream"):
+            await self._generate(text)
+            return await self.write_json(writer, request, 200, {
+                "id": message_id, "type": "message", "role": "assistant", "model": model,
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": stop_reason, "stop_sequence": None,
+                "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+            }, {"request-id": message_id})
+
+        async def events():
+            yield _sse({"type": "message_start", "message": {
+                "id": message_id, "type": "message", "role": "assistant", "model": model, "content": [],
+                "stop_reason": None, "stop_sequence": None,
+                "usage": {"input_tokens": input_tokens, "output_tokens": 1}}}, "message_start")
+            yield _sse({"type": "content_block_start", "index": 0,
+                        "content_block": {"type": "text", "text": ""}}, "content_block_start")
+            yield _sse({"type": "ping"}, "ping")
+            async for word in self._words(text):
+                yield _sse({"type": "content_block_delta", "index": 0,
+                            "delta": {"type": "text_delta", "text": word}}, "content_block_delta")
+            yield _sse({"type": "content_block_stop", "index": 0}, "content_block_stop")
+            yield _sse({"type": "message_delta", "delta": {"stop_reason": stop_reason, "stop_sequence": None},
+                        "usage": {"output_tokens": output_tokens}}, "message_delta")
+            yield _sse({"type": "message_stop"}, "message_stop")
+
+        return await self.write_stream(writer, request, 200, "text/event-stream", events(),
+                                       {"request-id": message_id, "Cache-Control": "no-cache"})
+
+    async def _openai_chat(self, request: RecordedRequest, body: Dict[str, Any],
+                           writer: asyncio.StreamWriter) -> bool:
+        text, truncated = self._next_reply(body)
+        finish_reason = "length" if truncated else "stop"
+        completion_id = self._next_id("chatcmpl")
+        model = body.get("model", "gpt-mock")
+        created = int(time.time())
+        prompt_tokens = _estimate_tokens(body.get("messages", []))
+        completion_tokens = len(text.split())
+        if not body.get("stream"):
+            await self._generate(text)
+            return await self.write_json(writer, request, 200, {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                             "finish_reason": finish_reason, "logprobs": None}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            }, {})
+
+        def chunk(delta, finish_reason=None):
+            return _sse({"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                         "model": model, "choices": [{"index": 0, "delta": delta,
+                                                      "finish_reason": finish_reason, "logprobs": None}]})
+
+        async def events():
+            yield chunk({"role": "assistant", "content": ""})
+            async for word in self._words(text):
+                yield chunk({"content": word})
+            yield chunk({}, finish_reason)
+            yield _sse("[DONE]")
+
+        return await self.write_stream(writer, request, 200, "text/event-stream", events(),
+                                       {"Cache-Control": "no-cache"})
+
+    async def _audio(self, request: RecordedRequest, writer: asyncio.StreamWriter, text: str,
+                     audio_format: str) -> bool:
+        seconds = max(1, len(text.split())) * SECONDS_PER_WORD
+        if audio_format == "mp3":
+            content_type = "audio/mpeg"
+            audio = _MP3_FRAME * int(seconds / _MP3_FRAME_SECONDS)
+        else:
+            # 16-bit mono PCM at 24 kHz, with a WAV header if asked for
+            content_type = "audio/wav" if audio_format == "wav" else "audio/pcm"
+            samples = b"\x00\x00" * int(seconds * 24000)
+            audio = samples
+            if audio_format == "wav":
+                audio = (b"RIFF" + struct.pack("<I", 36 + len(samples)) + b"WAVEfmt "
+                         + struct.pack("<IHHIIHH", 16, 1, 1, 24000, 48000, 2, 16)
+                         + b"data" + struct.pack("<I", len(samples)) + samples)
+
+        async def chunks():
+            for offset in range(0, len(audio), self.audio_chunk_bytes):
+                if offset:
+                    await asyncio.sleep(self.audio_chunk_ms / 1000)
+                yield audio[offset:offset + self.audio_chunk_bytes]
+
+        return await self.write_stream(writer, request, 200, content_type, chunks())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in Anthropic, OpenAI and ElevenLabs APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4200)
+    parser.add_argument("--latency", help="Time to first byte model, e.g. 300, uniform:200:800, "
+                                          "lognormal:600:0.5, script:200,900")
+    parser.add_argument("--token-ms", type=float, default=15.0, help="Delay between streamed words")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=500, help="Status code of injected errors (e.g. 529)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered 429")
+    parser.add_argument("--reset-rate", type=float, default=0.0, help="Share of connections reset unanswered")
+    parser.add_argument("--reply", action="append", help="Text reply, used in turn (repeatable)")
+    parser.add_argument("--seed", type=int, help="Random seed for repeatable latencies and faults")
+    parser.add_argument("--record", help="Append every request to this JSONL file")
+    args = parser.parse_args()
+
+    server = MockProviderServer(args.host, args.port, error_rate=args.error_rate, error_status=args.error_status,
+                                reset_rate=args.reset_rate, seed=args.seed, record_path=args.record,
+                                latency=args.latency, throttle_rate=args.throttle_rate,
+                                replies=args.reply, token_ms=args.token_ms)
+
+    async def run():
+        await server.start()
+        print(f"Mock providers on {server.url}; point the provider modules at it with:\n"
+              f"export ANTHROPIC_BASE_URL={server.url}\n"
+              f"export OPENAI_BASE_URL={server.url}/v1\n"
+              f"export ELEVENLABS_BASE_URL={server.url}", file=sys.stderr)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,581 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Stand-in for the observability server, for offline tests and benchmarks.
+
+Implements the server's event API in pure asyncio, with no bun or
+database: POST /events, GET /events, /events/recent, /events/filter-options
+(with ETag/304) and the /stream WebSocket broadcast. Events are kept in
+memory.
+
+Faults can be injected into API requests (not /_mock or /stream):
+- latency: a delay before answering, fixed with jitter or drawn from a
+  latency model (--latency lognormal:50:0.8, see parse_latency)
+- errors: a share of requests answered with an error status, or with 429
+- resets: a share of connections reset without an answer
+
+MockHTTPServer holds the HTTP, fault and recording machinery; the
+provider stand-ins in mock_providers.py build on it.
+
+Every request is recorded (method, path, headers, body, injected fault)
+for assertions, and can be read over HTTP:
+- GET    /_mock/requests   recorded requests
+- DELETE /_mock/requests   clear the recording and stored events
+- POST   /_mock/faults     change fault settings, e.g. {"error_rate": 0.5}
+
+In tests:
+
+    with MockObservabilityServer(latency_ms=200, error_rate=0.1) as server:
+        send_event_to_server(event, f"{server.url}/events")
+        assert server.requests[0].json["hook_event_type"] == "Stop"
+
+Command line (on the server's port by default, so hooks need no changes):
+- ./mock_server.py
+- ./mock_server.py --port 4100 --latency-ms 300 --jitter-ms 100 --error-rate 0.05
+- ./mock_server.py --reset-rate 0.1 --record requests.jsonl
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import socket
+import struct
+import itertools
+import math
+import sys
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, If-None-Match",
+    "Access-Control-Expose-Headers": "ETag",
+}
+STATUS_TEXT = {200: "OK", 204: "No Content", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+               429: "Too Many Requests", 500: "Internal Server Error", 502: "Bad Gateway",
+               503: "Service Unavailable", 529: "Overloaded"}
+# Events sent to a new WebSocket client, as the server does
+INITIAL_EVENTS = 50
+
+
+class RecordedRequest:
+    """One request as received, with the fault injected into it, if any."""
+
+    __slots__ = ("time", "method", "path", "query", "headers", "body", "fault")
+
+    def __init__(self, method: str, path: str, query: Dict[str, str], headers: Dict[str, str], body: bytes):
+        self.time = time.time()
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+        self.fault: Optional[str] = None
+
+    @property
+    def json(self) -> Any:
+        """The body decoded as JSON, None if it is not."""
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "time": self.time, "method": self.method, "path": self.path, "query": self.query,
+            "headers": self.headers, "body": self.body.decode("utf-8", "replace"), "fault": self.fault,
+        }
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Latency model from a spec, in milliseconds.
+
+    - '200': constant
+    - 'uniform:100:400': uniformly between two values
+    - 'normal:300:50': mean and standard deviation, clipped at 0
+    - 'lognormal:800:0.6': median and sigma, long-tailed like real APIs
+    - 'script:200,800,1500': these values in turn, repeating
+
+    Returns:
+        A function drawing one latency from a random generator
+    """
+    kind, _, rest = spec.partition(":")
+    if not rest:
+        value = float(kind)
+        return lambda rng: value
+    params = [float(p) for p in rest.replace(",", ":").split(":")]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(params[0], params[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(params[0], params[1]))
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(params[0]), params[1])
+    if kind == "script":
+        values = itertools.cycle(params)
+        return lambda rng: next(values)
+    raise ValueError(f"Unknown latency model: {spec}")
+
+
+class MockHTTPServer:
+    """
+    asyncio HTTP/1.1 server with fault injection and request recording.
+
+    Subclasses answer requests in route() (JSON) or respond() (anything
+    else, e.g. streams), and shape injected errors in error_response().
+    """
+
+    FAULT_SETTINGS = ("latency", "latency_ms", "jitter_ms", "error_rate", "error_status",
+                      "throttle_rate", "reset_rate")
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 503, reset_rate: float = 0.0,
+                 seed: Optional[int] = None, record_path: Optional[str] = None,
+                 latency: Optional[str] = None, throttle_rate: float = 0.0):
+        """
+        Args:
+            host, port: Address to listen on; port 0 picks a free port
+            latency_ms: Delay before each API answer
+            jitter_ms: Uniform random extra delay, up to this much
+            error_rate: Share of API requests answered with error_status
+            error_status: Status code of injected errors
+            reset_rate: Share of API requests whose connection is reset
+            seed: Random seed for repeatable fault sequences
+            record_path: Also append each request to this JSONL file
+            latency: Latency model spec (see parse_latency), replacing
+                latency_ms and jitter_ms
+            throttle_rate: Share of API requests answered 429 with Retry-After
+        """
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.throttle_rate = throttle_rate
+        self.reset_rate = reset_rate
+        self.record_path = record_path
+        self.requests: List[RecordedRequest] = []
+        self.connections_opened = 0
+        self._rng = random.Random(seed)
+        self.latency = latency
+        self._latency_model = parse_latency(latency) if latency else None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def set_faults(self, **faults):
+        """Change fault settings; see FAULT_SETTINGS."""
+        for name, value in faults.items():
+            if name not in self.FAULT_SETTINGS:
+                raise ValueError(f"Unknown fault setting: {name}")
+            if name == "latency":
+                self._latency_model = parse_latency(value) if value else None
+            else:
+                value = int(value) if name == "error_status" else float(value)
+            setattr(self, name, value)
+
+    def faults(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.FAULT_SETTINGS}
+
+    def reset(self):
+        """Forget recorded requests."""
+        self.requests.clear()
+
+    def requests_to(self, path: str, method: Optional[str] = None) -> List[RecordedRequest]:
+        return [r for r in self.requests if r.path == path and (method is None or r.method == method)]
+
+    # Lifecycle
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+        # Kept-alive and streaming connections would otherwise outlive the server;
+        # closing them ends their handlers' reads
+        for writer in list(self._handlers.values()):
+            writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self._server:
+            await self._server.wait_closed()
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    def start_in_thread(self):
+        """Run the server on its own event loop in a daemon thread."""
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            self._ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop_thread(self):
+        if self._loop and self._thread:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start_in_thread()
+
+    def __exit__(self, *exc):
+        self.stop_thread()
+
+    # HTTP
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._handlers[task] = writer
+        self.connections_opened += 1
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                keep_open = await self._dispatch(request, reader, writer)
+                if not keep_open:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self._handlers.pop(task, None)
+            if not writer.transport.is_closing():
+                writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[RecordedRequest]:
+        try:
+            request_line = await reader.readuntil(b"\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = b""
+        if "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                chunks.append(await reader.readexactly(size + 2))
+                if size == 0:
+                    break
+            body = b"".join(chunk[:-2] for chunk in chunks)
+        parts = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        return RecordedRequest(method.upper(), parts.path, query, headers, body)
+
+    def _record(self, request: RecordedRequest):
+        self.requests.append(request)
+        if self.record_path:
+            with open(self.record_path, "a") as f:
+                f.write(json.dumps(request.to_dict()) + "\n")
+
+    def _delay_ms(self) -> float:
+        if self._latency_model:
+            return self._latency_model(self._rng)
+        return self.latency_ms + self._rng.uniform(0, self.jitter_ms)
+
+    async def _dispatch(self, request: RecordedRequest, reader: asyncio.StreamReader,
+                        writer: asyncio.StreamWriter) -> bool:
+        """Answer one request; returns whether the connection stays open."""
+        if self.faultable(request):
+            roll = self._rng.random()
+            if roll < self.reset_rate:
+                request.fault = "reset"
+            elif roll < self.reset_rate + self.throttle_rate:
+                request.fault = "http_429"
+            elif roll < self.reset_rate + self.throttle_rate + self.error_rate:
+                request.fault = f"http_{self.error_status}"
+            delay = self._delay_ms()
+            if delay > 0:
+                await asyncio.sleep(delay / 1000)
+        self._record(request)
+
+        if request.fault == "reset":
+            sock = writer.get_extra_info("socket")
+            if sock is not None:
+                # Linger 0 turns the close into a TCP reset
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            writer.transport.abort()
+            return False
+        if request.fault:
+            status = int(request.fault[len("http_"):])
+            body, headers = self.error_response(request, status)
+            if status == 429:
+                headers = dict({"Retry-After": "1"}, **headers)
+            return await self.write_json(writer, request, status, body, headers)
+        if request.path.startswith("/_mock"):
+            return await self.write_json(writer, request, *self._control(request))
+        return await self.respond(request, reader, writer)
+
+    def _control(self, request: RecordedRequest):
+        if request.path == "/_mock/requests":
+            if request.method == "DELETE":
+                self.reset()
+                return 200, {"cleared": True}, {}
+            return 200, [r.to_dict() for r in self.requests], {}
+        if request.path == "/_mock/faults" and request.method == "POST":
+            try:
+                self.set_faults(**(request.json or {}))
+            except (TypeError, ValueError) as e:
+                return 400, {"error": str(e)}, {}
+            return 200, self.faults(), {}
+        return 404, {"error": "Not found"}, {}
+
+    # Extension points
+
+    def faultable(self, request: RecordedRequest) -> bool:
+        """Whether faults and latency apply to a request."""
+        return not request.path.startswith("/_mock")
+
+    def error_response(self, request: RecordedRequest, status: int):
+        """JSON body and extra headers of an injected error."""
+        return {"error": "Injected failure"}, {}
+
+    def route(self, request: RecordedRequest):
+        """Status, JSON body (None for none) and extra headers for a request."""
+        return 404, {"error": "Not found"}, {}
+
+    async def respond(self, request: RecordedRequest, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> bool:
+        """Answer a request that got no fault; returns whether the connection stays open."""
+        if request.method == "OPTIONS":
+            return await self.write_json(writer, request, 204, None, {})
+        return await self.write_json(writer, request, *self.route(request))
+
+    # Responses
+
+    def _head(self, request: RecordedRequest, status: int, headers: Dict[str, str]) -> Tuple[bytes, bool]:
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'Unknown')}"]
+        lines += [f"{name}: {value}" for name, value in dict(CORS_HEADERS, **headers).items()]
+        keep_open = request.headers.get("connection", "").lower() != "close"
+        if not keep_open:
+            lines.append("Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"), keep_open
+
+    async def write_json(self, writer: asyncio.StreamWriter, request: RecordedRequest, status: int,
+                         body: Any, headers: Dict[str, str]) -> bool:
+        data = b"" if body is None else json.dumps(body).encode()
+        if body is not None:
+            headers = dict(headers, **{"Content-Type": "application/json"})
+        head, keep_open = self._head(request, status, dict(headers, **{"Content-Length": str(len(data))}))
+        # One write, so small responses go out in one segment
+        writer.write(head + data)
+        await writer.drain()
+        return keep_open
+
+    async def write_stream(self, writer: asyncio.StreamWriter, request: RecordedRequest, status: int,
+                           content_type: str, chunks: AsyncIterator[bytes],
+                           headers: Optional[Dict[str, str]] = None) -> bool:
+        """Send a response body with chunked transfer encoding as chunks are produced."""
+        head, keep_open = self._head(request, status, dict(headers or {}, **{
+            "Content-Type": content_type, "Transfer-Encoding": "chunked"}))
+        writer.write(head)
+        try:
+            async for chunk in chunks:
+                if chunk:
+                    writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    await writer.drain()
+        finally:
+            # Stop the producer too when the client goes away mid-stream
+            aclose = getattr(chunks, "aclose", None)
+            if aclose:
+                await aclose()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        return keep_open
+
+
+class MockObservabilityServer(MockHTTPServer):
+    """In-memory observability server with fault injection and request recording."""
+
+    def __init__(self, *args, **kwargs):
+        """Same arguments as MockHTTPServer."""
+        super().__init__(*args, **kwargs)
+        self.events: List[Dict[str, Any]] = []
+        self._ws_clients: Set[asyncio.StreamWriter] = set()
+
+    def reset(self):
+        """Forget recorded requests and stored events."""
+        super().reset()
+        self.events.clear()
+
+    def faultable(self, request: RecordedRequest) -> bool:
+        return super().faultable(request) and request.path != "/stream"
+
+    async def respond(self, request: RecordedRequest, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> bool:
+        if request.path == "/stream" and request.headers.get("upgrade", "").lower() == "websocket":
+            await self._websocket(request, reader, writer)
+            return False
+        return await super().respond(request, reader, writer)
+
+    def route(self, request: RecordedRequest):
+        method, path = request.method, request.path
+        if path == "/events" and method == "POST":
+            event = request.json
+            if not isinstance(event, dict):
+                return 400, {"error": "Invalid request"}, {}
+            if not all(event.get(key) for key in ("source_app", "session_id", "hook_event_type", "payload")):
+                return 400, {"error": "Missing required fields"}, {}
+            saved = dict(event, id=len(self.events) + 1, timestamp=event.get("timestamp") or int(time.time() * 1000))
+            self.events.append(saved)
+            self._broadcast({"type": "event", "data": saved})
+            return 200, saved, {}
+
+        if method == "GET" and path in ("/events", "/events/recent", "/events/filter-options"):
+            # Events are append-only, so the latest id versions every listing
+            etag = f'"{len(self.events)}"'
+            if request.headers.get("if-none-match") == etag:
+                return 304, None, {"ETag": etag}
+            return 200, self._listing(path, request.query), {"ETag": etag}
+
+        if path == "/":
+            return 200, {"server": "mock-observability-server"}, {}
+        return super().route(request)
+
+    def _listing(self, path: str, query: Dict[str, str]):
+        if path == "/events/filter-options":
+            return {
+                "source_apps": sorted({e["source_app"] for e in self.events}),
+                "session_ids": sorted({e["session_id"] for e in self.events}, reverse=True)[:100],
+                "hook_event_types": sorted({e["hook_event_type"] for e in self.events}),
+            }
+        if path == "/events/recent":
+            limit = int(query.get("limit", 100))
+            return sorted(self.events, key=lambda e: e["timestamp"])[-limit:] if limit > 0 else []
+        events = self.events
+        for key in ("source_app", "session_id", "hook_event_type"):
+            if query.get(key):
+                events = [e for e in events if e[key] == query[key]]
+        limit = min(int(query.get("limit", 100)), 1000)
+        if "before_id" in query:
+            events = [e for e in events if e["id"] < int(query["before_id"])][-limit:]
+        else:
+            events = [e for e in events if e["id"] > int(query.get("after_id", 0))][:limit]
+        return events
+
+    # WebSocket
+
+    async def _websocket(self, request: RecordedRequest, reader: asyncio.StreamReader,
+                         writer: asyncio.StreamWriter):
+        key = request.headers.get("sec-websocket-key", "")
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        writer.write(_ws_frame(json.dumps({"type": "initial", "data": self.events[-INITIAL_EVENTS:]}).encode()))
+        self._ws_clients.add(writer)
+        try:
+            while True:
+                opcode, payload = await _read_ws_frame(reader)
+                if opcode == 0x8:  # Close: echo it and end
+                    writer.write(_ws_frame(payload[:2], opcode=0x8))
+                    await writer.drain()
+                    return
+                if opcode == 0x9:  # Ping
+                    writer.write(_ws_frame(payload, opcode=0xA))
+        finally:
+            self._ws_clients.discard(writer)
+
+    def _broadcast(self, message: Dict[str, Any]):
+        frame = _ws_frame(json.dumps(message).encode())
+        for writer in list(self._ws_clients):
+            if writer.transport.is_closing():
+                self._ws_clients.discard(writer)
+            else:
+                writer.write(frame)
+
+
+def _ws_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    """An unmasked, final WebSocket frame, as servers send them."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def _read_ws_frame(reader: asyncio.StreamReader):
+    """Read one client frame; returns (opcode, unmasked payload)."""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    mask = await reader.readexactly(4) if second & 0x80 else b"\0\0\0\0"
+    payload = await reader.readexactly(length)
+    return first & 0x0F, bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in observability server with fault injection")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay before each API answer")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra delay, up to this much")
+    parser.add_argument("--latency", help="Latency model instead, e.g. lognormal:50:0.8 (see parse_latency)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=503, help="Status code of injected errors")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered 429")
+    parser.add_argument("--reset-rate", type=float, default=0.0, help="Share of connections reset unanswered")
+    parser.add_argument("--seed", type=int, help="Random seed for repeatable faults")
+    parser.add_argument("--record", help="Append every request to this JSONL file")
+    args = parser.parse_args()
+
+    server = MockObservabilityServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate,
+                                     args.error_status, args.reset_rate, args.seed, args.record,
+                                     latency=args.latency, throttle_rate=args.throttle_rate)
+
+    async def run():
+        await server.start()
+        print(f"Mock observability server on {server.url} (WebSocket {server.url.replace('http', 'ws')}/stream)",
+              file=sys.stderr)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Replay recorded session logs against the hooks or the server.
+
+Merges the per-hook logs (logs/<session>/<hook>.json) of one or more
+sessions into timestamp order and re-drives them, for regression and load
+tests built from real traffic.
+
+Targets:
+- server:     POST events straight to the observability server
+- send-event: run send_event.py once per event, as the old per-hook setup did
+- hooks:      run the commands settings.json configures for each event type
+              (dispatch.py), with TTS and summary flags removed unless
+              --keep-side-effects; hook logs go to --log-dir, not the
+              recorded logs
+
+Timing: --speed 1 replays at the recorded pace, --speed 10 ten times faster,
+--speed max as fast as --concurrency allows. --max-gap shortens idle
+stretches. Events of one session are delivered in order, each after the
+previous one finished, as Claude Code runs hooks; sessions run concurrently.
+--align start starts every session at once instead of at its recorded
+offset, and --copies N replays each session N times under new ids.
+
+Entries are ordered by their logged_at stamp. Logs written before entries
+were stamped fall back to the transcript's tool call times, then to their
+position in the file.
+
+Usage:
+- ./replay.py logs/ --target server --speed max
+- ./replay.py logs/abc123 --target hooks --speed 1
+- ./replay.py logs/ --target send-event --speed 20 --max-gap 5 --copies 4 --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from utils.blobstore import resolve  # noqa: E402
+from utils.obs_client import DEFAULT_SERVER, AsyncObservabilityClient, ObservabilityError  # noqa: E402
+from utils.session_log import LOGGED_AT_KEY, read_session_log  # noqa: E402
+
+SETTINGS_PATH = HOOKS_DIR.parent / "settings.json"
+# Dispatcher flags that speak or call an LLM, dropped from replayed hook commands
+SIDE_EFFECT_FLAGS = {"--notify", "--announce", "--summarize", "--digest"}
+# Session files that are not hook logs
+NON_HOOK_LOGS = {"chat.json"}
+
+
+class Event:
+    """One recorded hook invocation."""
+
+    __slots__ = ("time_ms", "session_id", "event_type", "entry", "order")
+
+    def __init__(self, time_ms: float, session_id: str, event_type: str, entry: Dict[str, Any], order: int):
+        self.time_ms = time_ms
+        self.session_id = session_id
+        self.event_type = event_type
+        self.entry = entry
+        self.order = order
+
+
+def event_type_for(log_path: Path) -> str:
+    """Event type of a hook log, e.g. post_tool_use.json -> PostToolUse."""
+    return "".join(part.capitalize() for part in log_path.stem.split("_"))
+
+
+def _parse_iso(value: str) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() * 1000
+    except (AttributeError, ValueError):
+        return None
+
+
+def transcript_times(transcript_path: str) -> Dict[Tuple[str, str], float]:
+    """
+    Times of tool calls in a transcript, for logs written before logged_at.
+
+    Returns:
+        {('PreToolUse', tool_use_id): ms, ('PostToolUse', tool_use_id): ms}
+        from the tool_use and tool_result blocks
+    """
+    times = {}
+    try:
+        with open(transcript_path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                content = (record.get("message") or {}).get("content")
+                when = _parse_iso(record.get("timestamp"))
+                if when is None or not isinstance(content, list):
+                    continue
+                for block in content:
+                    if not isinstance(block, dict):
+                        continue
+                    if block.get("type") == "tool_use" and block.get("id"):
+                        times[("PreToolUse", block["id"])] = when
+                    elif block.get("type") == "tool_result" and block.get("tool_use_id"):
+                        times[("PostToolUse", block["tool_use_id"])] = when
+    except OSError:
+        pass
+    return times
+
+
+def session_dirs(paths: List[str]) -> List[Path]:
+    """Session directories named directly or found one level below a log root."""
+    dirs = []
+    for path in map(Path, paths):
+        if any(child.suffix in (".json", ".msgpack") for child in path.iterdir() if child.is_file()):
+            dirs.append(path)
+        else:
+            dirs.extend(sorted(child for child in path.iterdir() if child.is_dir() and not child.name.startswith(".")))
+    return dirs
+
+
+def load_session(session_dir: Path) -> Tuple[List[Event], int]:
+    """
+    Read a session's hook logs in recorded order.
+
+    Returns:
+        (events sorted by time, number of entries whose time was estimated)
+    """
+    events = []
+    estimated = 0
+    transcripts: Dict[str, Dict[Tuple[str, str], float]] = {}
+    for log_path in sorted(session_dir.iterdir()):
+        if (log_path.suffix not in (".json", ".msgpack") or log_path.name in NON_HOOK_LOGS
+                or log_path.name.startswith(".") or ".overflow" in log_path.name):
+            continue
+        default_type = event_type_for(log_path)
+        fallback = log_path.stat().st_mtime * 1000
+        untimed = []
+        for position, entry in enumerate(read_session_log(log_path)):
+            if not isinstance(entry, dict):
+                continue
+            event_type = entry.get("hook_event_name") or default_type
+            when = entry.pop(LOGGED_AT_KEY, None)
+            if when is None and entry.get("tool_use_id") and entry.get("transcript_path"):
+                path = entry["transcript_path"]
+                if path not in transcripts:
+                    transcripts[path] = transcript_times(path)
+                when = transcripts[path].get((event_type, entry["tool_use_id"]))
+            event = Event(when, entry.get("session_id") or session_dir.name, event_type, entry, position)
+            if when is None:
+                estimated += 1
+                untimed.append(event)
+            else:
+                # Untimed entries logged before this one happened no later than it
+                for pending in untimed:
+                    pending.time_ms = when
+                untimed = []
+                fallback = when
+            events.append(event)
+        # Trailing untimed entries follow the last known time, or the file's mtime
+        for pending in untimed:
+            pending.time_ms = fallback
+    # File position breaks ties, keeping e.g. Pre before Post
+    events.sort(key=lambda e: (e.time_ms, e.order))
+    return events, estimated
+
+
+def build_schedule(sessions: List[List[Event]], speed: Optional[float], max_gap: Optional[float],
+                   align: str, copies: int) -> List[Tuple[float, Event]]:
+    """
+    Replay offsets in seconds for every event, merged across sessions.
+
+    Args:
+        sessions: Each session's events in time order
+        speed: Time compression factor, None for as fast as possible
+        max_gap: Longest idle time kept between a session's events, in seconds
+        align: 'recorded' keeps sessions at their recorded offsets, 'start'
+            starts them all at once
+        copies: Replays of each session; copies after the first get new ids
+    """
+    starts = [s[0].time_ms for s in sessions if s]
+    origin = min(starts) if starts else 0
+    schedule = []
+    for copy in range(copies):
+        for events in sessions:
+            if not events:
+                continue
+            offset = 0.0 if align == "start" else (events[0].time_ms - origin) / 1000
+            previous = events[0].time_ms
+            for event in events:
+                gap = (event.time_ms - previous) / 1000
+                previous = event.time_ms
+                offset += min(gap, max_gap) if max_gap is not None else gap
+                schedule.append((offset, copy_event(event, copy) if copy else event))
+    # Recorded order, which --speed max keeps too
+    schedule.sort(key=lambda item: item[0])
+    return [(offset / speed if speed else 0.0, event) for offset, event in schedule]
+
+
+def copy_event(event: Event, copy: int) -> Event:
+    """The event of a replayed session copy, under a new session and tool_use id."""
+    suffix = f"-replay{copy}"
+    entry = dict(event.entry, session_id=event.session_id + suffix)
+    if entry.get("tool_use_id"):
+        entry["tool_use_id"] = entry["tool_use_id"] + suffix
+    return Event(event.time_ms, event.session_id + suffix, event.event_type, entry, event.order)
+
+
+def hook_commands(settings_path: Path, keep_side_effects: bool, server_url: Optional[str]) -> Dict[str, List[List[str]]]:
+    """
+    Hook commands per event type from settings.json, runnable from here.
+
+    'uv run .claude/hooks/<script>.py' runs this checkout's script with the
+    current interpreter.
+    """
+    with open(settings_path) as f:
+        settings = json.load(f)
+    commands: Dict[str, List[List[str]]] = {}
+    for event_type, matchers in settings.get("hooks", {}).items():
+        for matcher in matchers:
+            for hook in matcher.get("hooks", []):
+                argv = shlex.split(hook.get("command", ""))
+                if argv[:2] == ["uv", "run"] and len(argv) > 2 and (HOOKS_DIR / Path(argv[2]).name).exists():
+                    argv = [sys.executable, str(HOOKS_DIR / Path(argv[2]).name)] + argv[3:]
+                if not keep_side_effects:
+                    argv = [arg for arg in argv if arg not in SIDE_EFFECT_FLAGS]
+                if server_url and Path(argv[1] if len(argv) > 1 else "").name == "dispatch.py":
+                    argv += ["--server-url", server_url]
+                commands.setdefault(event_type, []).append(argv)
+    return commands
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return round(sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))], 2)
+
+
+class Replayer:
+    """Delivers scheduled events to a target, in order within each session."""
+
+    def __init__(self, args: argparse.Namespace, env: Dict[str, str]):
+        self.args = args
+        self.env = env
+        self.slots = asyncio.Semaphore(args.concurrency)
+        self.session_locks: Dict[str, asyncio.Lock] = {}
+        self.results: Counter = Counter()
+        self.latencies: List[float] = []
+        self.lags: List[float] = []
+        self.client = None
+        self.commands: Dict[str, List[List[str]]] = {}
+        if args.target == "server":
+            self.client = AsyncObservabilityClient(args.server, max_connections=args.concurrency, cache_dir=None)
+        elif args.target == "hooks":
+            self.commands = hook_commands(Path(args.settings), args.keep_side_effects, args.server_url)
+
+    async def _run_process(self, argv: List[str], stdin: bytes) -> str:
+        process = await asyncio.create_subprocess_exec(
+            *argv, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL, env=self.env)
+        await process.communicate(stdin)
+        return f"exit_{process.returncode}"
+
+    async def _deliver(self, event: Event) -> List[str]:
+        if self.args.target == "server":
+            try:
+                await self.client.send_event({
+                    "source_app": self.args.source_app,
+                    "session_id": event.session_id,
+                    "hook_event_type": event.event_type,
+                    "payload": event.entry,
+                    "timestamp": int(time.time() * 1000),
+                })
+                return ["ok"]
+            except ObservabilityError as e:
+                return [f"http_{e.status}" if e.status else "connection_error"]
+        stdin = json.dumps(resolve(event.entry)).encode()
+        if self.args.target == "send-event":
+            argv = [sys.executable, str(HOOKS_DIR / "send_event.py"), "--source-app", self.args.source_app,
+                    "--event-type", event.event_type]
+            if self.args.server_url:
+                argv += ["--server-url", self.args.server_url]
+            return [await self._run_process(argv, stdin)]
+        return [await self._run_process(argv, stdin) for argv in self.commands.get(event.event_type, [])]
+
+    async def replay_one(self, event: Event, due: float):
+        lock = self.session_locks.setdefault(event.session_id, asyncio.Lock())
+        async with lock, self.slots:
+            started = time.perf_counter()
+            self.lags.append((started - due) * 1000)
+            try:
+                outcomes = await self._deliver(event)
+            except OSError as e:
+                outcomes = [e.__class__.__name__]
+            self.latencies.append((time.perf_counter() - started) * 1000)
+            self.results.update(outcomes)
+
+    async def run(self, schedule: List[Tuple[float, Event]]) -> float:
+        tasks = []
+        start = time.perf_counter()
+        for offset, event in schedule:
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # Queue now, so per-session locks are taken in schedule order
+            tasks.append(asyncio.ensure_future(self.replay_one(event, start + offset)))
+            await asyncio.sleep(0)
+            if self.args.progress and len(tasks) % 500 == 0:
+                print(f"... {len(tasks)}/{len(schedule)} events started", file=sys.stderr)
+        if tasks:
+            await asyncio.gather(*tasks)
+        if self.client:
+            await self.client.close()
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded session logs")
+    parser.add_argument("paths", nargs="+", help="Session log directories, or log roots containing them")
+    parser.add_argument("--target", choices=["server", "send-event", "hooks"], default="server")
+    parser.add_argument("--speed", default="1", help="Replay speed factor, or 'max' (default: %(default)s)")
+    parser.add_argument("--max-gap", type=float, help="Cap idle time between a session's events, in seconds")
+    parser.add_argument("--align", choices=["recorded", "start"], default="recorded",
+                        help="Keep sessions at their recorded offsets, or start them all at once")
+    parser.add_argument("--copies", type=int, default=1, help="Replay each session this many times")
+    parser.add_argument("--session", action="append", default=[], help="Only sessions with this id prefix")
+    parser.add_argument("--limit", type=int, help="Replay at most this many events")
+    parser.add_argument("--concurrency", type=int, default=16, help="Events in flight at once")
+    parser.add_argument("--server", default=DEFAULT_SERVER, help="Server origin for --target server")
+    parser.add_argument("--server-url", help="Event endpoint passed to send_event.py and dispatch.py")
+    parser.add_argument("--source-app", default="replay", help="source_app for --target server and send-event")
+    parser.add_argument("--settings", default=str(SETTINGS_PATH), help="settings.json for --target hooks")
+    parser.add_argument("--keep-side-effects", action="store_true",
+                        help="Keep TTS and summary flags in replayed hook commands")
+    parser.add_argument("--log-dir", help="CLAUDE_HOOKS_LOG_DIR for replayed hooks (default: a new temp dir)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--progress", action="store_true", help="Print progress to stderr")
+    args = parser.parse_args()
+
+    speed = None if args.speed == "max" else float(args.speed)
+    if speed is not None and speed <= 0:
+        parser.error("--speed must be positive or 'max'")
+
+    sessions = []
+    estimated = 0
+    for session_dir in session_dirs(args.paths):
+        if args.session and not any(session_dir.name.startswith(prefix) for prefix in args.session):
+            continue
+        events, untimed = load_session(session_dir)
+        sessions.append(events)
+        estimated += untimed
+    schedule = build_schedule(sessions, speed, args.max_gap, args.align, args.copies)
+    if args.limit:
+        schedule = schedule[:args.limit]
+    if not schedule:
+        print("No hook log entries found", file=sys.stderr)
+        sys.exit(1)
+
+    env = dict(os.environ)
+    if args.target != "server":
+        # Replayed hooks must not append to the logs being replayed
+        env["CLAUDE_HOOKS_LOG_DIR"] = args.log_dir or tempfile.mkdtemp(prefix="replay-logs-")
+
+    replayer = Replayer(args, env)
+    elapsed = asyncio.run(replayer.run(schedule))
+
+    latencies = sorted(replayer.latencies)
+    lags = sorted(replayer.lags)
+    failures = sum(count for outcome, count in replayer.results.items() if outcome not in ("ok", "exit_0"))
+    report = {
+        "target": args.target,
+        "sessions": sum(1 for s in sessions if s) * args.copies,
+        "events": len(schedule),
+        "estimated_times": estimated,
+        "speed": args.speed,
+        "recorded_seconds": round(schedule[-1][0] * speed, 3) if speed else None,
+        "elapsed_seconds": round(elapsed, 3),
+        "events_per_second": round(len(schedule) / elapsed, 1) if elapsed else None,
+        "outcomes": dict(replayer.results),
+        "failures": failures,
+        "latency_ms": {"p50": percentile(latencies, 0.5), "p99": percentile(latencies, 0.99),
+                       "max": percentile(latencies, 1.0)},
+        # How far behind schedule events started; large values mean the target is the bottleneck
+        "lag_ms": {"p50": percentile(lags, 0.5), "p99": percentile(lags, 0.99), "max": percentile(lags, 1.0)},
+    }
+    if args.target != "server":
+        report["log_dir"] = env["CLAUDE_HOOKS_LOG_DIR"]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"Replayed {report['events']} events from {report['sessions']} sessions to {args.target} "
+              f"in {report['elapsed_seconds']}s ({report['events_per_second']}/s)")
+        print(f"Outcomes: {report['outcomes']}")
+        print(f"Latency p50 {report['latency_ms']['p50']} ms, p99 {report['latency_ms']['p99']} ms; "
+              f"schedule lag p99 {report['lag_ms']['p99']} ms")
+        if estimated:
+            print(f"{estimated} entries had no logged_at; their times were estimated")
+        if "log_dir" in report:
+            print(f"Hook logs: {report['log_dir']}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
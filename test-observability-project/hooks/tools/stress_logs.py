@@ -0,0 +1,148 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Stress test concurrent writers of one session's logs.
+
+Runs many writers against the same session log at increasing concurrency,
+then checks that every entry is present exactly once and reports throughput.
+
+Writers:
+- hook:   one post_tool_use.py process per entry, as parallel subagents do
+- direct: worker processes calling append_session_log() in a loop, to
+          measure the writer without interpreter startup
+- legacy: the old read-modify-write of the whole array, for comparison
+
+Usage:
+- ./stress_logs.py                               # 300 hook processes per level
+- ./stress_logs.py --writer direct -n 5000
+- ./stress_logs.py --concurrency 1,16,64,256 --json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+SESSION_ID = "stress-session"
+LOG_NAME = "post_tool_use.json"
+
+
+def make_entry(i: int, payload_bytes: int) -> dict:
+    return {
+        "session_id": SESSION_ID,
+        "hook_event_name": "PostToolUse",
+        "tool_name": "Bash",
+        "tool_use_id": f"stress-{i}",
+        "tool_input": {"command": f"echo {i}"},
+        "tool_response": {"stdout": "x" * payload_bytes, "stderr": "", "interrupted": False},
+    }
+
+
+def run_hook(args):
+    i, payload_bytes, env = args
+    subprocess.run([sys.executable, str(HOOKS_DIR / "post_tool_use.py")],
+                   input=json.dumps(make_entry(i, payload_bytes)).encode(),
+                   env=env, capture_output=True, timeout=60)
+
+
+def _direct_worker(job):
+    from utils.session_log import append_session_log
+
+    start, stop, payload_bytes = job
+    for i in range(start, stop):
+        append_session_log(SESSION_ID, LOG_NAME, make_entry(i, payload_bytes))
+
+
+def _legacy_worker(job):
+    from utils.constants import ensure_session_log_dir
+
+    start, stop, payload_bytes = job
+    log_path = ensure_session_log_dir(SESSION_ID) / LOG_NAME
+    for i in range(start, stop):
+        try:
+            log_data = json.loads(log_path.read_text()) if log_path.exists() else []
+        except ValueError:
+            log_data = []
+        log_data.append(make_entry(i, payload_bytes))
+        log_path.write_text(json.dumps(log_data))
+
+
+def run_level(writer: str, concurrency: int, count: int, payload_bytes: int, log_dir: str) -> dict:
+    """Write count entries with the given concurrency and verify them."""
+    env = dict(os.environ, CLAUDE_HOOKS_LOG_DIR=log_dir)
+    started = time.perf_counter()
+    if writer == "hook":
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(run_hook, [(i, payload_bytes, env) for i in range(count)]))
+    else:
+        per_worker = -(-count // concurrency)
+        jobs = [(start, min(start + per_worker, count), payload_bytes)
+                for start in range(0, count, per_worker)]
+        worker = _direct_worker if writer == "direct" else _legacy_worker
+        with get_context("fork").Pool(concurrency) as pool:
+            pool.map(worker, jobs)
+    elapsed = time.perf_counter() - started
+
+    from utils.session_log import overflow_path, read_session_log
+
+    session_dir = Path(log_dir) / SESSION_ID
+    log_path = session_dir / LOG_NAME
+    ids = [entry.get("tool_use_id") for entry in read_session_log(log_path)]
+    expected = {f"stress-{i}" for i in range(count)}
+    overflow = overflow_path(log_path)
+    return {
+        "writer": writer,
+        "concurrency": concurrency,
+        "entries": count,
+        "lost": len(expected - set(ids)),
+        "duplicated": len(ids) - len(set(ids)),
+        "overflowed": len(overflow.read_bytes().splitlines()) if overflow.exists() else 0,
+        "corrupt_files": len(list(session_dir.glob(f"{LOG_NAME}.corrupt-*"))),
+        "seconds": round(elapsed, 3),
+        "entries_per_second": round(count / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress test concurrent session log writers")
+    parser.add_argument("--writer", choices=["hook", "direct", "legacy"], default="hook")
+    parser.add_argument("-n", "--count", type=int, default=300, help="Entries per concurrency level")
+    parser.add_argument("--concurrency", default="1,8,32,128,300",
+                        help="Comma-separated concurrency levels")
+    parser.add_argument("--payload-bytes", type=int, default=1000, help="tool_response size per entry")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for concurrency in [int(level) for level in args.concurrency.split(",")]:
+        with tempfile.TemporaryDirectory(prefix="stress-logs-") as log_dir:
+            # The log directory is read at import, so workers get it from the environment
+            os.environ["CLAUDE_HOOKS_LOG_DIR"] = log_dir
+            for module in [name for name in sys.modules if name.startswith("utils")]:
+                del sys.modules[module]
+            results.append(run_level(args.writer, concurrency, args.count, args.payload_bytes, log_dir))
+        if not args.json:
+            r = results[-1]
+            print(f"{r['writer']:>6} c={r['concurrency']:<4} {r['entries']} entries in {r['seconds']:.2f}s "
+                  f"({r['entries_per_second']:.0f}/s)  lost={r['lost']} dup={r['duplicated']} "
+                  f"overflow={r['overflowed']} corrupt={r['corrupt_files']}")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    sys.exit(1 if any(r["lost"] or r["duplicated"] for r in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
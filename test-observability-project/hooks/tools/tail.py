@@ -0,0 +1,328 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "websockets",
+# ]
+# ///
+
+"""
+Follow the observability server's event stream in a terminal.
+
+Connects to the server's /stream WebSocket and prints matching events as
+they are saved, for CI runners and shells without the dashboard.
+
+- Filters on source app, session, event type and tool (each repeatable)
+- Output goes through a bounded buffer written from a worker thread, so a
+  slow terminal never stalls the socket. When the buffer is full the oldest
+  events are dropped (--overflow drop) or new ones are folded into per-type
+  counts (--overflow aggregate); either way a notice line says so
+- After a reconnect, the events missed while disconnected are fetched from
+  GET /events after the last seen id before the live stream resumes. The
+  last id is printed on exit; pass it to --after-id to resume a later run
+
+Usage:
+- ./tail.py                                          # Live stream, last 10 events first
+- ./tail.py --session abc123 --event-type PostToolUse --tool Bash
+- ./tail.py --source-app ci-runner --json | jq .
+- ./tail.py --after-id 4120                          # Everything since event 4120, then live
+"""
+
+import argparse
+import asyncio
+import json
+import signal
+import sys
+import time
+from collections import Counter, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import websockets
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.obs_client import DEFAULT_SERVER, AsyncObservabilityClient  # noqa: E402
+
+# Reconnect backoff, doubling from the first value up to the second
+RECONNECT_DELAYS = (0.5, 10.0)
+
+
+class EventFilter:
+    """Client-side event filter; an empty criterion matches everything."""
+
+    def __init__(self, source_apps: List[str], sessions: List[str], event_types: List[str], tools: List[str]):
+        self.source_apps = set(source_apps)
+        self.sessions = sessions
+        self.event_types = set(event_types)
+        self.tools = set(tools)
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        if self.source_apps and event.get("source_app") not in self.source_apps:
+            return False
+        if self.sessions and not any(str(event.get("session_id", "")).startswith(s) for s in self.sessions):
+            return False
+        if self.event_types and event.get("hook_event_type") not in self.event_types:
+            return False
+        if self.tools and (event.get("payload") or {}).get("tool_name") not in self.tools:
+            return False
+        return True
+
+    def server_params(self) -> Dict[str, str]:
+        """The criteria GET /events can apply itself: single exact values."""
+        params = {}
+        if len(self.source_apps) == 1:
+            params["source_app"] = next(iter(self.source_apps))
+        if len(self.event_types) == 1:
+            params["hook_event_type"] = next(iter(self.event_types))
+        return params
+
+
+def event_key(event: Dict[str, Any]) -> str:
+    """Aggregation key of an event: its type, and tool if any."""
+    tool = (event.get("payload") or {}).get("tool_name")
+    return f"{event.get('hook_event_type', '?')}/{tool}" if tool else event.get("hook_event_type", "?")
+
+
+class EventBuffer:
+    """
+    Bounded buffer between the socket reader and the terminal writer.
+
+    Putting never waits: when the buffer is full, 'drop' discards the oldest
+    event and 'aggregate' counts the new one instead of storing it.
+    """
+
+    def __init__(self, size: int, policy: str):
+        self.size = size
+        self.policy = policy
+        self._events: Deque[Dict[str, Any]] = deque()
+        # Created in the running loop (Python < 3.10 binds it at creation)
+        self._ready: Optional[asyncio.Event] = None
+        self._dropped = 0
+        self._skipped: Counter = Counter()
+        self.total_dropped = 0
+        self.total_aggregated = 0
+
+    def put(self, event: Dict[str, Any]):
+        if len(self._events) >= self.size:
+            if self.policy == "drop":
+                self._events.popleft()
+                self._dropped += 1
+                self.total_dropped += 1
+            else:
+                self._skipped[event_key(event)] += 1
+                self.total_aggregated += 1
+                self._wake()
+                return
+        self._events.append(event)
+        self._wake()
+
+    def _wake(self):
+        if self._ready is not None:
+            self._ready.set()
+
+    async def get_batch(self, max_items: int) -> Tuple[int, List[Dict[str, Any]], Counter]:
+        """
+        Wait for output, then take it.
+
+        Returns:
+            (events dropped before this batch, up to max_items events,
+            counts of events aggregated after it)
+        """
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        while not (self._events or self._dropped or self._skipped):
+            self._ready.clear()
+            await self._ready.wait()
+        batch = [self._events.popleft() for _ in range(min(max_items, len(self._events)))]
+        dropped, self._dropped = self._dropped, 0
+        skipped, self._skipped = self._skipped, Counter()
+        return dropped, batch, skipped
+
+
+def event_detail(event: Dict[str, Any]) -> str:
+    """Short description of an event: its summary, or the most telling input field."""
+    if event.get("summary"):
+        return event["summary"]
+    payload = event.get("payload") or {}
+    tool_input = payload.get("tool_input") or {}
+    for value in (tool_input.get("command"), tool_input.get("file_path"), tool_input.get("pattern"),
+                  payload.get("message"), payload.get("prompt")):
+        if value:
+            return str(value)
+    return ""
+
+
+def format_event(event: Dict[str, Any], width: int = 160) -> str:
+    timestamp = event.get("timestamp")
+    clock = datetime.fromtimestamp(timestamp / 1000).strftime("%H:%M:%S") if timestamp else "--:--:--"
+    tool = (event.get("payload") or {}).get("tool_name") or ""
+    line = (f"{clock} #{event.get('id', '?'):<6} {event.get('source_app', '?'):<16} "
+            f"{str(event.get('session_id', '?'))[:8]:<8} {event.get('hook_event_type', '?'):<16} "
+            f"{tool:<10} {event_detail(event)}")
+    return " ".join(line.split("\n"))[:width]
+
+
+def format_notices(dropped: int, skipped: Counter) -> List[str]:
+    lines = []
+    if dropped:
+        lines.append(f"... {dropped} events dropped, output is too slow")
+    if skipped:
+        counts = ", ".join(f"{key} x{count}" for key, count in skipped.most_common(8))
+        lines.append(f"... {sum(skipped.values())} events skipped: {counts}")
+    return lines
+
+
+class Tail:
+    """Reads the stream into the buffer, reconnecting and backfilling as needed."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.filter = EventFilter(args.source_app, args.session, args.event_type, args.tool)
+        self.buffer = EventBuffer(args.buffer, args.overflow)
+        self.last_id: Optional[int] = args.after_id
+        self.received = 0
+        self.shown = 0
+        self.reconnects = 0
+        self._history_shown = args.after_id is not None
+        parts = urlsplit(args.server)
+        scheme = "wss" if parts.scheme == "https" else "ws"
+        self.stream_url = f"{scheme}://{parts.netloc}{parts.path.rstrip('/')}/stream"
+        # Backfill pages are read once, so they are not worth caching on disk
+        self.client = AsyncObservabilityClient(args.server, max_connections=1, cache_dir=None)
+
+    def accept(self, event: Dict[str, Any]):
+        """Queue a new event, ignoring those already seen."""
+        event_id = event.get("id")
+        if isinstance(event_id, int):
+            if self.last_id is not None and event_id <= self.last_id:
+                return
+            self.last_id = event_id
+        self.received += 1
+        if self.filter.matches(event):
+            self.buffer.put(event)
+
+    async def backfill(self):
+        """Fetch the events saved since the last seen id."""
+        async for event in self.client.iter_events(after_id=self.last_id or 0, **self.filter.server_params()):
+            self.accept(event)
+
+    def on_initial(self, events: List[Dict[str, Any]]):
+        """Show the tail of the server's recent events, on the first connect only."""
+        if self._history_shown:
+            return
+        self._history_shown = True
+        events = sorted(events, key=lambda e: e.get("id", 0))
+        matching = [e for e in events if self.filter.matches(e)]
+        for event in matching[len(matching) - self.args.history:] if self.args.history else []:
+            self.buffer.put(event)
+        if events and isinstance(events[-1].get("id"), int):
+            self.last_id = events[-1]["id"]
+
+    async def read_stream(self):
+        delay = RECONNECT_DELAYS[0]
+        connected = False
+        while True:
+            try:
+                async with websockets.connect(self.stream_url, max_size=None) as ws:
+                    connected = True
+                    delay = RECONNECT_DELAYS[0]
+                    if self._history_shown:
+                        # Live events queue up in the socket meanwhile, accept() skips the overlap
+                        await self.backfill()
+                    async for message in ws:
+                        try:
+                            data = json.loads(message)
+                        except ValueError:
+                            continue
+                        if data.get("type") == "initial":
+                            self.on_initial(data.get("data") or [])
+                        elif data.get("type") == "event" and isinstance(data.get("data"), dict):
+                            self.accept(data["data"])
+                reason = "closed by the server"
+            except Exception as e:
+                if not connected and self.args.once:
+                    raise
+                reason = f"{e.__class__.__name__}: {e}"
+            print(f"... disconnected ({reason}), reconnecting in {delay:.1f}s", file=sys.stderr)
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_DELAYS[1])
+
+    async def write_output(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            dropped, batch, skipped = await self.buffer.get_batch(self.args.batch)
+            lines = format_notices(dropped, Counter())
+            if self.args.json:
+                lines += [json.dumps(event) for event in batch]
+            else:
+                lines += [format_event(event, self.args.width) for event in batch]
+            lines += format_notices(0, skipped)
+            self.shown += len(batch)
+            # Terminal writes block; keep them off the loop so the socket keeps being read
+            await loop.run_in_executor(None, write_lines, lines)
+
+    async def run(self):
+        tasks = [asyncio.ensure_future(self.read_stream()), asyncio.ensure_future(self.write_output())]
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, lambda: [task.cancel() for task in tasks])
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            await self.client.close()
+
+
+def write_lines(lines: List[str]):
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Follow the observability server's event stream")
+    parser.add_argument("--server", default=DEFAULT_SERVER, help="Server origin (default: %(default)s)")
+    parser.add_argument("--source-app", action="append", default=[], help="Only this source app (repeatable)")
+    parser.add_argument("--session", action="append", default=[],
+                        help="Only this session id or id prefix (repeatable)")
+    parser.add_argument("--event-type", action="append", default=[], help="Only this event type (repeatable)")
+    parser.add_argument("--tool", action="append", default=[], help="Only events of this tool (repeatable)")
+    parser.add_argument("--history", type=int, default=10,
+                        help="Recent matching events to show on start (default: %(default)s)")
+    parser.add_argument("--after-id", type=int, help="Show every event after this id first, then follow")
+    parser.add_argument("--buffer", type=int, default=1000, help="Events buffered for output (default: %(default)s)")
+    parser.add_argument("--overflow", choices=["drop", "aggregate"], default="drop",
+                        help="When the buffer is full: drop the oldest events or count new ones by type")
+    parser.add_argument("--batch", type=int, default=200, help="Events per terminal write")
+    parser.add_argument("--width", type=int, default=160, help="Maximum line width")
+    parser.add_argument("--json", action="store_true", help="Print events as JSON lines")
+    parser.add_argument("--once", action="store_true", help="Exit if the first connection fails")
+    args = parser.parse_args()
+
+    tail = Tail(args)
+    started = time.monotonic()
+    try:
+        asyncio.run(tail.run())
+    except (OSError, websockets.exceptions.WebSocketException) as e:
+        print(f"Cannot connect to {tail.stream_url}: {e}", file=sys.stderr)
+        sys.exit(1)
+    except BrokenPipeError:
+        pass
+    finally:
+        print(f"... {tail.received} events received, {tail.shown} shown, {tail.buffer.total_dropped} dropped, "
+              f"{tail.buffer.total_aggregated} aggregated, {tail.reconnects} reconnects "
+              f"in {time.monotonic() - started:.0f}s; last id {tail.last_id} (resume with --after-id)",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
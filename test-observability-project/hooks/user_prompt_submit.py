@@ -12,7 +12,8 @@ import os
 import sys
 from pathlib import Path
 from datetime import datetime
-from utils.constants import ensure_session_log_dir
+from utils import codec, metrics, profiling, rollup, tracing
+from utils.session_log import append_session_log
 
 try:
     from dotenv import load_dotenv
@@ -23,26 +24,8 @@ except ImportError:
 
 def log_user_prompt(session_id, input_data):
     """Log user prompt to session directory."""
-    # Ensure session log directory exists
-    log_dir = ensure_session_log_dir(session_id)
-    log_file = log_dir / 'user_prompt_submit.json'
-    
-    # Read existing log data or initialize empty list
-    if log_file.exists():
-        with open(log_file, 'r') as f:
-            try:
-                log_data = json.load(f)
-            except (json.JSONDecodeError, ValueError):
-                log_data = []
-    else:
-        log_data = []
-    
     # Append the entire input data
-    log_data.append(input_data)
-    
-    # Write back to file with formatting
-    with open(log_file, 'w') as f:
-        json.dump(log_data, f, indent=2)
+    append_session_log(session_id, 'user_prompt_submit.json', input_data)
 
 
 def validate_prompt(prompt):
@@ -74,16 +57,22 @@ def main():
         parser.add_argument('--log-only', action='store_true',
                           help='Only log prompts, no validation or blocking')
         args = parser.parse_args()
+        metrics.start('user_prompt_submit', 'UserPromptSubmit')
         
         # Read JSON input from stdin
-        input_data = json.loads(sys.stdin.read())
+        with metrics.span('stdin_parse'):
+            input_data = codec.read_stdin()
+        tracing.bind_input(input_data)
         
         # Extract session_id and prompt
         session_id = input_data.get('session_id', 'unknown')
         prompt = input_data.get('prompt', '')
         
         # Log the user prompt
-        log_user_prompt(session_id, input_data)
+        with metrics.span('log_write'):
+            log_user_prompt(session_id, input_data)
+        with metrics.span('rollup'):
+            rollup.record('UserPromptSubmit', input_data)
         
         # Validate prompt if requested and not in log-only mode
         if args.validate and not args.log_only:
@@ -91,6 +80,7 @@ def main():
             if not is_valid:
                 # Exit code 2 blocks the prompt with error message
                 print(f"Prompt blocked: {reason}", file=sys.stderr)
+                metrics.set_outcome('blocked')
                 sys.exit(2)
         
         # Add context information (optional)
@@ -102,11 +92,13 @@ def main():
         
     except json.JSONDecodeError:
         # Handle JSON decode errors gracefully
+        metrics.set_outcome('invalid_input')
         sys.exit(0)
     except Exception:
         # Handle any other errors gracefully
+        metrics.set_outcome('error')
         sys.exit(0)
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    profiling.run(main, 'user_prompt_submit')
\ No newline at end of file
@@ -0,0 +1,232 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Content-addressed blob store for large hook payload fields.
+
+Write/Edit/MultiEdit events carry whole file contents in tool_input and
+tool_response. Strings above a size threshold are stored once under their
+SHA-256 and replaced in logs and events by a small reference object:
+
+    {"$blob": "sha256:<hex>", "size": <bytes>, "preview": "<first chars>"}
+
+Use resolve() (or the CLI below) to expand references back into content.
+Events carry only the references: the hooks upload each blob to the
+observability server (PUT /blobs/<hex>, see obs_client.upload_blobs) before
+the event that refers to it, and the dashboard fetches the content from
+GET /blobs/<hex> when an event is opened.
+"""
+
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+try:
+    from utils.constants import LOG_BASE_DIR
+except ImportError:  # Running this file directly as a script
+    from constants import LOG_BASE_DIR
+
+# Where blobs are stored, sharded by the first two hex digits of the hash
+BLOB_DIR = os.environ.get("CLAUDE_HOOKS_BLOB_DIR", os.path.join(LOG_BASE_DIR, ".blobs"))
+
+# Strings at or above this many UTF-8 bytes are externalized (0 disables)
+BLOB_THRESHOLD = int(os.environ.get("CLAUDE_HOOKS_BLOB_THRESHOLD", "8192"))
+
+# Compress stored blobs with zlib unless set to "0"
+BLOB_COMPRESS = os.environ.get("CLAUDE_HOOKS_BLOB_COMPRESS", "1") != "0"
+
+BLOB_KEY = "$blob"
+PREVIEW_CHARS = 120
+
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+
+def blob_digest(ref: str) -> str:
+    """
+    The hex digest of a blob reference.
+
+    Args:
+        ref: "sha256:<hex>" or bare hex
+
+    Raises:
+        ValueError: If the digest is not 64 lowercase hex digits, so a
+            reference from an event or the command line cannot name a path
+            outside the store
+    """
+    digest = ref.split(":", 1)[-1] if isinstance(ref, str) else ""
+    if not _DIGEST.fullmatch(digest):
+        raise ValueError(f"Invalid blob reference: {ref!r}")
+    return digest
+
+
+def _encode(content: str) -> bytes:
+    # Decoded tool output can hold lone surrogates, which strict UTF-8 rejects
+    return content.encode("utf-8", "replace")
+
+
+def _blob_path(digest: str, compressed: bool) -> Path:
+    suffix = ".z" if compressed else ""
+    return Path(BLOB_DIR) / digest[:2] / f"{digest}{suffix}"
+
+
+def put_blob(content: str) -> str:
+    """
+    Store content in the blob store if it is not already there.
+
+    Args:
+        content: The string to store
+
+    Returns:
+        The blob reference, e.g. "sha256:<hex>"
+    """
+    data = _encode(content)
+    digest = hashlib.sha256(data).hexdigest()
+
+    # Identical content is stored once whichever form it was written in
+    if _blob_path(digest, True).exists() or _blob_path(digest, False).exists():
+        return f"sha256:{digest}"
+
+    path = _blob_path(digest, BLOB_COMPRESS)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if BLOB_COMPRESS:
+        data = zlib.compress(data, 1)
+
+    # Write to a temp file and rename so readers never see a partial blob
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    return f"sha256:{digest}"
+
+
+def get_blob(ref: str) -> Optional[str]:
+    """
+    Fetch the content for a blob reference.
+
+    Args:
+        ref: A reference returned by put_blob ("sha256:<hex>" or bare hex)
+
+    Returns:
+        The stored string, or None if the blob is not in the store
+
+    Raises:
+        ValueError: If ref is not a valid reference
+    """
+    digest = blob_digest(ref)
+    compressed_path = _blob_path(digest, True)
+    if compressed_path.exists():
+        return zlib.decompress(compressed_path.read_bytes()).decode("utf-8")
+    plain_path = _blob_path(digest, False)
+    if plain_path.exists():
+        return plain_path.read_bytes().decode("utf-8")
+    return None
+
+
+def is_blob_ref(value: Any) -> bool:
+    """Check whether a value is a blob reference object."""
+    return isinstance(value, dict) and isinstance(value.get(BLOB_KEY), str)
+
+
+def externalize(obj: Any, threshold: Optional[int] = None) -> Any:
+    """
+    Replace large strings in a JSON-like structure with blob references.
+
+    Args:
+        obj: Parsed JSON data (dicts, lists, scalars)
+        threshold: Size in UTF-8 bytes at which strings are externalized,
+            defaults to CLAUDE_HOOKS_BLOB_THRESHOLD
+
+    Returns:
+        A copy of obj with large strings replaced; obj itself is not modified
+    """
+    if threshold is None:
+        threshold = BLOB_THRESHOLD
+    if threshold <= 0:
+        return obj
+
+    if isinstance(obj, str):
+        # Every character encodes to at most 4 bytes, so short strings skip encoding
+        if len(obj) * 4 < threshold:
+            return obj
+        size = len(_encode(obj))
+        if size < threshold:
+            return obj
+        return {BLOB_KEY: put_blob(obj), "size": size, "preview": obj[:PREVIEW_CHARS]}
+    if isinstance(obj, dict):
+        return {key: externalize(value, threshold) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [externalize(value, threshold) for value in obj]
+    return obj
+
+
+def blob_refs(obj: Any) -> Iterator[str]:
+    """Yield every blob reference ("sha256:<hex>") in a JSON-like structure, depth first."""
+    if is_blob_ref(obj):
+        yield obj[BLOB_KEY]
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            yield from blob_refs(value)
+    elif isinstance(obj, list):
+        for value in obj:
+            yield from blob_refs(value)
+
+
+def resolve(obj: Any) -> Any:
+    """
+    Expand blob references in a JSON-like structure back into content.
+
+    References that are invalid or whose blob is missing from the local
+    store are left as-is.
+    """
+    if is_blob_ref(obj):
+        try:
+            content = get_blob(obj[BLOB_KEY])
+        except ValueError:
+            return obj
+        return obj if content is None else content
+    if isinstance(obj, dict):
+        return {key: resolve(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [resolve(value) for value in obj]
+    return obj
+
+
+def main():
+    """Command line interface: print the content of one or more blob references."""
+    if len(sys.argv) < 2:
+        print("Usage: blobstore.py sha256:<hex> [sha256:<hex> ...]", file=sys.stderr)
+        sys.exit(1)
+
+    exit_code = 0
+    for ref in sys.argv[1:]:
+        try:
+            content = get_blob(ref)
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+            exit_code = 1
+            continue
+        if content is None:
+            print(f"Blob not found: {ref}", file=sys.stderr)
+            exit_code = 1
+        else:
+            sys.stdout.write(content)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
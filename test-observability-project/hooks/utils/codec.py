@@ -0,0 +1,159 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Shared JSON/MessagePack codec for hooks.
+
+Uses orjson or msgspec when installed and falls back to the stdlib json
+module. Output is compact unless indent=True is requested. Set
+CLAUDE_HOOKS_JSON to 'json', 'orjson' or 'msgspec' to force a backend.
+"""
+
+import json
+import os
+import sys
+from typing import Any, Union
+
+_PREFERRED = os.environ.get("CLAUDE_HOOKS_JSON", "").strip().lower()
+
+# Session log format: 'json' (JSON array files) or 'msgpack' (binary record stream)
+LOG_FORMAT = os.environ.get("CLAUDE_HOOKS_LOG_FORMAT", "json").strip().lower()
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+if _PREFERRED == "json":
+    BACKEND = "json"
+elif _PREFERRED == "msgspec" and msgspec is not None:
+    BACKEND = "msgspec"
+elif orjson is not None and _PREFERRED in ("", "orjson"):
+    BACKEND = "orjson"
+elif msgspec is not None:
+    BACKEND = "msgspec"
+else:
+    BACKEND = "json"
+
+if msgspec is not None:
+    _msgspec_encoder = msgspec.json.Encoder()
+    _msgspec_decoder = msgspec.json.Decoder()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Decode a JSON document.
+
+    Raises:
+        json.JSONDecodeError: If the document is not valid JSON, whichever
+            backend is in use
+    """
+    if BACKEND == "orjson":
+        # orjson.JSONDecodeError already subclasses json.JSONDecodeError
+        return orjson.loads(data)
+    if BACKEND == "msgspec":
+        try:
+            return _msgspec_decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise json.JSONDecodeError(str(e), "", 0) from None
+    return json.loads(data)
+
+
+def dumpb(obj: Any, indent: bool = False) -> bytes:
+    """Encode obj as UTF-8 JSON bytes, compact unless indent is True."""
+    if BACKEND == "orjson":
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            pass  # e.g. integers wider than 64 bits, use the stdlib below
+    elif BACKEND == "msgspec" and not indent:
+        try:
+            return _msgspec_encoder.encode(obj)
+        except (TypeError, msgspec.EncodeError):
+            pass
+    if indent:
+        return json.dumps(obj, indent=2).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """Encode obj as a JSON string, compact unless indent is True."""
+    return dumpb(obj, indent).decode("utf-8")
+
+
+def read_stdin() -> Any:
+    """Read and decode the hook's JSON input from stdin."""
+    return loads(sys.stdin.buffer.read())
+
+
+def msgpack_available() -> bool:
+    """Check whether a MessagePack implementation is installed."""
+    return msgspec is not None or msgpack is not None
+
+
+def packb(obj: Any) -> bytes:
+    """
+    Encode obj as MessagePack.
+
+    Raises:
+        RuntimeError: If neither msgspec nor msgpack is installed
+    """
+    if msgspec is not None:
+        return msgspec.msgpack.encode(obj)
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    raise RuntimeError("MessagePack support requires msgspec or msgpack")
+
+
+def unpackb(data: bytes) -> Any:
+    """
+    Decode one MessagePack object.
+
+    Raises:
+        RuntimeError: If neither msgspec nor msgpack is installed
+    """
+    if msgspec is not None:
+        return msgspec.msgpack.decode(data)
+    if msgpack is not None:
+        return msgpack.unpackb(data, raw=False)
+    raise RuntimeError("MessagePack support requires msgspec or msgpack")
+
+
+def pack_record(obj: Any) -> bytes:
+    """
+    Encode one record for appending to a MessagePack log stream.
+
+    Each record is prefixed with its 4-byte big-endian length so a stream can
+    be split without a streaming decoder, whichever library wrote it.
+    """
+    data = packb(obj)
+    return len(data).to_bytes(4, "big") + data
+
+
+def iter_records(data: bytes):
+    """
+    Decode a stream written with pack_record().
+
+    Yields:
+        Each decoded record in order; a truncated trailing record is ignored
+    """
+    offset = 0
+    while offset + 4 <= len(data):
+        size = int.from_bytes(data[offset:offset + 4], "big")
+        offset += 4
+        if offset + size > len(data):
+            break
+        yield unpackb(data[offset:offset + size])
+        offset += size
@@ -0,0 +1,227 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Token-budgeted compaction of hook payloads for LLM prompts.
+
+The summarizer used to send json.dumps(payload, indent=2) cut at 1000
+characters: much of that went on indentation, session_id, transcript_path
+and cwd, and the Bash command or edited path could fall past the cut.
+compact_payload() instead:
+
+- drops context fields every event carries (session, transcript, cwd)
+  and values echoed from another field
+- lists the fields that say what happened first, per tool and event type
+  (Bash command before its stdout, file_path before file content)
+- writes one "path: value" line per field, with whitespace collapsed;
+  content moved to the blob store is shown by its preview and size
+- gives every field a minimum share of the budget, then hands out what
+  is left in priority order, abbreviating long values from the middle so
+  both their start and end survive
+
+Tokens are estimated at CHARS_PER_TOKEN characters each; the budget comes
+from CLAUDE_HOOKS_SUMMARY_TOKEN_BUDGET.
+"""
+
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from utils.blobstore import is_blob_ref
+except ImportError:  # Running this file directly as a script
+    from blobstore import is_blob_ref
+
+CHARS_PER_TOKEN = 4
+DEFAULT_BUDGET = int(os.environ.get("CLAUDE_HOOKS_SUMMARY_TOKEN_BUDGET", "200"))
+# Characters every field gets before any field gets more
+FIELD_MIN_CHARS = 48
+
+# Present in every event, and no help in describing it
+CONTEXT_KEYS = {"session_id", "transcript_path", "cwd", "hook_event_name", "permission_mode", "tool_use_id"}
+
+# Fields that say what a tool call did, most telling first
+TOOL_FIELDS = {
+    "Bash": ["tool_input.command", "tool_input.description", "tool_response.stderr", "tool_response.stdout",
+             "tool_response.interrupted"],
+    "Read": ["tool_input.file_path", "tool_input.offset", "tool_input.limit", "tool_response.file.numLines"],
+    "Write": ["tool_input.file_path", "tool_input.content"],
+    "Edit": ["tool_input.file_path", "tool_input.old_string", "tool_input.new_string", "tool_input.replace_all"],
+    "MultiEdit": ["tool_input.file_path", "tool_input.edits"],
+    "NotebookEdit": ["tool_input.notebook_path", "tool_input.edit_mode", "tool_input.new_source"],
+    "Grep": ["tool_input.pattern", "tool_input.path", "tool_input.glob", "tool_input.output_mode",
+             "tool_response.numFiles", "tool_response.filenames"],
+    "Glob": ["tool_input.pattern", "tool_input.path", "tool_response.numFiles", "tool_response.filenames"],
+    "LS": ["tool_input.path"],
+    "WebFetch": ["tool_input.url", "tool_input.prompt"],
+    "WebSearch": ["tool_input.query"],
+    "Task": ["tool_input.subagent_type", "tool_input.description", "tool_input.prompt"],
+    "TodoWrite": ["tool_input.todos"],
+}
+
+# Fields of events without a tool, most telling first
+EVENT_FIELDS = {
+    "UserPromptSubmit": ["prompt"],
+    "Notification": ["message", "coalesced_count", "coalesced_messages"],
+    "PreCompact": ["trigger", "custom_instructions"],
+    "SessionStart": ["source"],
+    "SessionEnd": ["reason"],
+}
+
+# Added to PostToolUse by the hooks (pending_calls), telling how the call went
+OUTCOME_FIELDS = ["outcome", "duration_ms"]
+
+# Longest stretch of a value's head and tail that is rendered; no budget needs more
+RENDER_WINDOW = 8192
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of text, without a tokenizer."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def abbreviate(text: str, limit: int, size: Optional[int] = None) -> str:
+    """
+    Shorten text to at most limit characters by cutting out its middle.
+
+    Args:
+        text: Text to shorten
+        limit: Maximum length of the result
+        size: Length of the original value, if text is already cut down
+
+    Returns:
+        str: text itself if short enough, else its head and tail around a
+        marker giving the number of characters left out
+    """
+    if len(text) <= limit:
+        return text
+    marker = f" …[{size or len(text)}ch]… "
+    keep = limit - len(marker)
+    if keep < 8:
+        return text[:max(0, limit - 1)] + "…" if limit > 0 else ""
+    head = (keep + 1) // 2
+    return text[:head] + marker + text[len(text) - (keep - head):]
+
+
+def _render(value: Any) -> Tuple[str, int]:
+    """Compact one-line text of value, and the length of the full text."""
+    if isinstance(value, str):
+        text = value
+    elif is_blob_ref(value):
+        # The content itself is not in the payload, only its start
+        text = f"{value.get('preview') or ''}… [{value.get('size', '?')} bytes]"
+    else:
+        text = json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+    size = len(text)
+    if size > 2 * RENDER_WINDOW:
+        # Only the ends can be shown, so skip collapsing megabytes of whitespace
+        text = text[:RENDER_WINDOW] + " " + text[-RENDER_WINDOW:]
+    return _WHITESPACE.sub(" ", text).strip(), size
+
+
+def _get(payload: Dict[str, Any], path: str) -> Tuple[bool, Any]:
+    value: Any = payload
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return False, None
+        value = value[key]
+    return True, value
+
+
+def _flatten(value: Any, prefix: str, skip: set, out: List[Tuple[str, Any]]):
+    """Leaf fields of value not already listed in skip, nested dicts as dotted paths; blob refs are leaves."""
+    if isinstance(value, dict) and value and not is_blob_ref(value):
+        for key, item in value.items():
+            path = f"{prefix}.{key}" if prefix else key
+            if path not in skip and (prefix or key not in CONTEXT_KEYS):
+                _flatten(item, path, skip, out)
+    elif prefix not in skip:
+        out.append((prefix, value))
+
+
+def salient_fields(event_type: str, payload: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """
+    Payload fields in the order a summary needs them.
+
+    Args:
+        event_type: Hook event type, e.g. PostToolUse
+        payload: Hook input as received on stdin
+
+    Returns:
+        [(dotted path, value)]: tool and event specific fields first, then
+        every other field except the per-session context
+    """
+    tool_name = payload.get("tool_name")
+    if tool_name:
+        paths = ["tool_name"] + TOOL_FIELDS.get(tool_name, [])
+        if event_type == "PreToolUse":
+            # The response does not exist yet
+            paths = [path for path in paths if not path.startswith("tool_response.")]
+        else:
+            paths[1:1] = OUTCOME_FIELDS
+    else:
+        paths = EVENT_FIELDS.get(event_type, [])
+
+    fields = []
+    for path in paths:
+        found, value = _get(payload, path)
+        if found and value not in (None, "", [], {}):
+            fields.append((path, value))
+    listed = {path for path, _ in fields}
+    rest: List[Tuple[str, Any]] = []
+    _flatten(payload, "", listed, rest)
+    return fields + [(path, value) for path, value in rest if value not in (None, "", [], {})]
+
+
+def compact_payload(event_type: str, payload: Dict[str, Any], budget_tokens: Optional[int] = None) -> str:
+    """
+    Render a hook payload for an LLM prompt within a token budget.
+
+    Args:
+        event_type: Hook event type, e.g. PostToolUse
+        payload: Hook input as received on stdin
+        budget_tokens: Token budget, defaults to CLAUDE_HOOKS_SUMMARY_TOKEN_BUDGET
+
+    Returns:
+        str: One "path: value" line per field, most telling first; fields
+        that do not fit at all are counted on a last line
+    """
+    budget = (DEFAULT_BUDGET if budget_tokens is None else budget_tokens) * CHARS_PER_TOKEN
+    fields = []
+    seen = set()
+    for path, value in salient_fields(event_type, payload):
+        text, size = _render(value)
+        # Skip echoes, e.g. Write's tool_response.content repeating tool_input.content
+        if len(text) >= 16:
+            if text in seen:
+                continue
+            seen.add(text)
+        fields.append((path, text, size))
+
+    # Every field gets its minimum share, in priority order, while the budget lasts
+    allowances = []
+    remaining = budget
+    for path, text, _ in fields:
+        overhead = len(path) + 3  # ": " and the newline
+        if remaining < overhead + min(len(text), FIELD_MIN_CHARS):
+            break
+        allowance = min(len(text), FIELD_MIN_CHARS)
+        allowances.append(allowance)
+        remaining -= overhead + allowance
+    # What is left goes to the fields in the same order, each up to its full length
+    for i, (_, text, _) in enumerate(fields[:len(allowances)]):
+        extra = min(remaining, len(text) - allowances[i])
+        allowances[i] += extra
+        remaining -= extra
+
+    lines = [f"{path}: {abbreviate(text, allowance, size)}"
+             for (path, text, size), allowance in zip(fields, allowances)]
+    dropped = len(fields) - len(allowances)
+    if dropped:
+        lines.append(f"(+{dropped} more fields)")
+    return "\n".join(lines)
@@ -0,0 +1,199 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Cross-process debouncing of bursty hook events.
+
+Permission prompts in multi-agent runs arrive as bursts of Notification
+hooks, each its own process. join() merges the events arriving within a
+window: the first event of a burst gets a ticket and leads it, the others
+return None and should only record the event locally. The leader hands
+its ticket to collect(), which waits out the window and returns every
+event of the burst; hooks run collect() in the side-effect worker
+(utils/side_effects.py), so no hook process sleeps. The burst records the
+pid of the process that will collect it; an event that finds that process
+gone, or the burst STALE_GRACE_MS past its window, takes the burst over
+with its events and leads it instead.
+
+The window is CLAUDE_HOOKS_NOTIFY_WINDOW_MS (default 1500); 0 disables
+coalescing. Burst state lives under logs/.debounce, guarded by flock.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no coalescing
+    fcntl = None
+
+from utils.constants import LOG_BASE_DIR
+
+NOTIFY_WINDOW_MS = int(os.environ.get("CLAUDE_HOOKS_NOTIFY_WINDOW_MS", "1500"))
+DEBOUNCE_DIR = Path(LOG_BASE_DIR) / ".debounce"
+
+# A burst whose leader has not closed it this long after the window ended is
+# taken over by the next event, e.g. after the leader hung
+STALE_GRACE_MS = 5000
+# Events kept per burst; the count includes the rest
+MAX_ITEMS = 50
+
+
+class _Locked:
+    """Exclusive flock on a key's lock file."""
+
+    def __init__(self, key: str):
+        DEBOUNCE_DIR.mkdir(parents=True, exist_ok=True)
+        self._file = open(DEBOUNCE_DIR / f"{key}.lock", "a")
+
+    def __enter__(self):
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+def _read_state(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _alive(pid: Optional[int]) -> bool:
+    """Whether a process exists; bursts written before pids were recorded count as alive."""
+    if not pid:
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # Exists, owned by someone else
+    return True
+
+
+def join(key: str, item: Dict[str, Any], window_ms: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Join the current burst of events for a key, without waiting.
+
+    Args:
+        key: Burst name; each consumer (e.g. TTS, server events) needs its own
+        item: Small JSON-serializable description of this event
+        window_ms: Window length, defaults to CLAUDE_HOOKS_NOTIFY_WINDOW_MS
+
+    Returns:
+        None if the event joined an open burst, whose leader reports it.
+        For the first event of a burst, a ticket to pass to collect() once
+        the window has passed, from this process or a worker it hands off to.
+    """
+    window_ms = NOTIFY_WINDOW_MS if window_ms is None else window_ms
+    if window_ms <= 0 or fcntl is None:
+        return {"key": key, "token": None, "window_end": 0, "items": [item]}
+
+    state_path = DEBOUNCE_DIR / f"{key}.json"
+    token = f"{os.getpid()}-{time.time_ns()}"
+    try:
+        with _Locked(key):
+            now = _now_ms()
+            state = _read_state(state_path)
+            if state and now <= state["window_end"] + STALE_GRACE_MS and _alive(state.get("leader_pid")):
+                # A burst is open; join it and let its leader report
+                state["count"] += 1
+                if len(state["items"]) < MAX_ITEMS:
+                    state["items"].append(item)
+                state_path.write_text(json.dumps(state))
+                return None
+            # Start a burst, absorbing a stale one whose leader went away
+            stale = state or {"count": 0, "items": []}
+            state = {
+                "leader": token,
+                "leader_pid": os.getpid(),
+                "window_end": now + window_ms,
+                "count": stale["count"] + 1,
+                "items": (stale["items"] + [item])[-MAX_ITEMS:],
+            }
+            state_path.write_text(json.dumps(state))
+    except OSError:
+        # Never lose the event over debounce state problems
+        return {"key": key, "token": None, "window_end": 0, "items": [item]}
+    return {"key": key, "token": token, "window_end": state["window_end"], "items": [item]}
+
+
+def collect(ticket: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Close the burst a leader's ticket opened, waiting for its window to end.
+
+    The calling process becomes the burst's collector first, so that events
+    joining meanwhile take the burst over if it dies.
+
+    Args:
+        ticket: Returned by join() for the first event of the burst
+
+    Returns:
+        {'count': n, 'items': [...]} with every event of the burst, or None
+        if the burst was taken over as stale (its new leader reports it)
+    """
+    if ticket["token"] is None:
+        return {"count": 1, "items": ticket["items"]}
+
+    state_path = DEBOUNCE_DIR / f"{ticket['key']}.json"
+    try:
+        with _Locked(ticket["key"]):
+            state = _read_state(state_path)
+            if not state or state.get("leader") != ticket["token"]:
+                return None  # Taken over; the new leader reports
+            if state.get("leader_pid") != os.getpid():
+                # Handed off to a worker, which collects from now on
+                state["leader_pid"] = os.getpid()
+                state_path.write_text(json.dumps(state))
+    except OSError:
+        return {"count": 1, "items": ticket["items"]}
+    time.sleep(max(0, ticket["window_end"] - _now_ms()) / 1000)
+
+    try:
+        with _Locked(ticket["key"]):
+            state = _read_state(state_path)
+            if not state or state.get("leader") != ticket["token"]:
+                return None  # Taken over; the new leader reports
+            state_path.unlink()
+            return {"count": state["count"], "items": state["items"]}
+    except OSError:
+        return {"count": 1, "items": ticket["items"]}
+
+
+def coalesce(key: str, item: Dict[str, Any], window_ms: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Join the current burst of events for a key, and close it if leading.
+
+    The leader waits out the window, so call this off the hook's critical
+    path (e.g. in a side_effects job); hooks use join() and collect().
+
+    Returns:
+        For the leader, after the window: {'count': n, 'items': [...]} with
+        every event of the burst, this one included. For other events of
+        the burst: None.
+    """
+    ticket = join(key, item, window_ms)
+    return None if ticket is None else collect(ticket)
+
+
+def burst_sessions(burst: Dict[str, Any]) -> List[str]:
+    """Distinct session ids of a burst, in arrival order."""
+    sessions = []
+    for item in burst["items"]:
+        session_id = item.get("session_id")
+        if session_id and session_id not in sessions:
+            sessions.append(session_id)
+    return sessions
@@ -0,0 +1,395 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Rolling per-session digest of what an agent is doing.
+
+--summarize makes one LLM call per event and yields a one-liner each. The
+digest instead collects a compact line per event and, every
+CLAUDE_HOOKS_DIGEST_BATCH events (default 20) and at Stop and PreCompact,
+folds the new lines into the session's running digest with a single LLM
+call. The updated digest is sent to the server as one SessionDigest event.
+
+A failed fold (e.g. no API key) leaves its lines pending, and batch folds
+of the session back off: the next one waits FOLD_BACKOFF_MS, doubling
+with every failure in a row up to FOLD_BACKOFF_MAX_MS. Stop and PreCompact
+still try once each.
+
+Pending lines and digests live in CLAUDE_HOOKS_DIGEST_DB (default
+logs/.digest.db):
+
+    uv run utils/digest.py show <session_id>
+    uv run utils/digest.py list
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from utils.compactor import compact_payload
+    from utils.constants import LOG_BASE_DIR
+    from utils.sqlite_state import StateDB
+except ImportError:  # Running this file directly as a script
+    from compactor import compact_payload
+    from constants import LOG_BASE_DIR
+    from sqlite_state import StateDB
+
+DIGEST_DB = os.environ.get("CLAUDE_HOOKS_DIGEST_DB", os.path.join(LOG_BASE_DIR, ".digest.db"))
+DIGEST_BATCH = int(os.environ.get("CLAUDE_HOOKS_DIGEST_BATCH", "20"))
+
+# Events that fold whatever is pending, however few
+FOLD_EVENTS = {"Stop", "PreCompact"}
+# Token budget of one event's line
+LINE_BUDGET = 40
+# Lines kept per session while folds fail (e.g. no API key); the oldest go first
+MAX_PENDING = 200
+# A fold not finished this long after it started is taken over
+FOLD_LEASE_MS = 30000
+# Wait before the next batch fold after a failed one, doubled per failure in a row
+FOLD_BACKOFF_MS = 15000
+FOLD_BACKOFF_MAX_MS = 30 * 60 * 1000
+# Poll interval of a Stop/PreCompact fold waiting for another fold to finish
+FOLD_WAIT_S = 0.25
+# Output token limit of a fold
+DIGEST_MAX_TOKENS = 160
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    session_id TEXT PRIMARY KEY,
+    digest TEXT NOT NULL DEFAULT '',
+    events_folded INTEGER NOT NULL DEFAULT 0,
+    folds INTEGER NOT NULL DEFAULT 0,
+    updated_ms INTEGER NOT NULL DEFAULT 0,
+    folding_until_ms INTEGER NOT NULL DEFAULT 0,
+    lease_id INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    retry_after_ms INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS pending (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    line TEXT NOT NULL,
+    lease_id INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS pending_session ON pending (session_id, id);
+"""
+
+_PROMPT = """You maintain a running digest of what an AI coding agent is doing in one session, for an engineer watching a dashboard.
+
+Current digest:
+{digest}
+
+New events, oldest first:
+{events}
+
+Rewrite the digest to include the new events.
+
+Requirements:
+- 2-3 sentences, under 60 words in total
+- Say what the agent is working on and where it is now, the latest activity last
+- Mention failures, blocked commands and waiting for input
+- Be specific: name files, commands and tools
+- Present tense, no quotes, no formatting
+- Return ONLY the digest text"""
+
+# The lease and backoff columns were added after the tables first shipped
+_db = StateDB(DIGEST_DB, _SCHEMA, {
+    "digests": ["lease_id INTEGER NOT NULL DEFAULT 0", "failures INTEGER NOT NULL DEFAULT 0",
+                "retry_after_ms INTEGER NOT NULL DEFAULT 0"],
+    "pending": ["lease_id INTEGER NOT NULL DEFAULT 0"],
+})
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def event_line(event_type: str, input_data: Dict[str, Any]) -> str:
+    """One line describing an event, for the fold prompt."""
+    fields = compact_payload(event_type, input_data, LINE_BUDGET).replace("\n", "; ")
+    return f"{event_type}: {fields}" if fields else event_type
+
+
+def add(event_type: str, input_data: Dict[str, Any]) -> int:
+    """
+    Queue an event for the session's next fold.
+
+    Args:
+        event_type: Hook event type, e.g. 'PostToolUse'
+        input_data: The hook input
+
+    Returns:
+        Number of events now pending for the session; 0 on failure, or
+        while batch folds of the session back off after a failed fold
+    """
+    session_id = input_data.get("session_id") or "unknown"
+    line = event_line(event_type, input_data)
+    try:
+        with _db.lock:
+            conn = _db.connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("INSERT INTO pending (session_id, line) VALUES (?, ?)", (session_id, line))
+                # Lines a fold is working on are left to it
+                conn.execute(
+                    "DELETE FROM pending WHERE session_id = ? AND lease_id = 0 AND id <= "
+                    "(SELECT id FROM pending WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (session_id, session_id, MAX_PENDING))
+                (count,) = conn.execute("SELECT COUNT(*) FROM pending WHERE session_id = ?",
+                                        (session_id,)).fetchone()
+                backing_off = conn.execute("SELECT 1 FROM digests WHERE session_id = ? AND retry_after_ms > ?",
+                                           (session_id, _now_ms())).fetchone()
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+    except sqlite3.Error:
+        return 0
+    return 0 if backing_off else count
+
+
+def _claim(session_id: str, force: bool) -> Tuple[Optional[tuple], int]:
+    """
+    Lease the session's pending lines for a fold.
+
+    The lines stay in the pending table, marked with the lease id, until
+    _release() deletes them after the fold succeeds; a fold that dies
+    leaves them to whoever takes over its expired lease.
+
+    Returns:
+        ((lease_id, digest, rows), 0) if the fold is due, else (None, end of
+        another process's live lease in ms, or 0 if there is none). A fold
+        that is not forced is not due while the session backs off.
+    """
+    now_ms = _now_ms()
+    with _db.lock:
+        conn = _db.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT digest, folding_until_ms, retry_after_ms FROM digests WHERE session_id = ?",
+                               (session_id,)).fetchone()
+            digest, folding_until_ms, retry_after_ms = row or ("", 0, 0)
+            if folding_until_ms > now_ms:
+                conn.execute("COMMIT")
+                return None, folding_until_ms
+            if retry_after_ms > now_ms and not force:
+                conn.execute("COMMIT")
+                return None, 0
+            rows = conn.execute("SELECT id, line FROM pending WHERE session_id = ? ORDER BY id",
+                                (session_id,)).fetchall()
+            if not rows or (len(rows) < DIGEST_BATCH and not force):
+                conn.execute("COMMIT")
+                return None, 0
+            lease_id = int.from_bytes(os.urandom(7), "big") + 1
+            conn.execute("UPDATE pending SET lease_id = ? WHERE session_id = ? AND id <= ?",
+                         (lease_id, session_id, rows[-1][0]))
+            conn.execute(
+                "INSERT INTO digests (session_id, folding_until_ms, lease_id) VALUES (?, ?, ?) "
+                "ON CONFLICT (session_id) DO UPDATE SET folding_until_ms = excluded.folding_until_ms, "
+                "lease_id = excluded.lease_id",
+                (session_id, now_ms + FOLD_LEASE_MS, lease_id))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+    return (lease_id, digest, rows), 0
+
+
+def _release(session_id: str, lease_id: int, digest: Optional[str]) -> bool:
+    """
+    Store a fold's digest and delete its lines, or free them and back off if it failed; ends the lease.
+
+    Returns:
+        False if the digest was dropped because the lease had expired and
+        another process took the lines over
+    """
+    with _db.lock:
+        conn = _db.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            stored = False
+            now_ms = _now_ms()
+            if digest:
+                folded = conn.execute("DELETE FROM pending WHERE session_id = ? AND lease_id = ?",
+                                      (session_id, lease_id)).rowcount
+                if folded:
+                    conn.execute(
+                        "UPDATE digests SET digest = ?, events_folded = events_folded + ?, folds = folds + 1, "
+                        "updated_ms = ?, failures = 0, retry_after_ms = 0 WHERE session_id = ?",
+                        (digest, folded, now_ms, session_id))
+                    stored = True
+            else:
+                # The lines keep their ids, so they sort before anything added meanwhile
+                conn.execute("UPDATE pending SET lease_id = 0 WHERE session_id = ? AND lease_id = ?",
+                             (session_id, lease_id))
+                # failures counts the ones before this: the first waits FOLD_BACKOFF_MS
+                conn.execute(
+                    "UPDATE digests SET retry_after_ms = ? + MIN(?, ? << MIN(failures, 20)), "
+                    "failures = failures + 1 WHERE session_id = ? AND lease_id = ?",
+                    (now_ms, FOLD_BACKOFF_MAX_MS, FOLD_BACKOFF_MS, session_id, lease_id))
+            conn.execute("UPDATE digests SET folding_until_ms = 0, lease_id = 0 "
+                         "WHERE session_id = ? AND lease_id = ?", (session_id, lease_id))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+    return stored
+
+
+def fold(session_id: str, force: bool = False) -> Optional[str]:
+    """
+    Fold the session's pending events into its digest with one LLM call.
+
+    Args:
+        session_id: The Claude session ID
+        force: Fold however few events are pending (Stop, PreCompact); if
+            another process is folding the session, wait for it to finish
+            (at most FOLD_LEASE_MS) and fold what it left
+
+    Returns:
+        The updated digest, or None if no fold was due, another process is
+        folding the session, or the LLM call failed (the events stay pending)
+    """
+    from utils.llm.anth import prompt_llm
+
+    give_up_ms = _now_ms() + FOLD_LEASE_MS
+    while True:
+        try:
+            claimed, busy_until_ms = _claim(session_id, force)
+        except sqlite3.Error:
+            return None
+        if claimed is not None:
+            break
+        if not force or not busy_until_ms or _now_ms() >= give_up_ms:
+            return None
+        time.sleep(FOLD_WAIT_S)
+    lease_id, digest, rows = claimed
+    prompt = _PROMPT.format(digest=digest or "(none yet, the session just started)",
+                            events="\n".join(f"- {line}" for _, line in rows))
+    updated = None
+    try:
+        updated = prompt_llm(prompt, max_tokens=DIGEST_MAX_TOKENS)
+        if updated:
+            updated = " ".join(updated.split()).strip('"').strip("'")
+    finally:
+        try:
+            if not _release(session_id, lease_id, updated):
+                updated = None
+        except sqlite3.Error:
+            updated = None
+    return updated
+
+
+def get(session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a session's digest.
+
+    Returns:
+        Dict with digest, events_folded, folds, updated_ms and events_pending,
+        or None if the session has neither a digest nor pending events
+    """
+    try:
+        with _db.lock:
+            conn = _db.connect()
+            row = conn.execute("SELECT digest, events_folded, folds, updated_ms FROM digests "
+                               "WHERE session_id = ?", (session_id,)).fetchone()
+            (pending,) = conn.execute("SELECT COUNT(*) FROM pending WHERE session_id = ?",
+                                      (session_id,)).fetchone()
+    except sqlite3.Error:
+        return None
+    if row is None and not pending:
+        return None
+    digest, events_folded, folds, updated_ms = row or ("", 0, 0, 0)
+    return {"session_id": session_id, "digest": digest, "events_folded": events_folded, "folds": folds,
+            "updated_ms": updated_ms, "events_pending": pending}
+
+
+def record(event_type: str, input_data: Dict[str, Any], source_app: str) -> Optional[Dict[str, Any]]:
+    """
+    Add an event to its session's digest, folding when a batch is complete.
+
+    Args:
+        event_type: Hook event type, e.g. 'PostToolUse'
+        input_data: The hook input
+        source_app: Source application name
+
+    Returns:
+        The SessionDigest event to send if the digest was updated, else None
+    """
+    pending = add(event_type, input_data)
+    if not fold_due(event_type, pending):
+        return None
+    return fold_event(event_type, input_data.get("session_id") or "unknown", source_app)
+
+
+def fold_due(event_type: str, pending: int) -> bool:
+    """Whether an event that left `pending` events queued should fold them."""
+    return pending >= DIGEST_BATCH or event_type in FOLD_EVENTS
+
+
+def fold_event(event_type: str, session_id: str, source_app: str) -> Optional[Dict[str, Any]]:
+    """
+    Fold the session's pending events and build the SessionDigest event.
+
+    Args:
+        event_type: Hook event type that triggered the fold
+        session_id: The Claude session ID
+        source_app: Source application name
+
+    Returns:
+        The SessionDigest event to send, or None if the digest did not change
+    """
+    if fold(session_id, force=event_type in FOLD_EVENTS) is None:
+        return None
+    state = get(session_id)
+    if state is None:
+        return None
+    return {
+        "source_app": source_app,
+        "session_id": session_id,
+        "hook_event_type": "SessionDigest",
+        "payload": dict(state, trigger=event_type),
+        "summary": state["digest"],
+        "timestamp": int(datetime.now().timestamp() * 1000),
+    }
+
+
+def main():
+    """Command line interface: print session digests."""
+    parser = argparse.ArgumentParser(description="Rolling per-session digests")
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("show", help="Print one session's digest as JSON")
+    show.add_argument("session_id")
+    sessions = sub.add_parser("list", help="List digests, most recent first")
+    sessions.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "show":
+        state = get(args.session_id)
+        if state is None:
+            print(f"No digest for session {args.session_id}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(state, indent=2))
+        return
+
+    try:
+        rows = _db.connect().execute(
+            "SELECT session_id, digest FROM digests WHERE folds > 0 ORDER BY updated_ms DESC LIMIT ?",
+            (args.limit,)).fetchall()
+    except sqlite3.Error as e:
+        print(f"Failed to read {DIGEST_DB}: {e}", file=sys.stderr)
+        sys.exit(1)
+    for session_id, digest in rows:
+        print(f"{session_id}  {digest}")
+
+
+if __name__ == "__main__":
+    main()
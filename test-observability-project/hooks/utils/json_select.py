@@ -0,0 +1,148 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Selective JSON field extraction from raw hook input.
+
+Guard hooks only need a handful of fields (tool_name, tool_input.command,
+tool_input.file_path) but Write/Edit input can carry megabytes of file
+content. select() scans the raw bytes, decodes only the requested key paths
+and skips everything else without building Python objects.
+
+The whole document is scanned: when a key repeats, the last occurrence wins,
+as with json.loads and JSON.parse, so a guard cannot be shown a harmless
+first "command" while Claude Code runs a second one.
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterable, Optional
+
+from utils import codec
+
+# A complete JSON string token, matched in C without decoding its contents
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+# Tokens that matter while skipping a container: strings and brackets
+_CONTAINER_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]')
+# Numbers, true, false and null
+_SCALAR = re.compile(rb'[^\s,\]}]+')
+_WHITESPACE = re.compile(rb'\s*')
+
+
+class SkippedString:
+    """Placeholder for a string value longer than select()'s max_string."""
+
+    __slots__ = ("size",)
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def __repr__(self):
+        return f"SkippedString(size={self.size})"
+
+
+def _error(message: str, pos: int) -> json.JSONDecodeError:
+    return json.JSONDecodeError(message, "", pos)
+
+
+def _skip_ws(buf: bytes, pos: int) -> int:
+    return _WHITESPACE.match(buf, pos).end()
+
+
+def _value_end(buf: bytes, pos: int) -> int:
+    """Return the index just past the JSON value starting at pos."""
+    first = buf[pos:pos + 1]
+    if first == b'"':
+        match = _STRING.match(buf, pos)
+        if not match:
+            raise _error("Unterminated string", pos)
+        return match.end()
+    if first in (b"{", b"["):
+        depth = 0
+        for match in _CONTAINER_TOKEN.finditer(buf, pos):
+            token = match.group()
+            if token in (b"{", b"["):
+                depth += 1
+            elif token in (b"}", b"]"):
+                depth -= 1
+                if depth == 0:
+                    return match.end()
+        raise _error("Unterminated container", pos)
+    match = _SCALAR.match(buf, pos)
+    if not match:
+        raise _error("Expecting value", pos)
+    return match.end()
+
+
+def _select_object(buf: bytes, pos: int, prefix: str, wanted: set, nested: set,
+                   found: Dict[str, Any], max_string: Optional[int]) -> int:
+    """Walk the object at pos, filling found; returns the index past the object."""
+    if buf[pos:pos + 1] != b"{":
+        raise _error("Expecting object", pos)
+    pos = _skip_ws(buf, pos + 1)
+    if buf[pos:pos + 1] == b"}":
+        return pos + 1
+
+    while True:
+        key_match = _STRING.match(buf, pos)
+        if not key_match:
+            raise _error("Expecting property name", pos)
+        key = json.loads(key_match.group())
+        pos = _skip_ws(buf, key_match.end())
+        if buf[pos:pos + 1] != b":":
+            raise _error("Expecting ':' delimiter", pos)
+        pos = _skip_ws(buf, pos + 1)
+
+        path = f"{prefix}{key}"
+        if path in nested:
+            # A repeated parent key replaces everything the earlier copy held
+            for stale in [p for p in found if p.startswith(path + ".")]:
+                del found[stale]
+        if path in wanted:
+            end = _value_end(buf, pos)
+            if max_string is not None and buf[pos:pos + 1] == b'"' and end - pos - 2 > max_string:
+                found[path] = SkippedString(end - pos - 2)
+            else:
+                found[path] = codec.loads(buf[pos:end])
+            pos = end
+        elif buf[pos:pos + 1] == b"{" and path in nested:
+            pos = _select_object(buf, pos, path + ".", wanted, nested, found, max_string)
+        else:
+            pos = _value_end(buf, pos)
+
+        pos = _skip_ws(buf, pos)
+        delimiter = buf[pos:pos + 1]
+        if delimiter == b"}":
+            return pos + 1
+        if delimiter != b",":
+            raise _error("Expecting ',' delimiter", pos)
+        pos = _skip_ws(buf, pos + 1)
+
+
+def select(raw: bytes, paths: Iterable[str], max_string: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Extract selected key paths from a raw JSON object.
+
+    Args:
+        raw: The undecoded JSON document, e.g. hook stdin
+        paths: Dotted key paths to extract, e.g. ['tool_name', 'tool_input.command']
+        max_string: If set, string values longer than this many encoded bytes
+            are returned as SkippedString instead of being decoded
+
+    Returns:
+        Dict mapping each path that was found to its decoded value (the last
+        one if a key repeats); missing paths are absent
+
+    Raises:
+        json.JSONDecodeError: If the document is malformed in a scanned region
+    """
+    wanted = set(paths)
+    found: Dict[str, Any] = {}
+    if not wanted:
+        return found
+    # Parent paths of the wanted ones, e.g. 'tool_input' for 'tool_input.command'
+    nested = {path.rsplit(".", i)[0] for path in wanted for i in range(1, path.count(".") + 1)}
+    _select_object(raw, _skip_ws(raw, 0), "", wanted, nested, found, max_string)
+    return found
@@ -9,40 +9,84 @@
 
 import os
 import sys
-from dotenv import load_dotenv
 
+try:
+    from utils.llm.clients import anthropic_client, load_env, note_error, take_slot
+    from utils.llm.stream import FIRST_LINE_MAX_CHARS, first_line
+except ImportError:
+    from clients import anthropic_client, load_env, note_error, take_slot
+    from stream import FIRST_LINE_MAX_CHARS, first_line
 
-def prompt_llm(prompt_text):
+
+def prompt_llm(prompt_text, timeout=None, rate_policy=None, max_tokens=100):
     """
     Base Anthropic LLM prompting method using fastest model.
 
     Args:
         prompt_text (str): The prompt to send to the model
+        timeout (float): Request timeout in seconds, defaults to CLAUDE_HOOKS_LLM_TIMEOUT
+        rate_policy (str): Rate limit policy, see clients.take_slot()
+        max_tokens (int): Output token limit
 
     Returns:
-        str: The model's response text, or None if error
+        str: The model's response text, or None if error or rate limited
     """
-    load_dotenv()
-
-    api_key = os.getenv("ANTHROPIC_API_KEY")
-    if not api_key:
-        return None
-
     try:
-        import anthropic
-
-        client = anthropic.Anthropic(api_key=api_key)
+        # Shared client, its connections are reused across calls
+        client = anthropic_client()
+        if client is None or not take_slot("anthropic", prompt_text, max_tokens, rate_policy):
+            return None
+        if timeout is not None:
+            client = client.with_options(timeout=timeout)
 
         message = client.messages.create(
             model="claude-3-5-haiku-20241022",  # Fastest Anthropic model
-            max_tokens=100,
+            max_tokens=max_tokens,
             temperature=0.7,
             messages=[{"role": "user", "content": prompt_text}],
         )
 
         return message.content[0].text.strip()
 
-    except Exception:
+    except Exception as e:
+        note_error("anthropic", e)
+        return None
+
+
+def prompt_llm_first_line(prompt_text, max_chars=FIRST_LINE_MAX_CHARS, timeout=None, rate_policy=None):
+    """
+    Stream an Anthropic response and return its first line as soon as it is complete.
+
+    The stream is closed once the first line (or max_chars of it) has
+    arrived, so the rest of the output is neither waited for nor generated.
+
+    Args:
+        prompt_text (str): The prompt to send to the model
+        max_chars (int): Longest first line to wait for
+        timeout (float): Request timeout in seconds, defaults to CLAUDE_HOOKS_LLM_TIMEOUT
+        rate_policy (str): Rate limit policy, see clients.take_slot()
+
+    Returns:
+        str: The first line of the response, or None if error or rate limited
+    """
+    try:
+        client = anthropic_client()
+        if client is None or not take_slot("anthropic", prompt_text, 100, rate_policy):
+            return None
+        if timeout is not None:
+            client = client.with_options(timeout=timeout)
+
+        with client.messages.stream(
+            model="claude-3-5-haiku-20241022",  # Fastest Anthropic model
+            max_tokens=100,
+            temperature=0.7,
+            messages=[{"role": "user", "content": prompt_text}],
+        ) as stream:
+            # Leaving the block closes the stream, and the request with it
+            return first_line(stream.text_stream, max_chars) or None
+
+    except Exception as e:
+        note_error("anthropic", e)
         return None
 
 
@@ -53,6 +97,7 @@ def generate_completion_message():
     Returns:
         str: A natural language completion message, or None if error
     """
+    load_env()
     engineer_name = os.getenv("ENGINEER_NAME", "").strip()
 
     if engineer_name:
@@ -79,13 +124,12 @@ Requirements:
 
 Generate ONE completion message:"""
 
-    response = prompt_llm(prompt)
+    # Only the first line is used, so stop the stream there
+    response = prompt_llm_first_line(prompt, max_chars=80)
 
     # Clean up response - remove quotes and extra formatting
     if response:
         response = response.strip().strip('"').strip("'").strip()
-        # Take first line if multiple lines
-        response = response.split("\n")[0].strip()
 
     return response
 
@@ -0,0 +1,177 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "anthropic",
+#     "openai",
+#     "python-dotenv",
+# ]
+# ///
+
+"""
+Process-wide LLM provider clients.
+
+Creating an SDK client sets up a new HTTP connection pool, so a client per
+call pays a TCP (and TLS) handshake every time. The clients here are
+created on first use and shared by every caller in the process, keeping
+their connections alive between calls; HTTP/2 is used when the h2 package
+is installed. .env is loaded once, on first use.
+
+Every call first takes a slot from the provider's shared rate limit
+(utils/ratelimit.py) with take_slot(), and reports 429s with
+note_error() so that all hook processes back off together.
+
+Settings:
+- CLAUDE_HOOKS_LLM_TIMEOUT: default per-request timeout in seconds (10)
+- CLAUDE_HOOKS_LLM_MAX_RETRIES: SDK retries on 429/5xx and connection
+  errors (1)
+- ANTHROPIC_BASE_URL, OPENAI_BASE_URL: alternative endpoints, e.g.
+  tools/mock_providers.py
+"""
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from utils import ratelimit
+except ImportError:  # Running a provider module directly as a script
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    import ratelimit
+
+LLM_TIMEOUT = float(os.environ.get("CLAUDE_HOOKS_LLM_TIMEOUT", "10"))
+LLM_MAX_RETRIES = int(os.environ.get("CLAUDE_HOOKS_LLM_MAX_RETRIES", "1"))
+# Rough prompt size for the rate limit, without a tokenizer
+CHARS_PER_TOKEN = 4
+
+_lock = threading.Lock()
+_env_loaded = False
+_clients: Dict[Tuple[str, Optional[str], Optional[str]], Any] = {}
+
+
+def _after_fork():
+    # Pooled connections are the parent's; a forked worker opens its own
+    _clients.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def load_env():
+    """Load .env into the environment, once per process."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _lock:
+        if not _env_loaded:
+            try:
+                from dotenv import load_dotenv
+
+                load_dotenv()
+            except ImportError:
+                pass
+            _env_loaded = True
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _get(provider: str, api_key_var: str, base_url_var: str, factory):
+    load_env()
+    api_key = os.getenv(api_key_var)
+    if not api_key:
+        return None
+    key = (provider, api_key, os.getenv(base_url_var) or None)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = factory(api_key, key[2])
+    return client
+
+
+def anthropic_client():
+    """
+    The shared Anthropic client.
+
+    Returns:
+        anthropic.Anthropic, or None without ANTHROPIC_API_KEY
+    """
+    def create(api_key, base_url):
+        import anthropic
+
+        return anthropic.Anthropic(
+            api_key=api_key, base_url=base_url, timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES,
+            http_client=anthropic.DefaultHttpxClient(http2=_http2_available()),
+        )
+
+    return _get("anthropic", "ANTHROPIC_API_KEY", "ANTHROPIC_BASE_URL", create)
+
+
+def openai_client():
+    """
+    The shared OpenAI client.
+
+    Returns:
+        openai.OpenAI, or None without OPENAI_API_KEY
+    """
+    def create(api_key, base_url):
+        import openai
+
+        return openai.OpenAI(
+            api_key=api_key, base_url=base_url, timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES,
+            http_client=openai.DefaultHttpxClient(http2=_http2_available()),
+        )
+
+    return _get("openai", "OPENAI_API_KEY", "OPENAI_BASE_URL", create)
+
+
+def take_slot(provider: str, prompt_text: str, max_tokens: int, rate_policy: Optional[str] = None) -> bool:
+    """
+    Take a slot for one call from the provider's shared rate limit.
+
+    Args:
+        provider: 'anthropic' or 'openai'
+        prompt_text: The prompt, to estimate the call's tokens
+        max_tokens: Output token limit of the call
+        rate_policy: ratelimit.WAIT, SKIP or ACQUIRED (the caller already
+            holds a slot), defaults to CLAUDE_HOOKS_LLM_RATE_POLICY; DEFER
+            waits here, as there is nobody to hand the call to
+
+    Returns:
+        True if the call may be made now
+    """
+    tokens = len(prompt_text) // CHARS_PER_TOKEN + max_tokens
+    delay = ratelimit.acquire(provider, tokens, rate_policy)
+    if delay is None:
+        return False
+    if delay:
+        time.sleep(delay)
+    return True
+
+
+def note_error(provider: str, error: BaseException):
+    """Report a failed call; a 429 blocks the provider's bucket for every process."""
+    ratelimit.note_error(provider, error)
+
+
+def close_clients():
+    """Close the shared clients and their connections; the next call creates new ones."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
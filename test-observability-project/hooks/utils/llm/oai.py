@@ -9,40 +9,90 @@
 
 import os
 import sys
-from dotenv import load_dotenv
 
+try:
+    from utils.llm.clients import openai_client, load_env, note_error, take_slot
+    from utils.llm.stream import FIRST_LINE_MAX_CHARS, first_line
+except ImportError:
+    from clients import openai_client, load_env, note_error, take_slot
+    from stream import FIRST_LINE_MAX_CHARS, first_line
 
-def prompt_llm(prompt_text):
+
+def prompt_llm(prompt_text, timeout=None, rate_policy=None, max_tokens=100):
     """
     Base OpenAI LLM prompting method using fastest model.
 
     Args:
         prompt_text (str): The prompt to send to the model
+        timeout (float): Request timeout in seconds, defaults to CLAUDE_HOOKS_LLM_TIMEOUT
+        rate_policy (str): Rate limit policy, see clients.take_slot()
+        max_tokens (int): Output token limit
 
     Returns:
-        str: The model's response text, or None if error
+        str: The model's response text, or None if error or rate limited
     """
-    load_dotenv()
-
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
-
     try:
-        from openai import OpenAI
-
-        client = OpenAI(api_key=api_key)
+        # Shared client, its connections are reused across calls
+        client = openai_client()
+        if client is None or not take_slot("openai", prompt_text, max_tokens, rate_policy):
+            return None
+        if timeout is not None:
+            client = client.with_options(timeout=timeout)
 
         response = client.chat.completions.create(
             model="gpt-4.1-nano",  # Fastest OpenAI model
             messages=[{"role": "user", "content": prompt_text}],
-            max_tokens=100,
+            max_tokens=max_tokens,
             temperature=0.7,
         )
 
         return response.choices[0].message.content.strip()
 
-    except Exception:
+    except Exception as e:
+        note_error("openai", e)
+        return None
+
+
+def prompt_llm_first_line(prompt_text, max_chars=FIRST_LINE_MAX_CHARS, timeout=None, rate_policy=None):
+    """
+    Stream an OpenAI response and return its first line as soon as it is complete.
+
+    The stream is closed once the first line (or max_chars of it) has
+    arrived, so the rest of the output is neither waited for nor generated.
+
+    Args:
+        prompt_text (str): The prompt to send to the model
+        max_chars (int): Longest first line to wait for
+        timeout (float): Request timeout in seconds, defaults to CLAUDE_HOOKS_LLM_TIMEOUT
+        rate_policy (str): Rate limit policy, see clients.take_slot()
+
+    Returns:
+        str: The first line of the response, or None if error or rate limited
+    """
+    try:
+        client = openai_client()
+        if client is None or not take_slot("openai", prompt_text, 100, rate_policy):
+            return None
+        if timeout is not None:
+            client = client.with_options(timeout=timeout)
+
+        stream = client.chat.completions.create(
+            model="gpt-4.1-nano",  # Fastest OpenAI model
+            messages=[{"role": "user", "content": prompt_text}],
+            max_tokens=100,
+            temperature=0.7,
+            stream=True,
+        )
+        try:
+            return first_line(
+                (chunk.choices[0].delta.content for chunk in stream if chunk.choices), max_chars
+            ) or None
+        finally:
+            # Closes the request, so the model stops generating
+            stream.close()
+
+    except Exception as e:
+        note_error("openai", e)
         return None
 
 
@@ -53,6 +103,7 @@ def generate_completion_message():
     Returns:
         str: A natural language completion message, or None if error
     """
+    load_env()
     engineer_name = os.getenv("ENGINEER_NAME", "").strip()
 
     if engineer_name:
@@ -79,13 +130,12 @@ Requirements:
 
 Generate ONE completion message:"""
 
-    response = prompt_llm(prompt)
+    # Only the first line is used, so stop the stream there
+    response = prompt_llm_first_line(prompt, max_chars=80)
 
     # Clean up response - remove quotes and extra formatting
     if response:
         response = response.strip().strip('"').strip("'").strip()
-        # Take first line if multiple lines
-        response = response.split("\n")[0].strip()
 
     return response
 
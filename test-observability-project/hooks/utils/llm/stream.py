@@ -0,0 +1,47 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Early termination for streamed LLM responses.
+
+The summary and completion-message callers keep only the first line of the
+model output. Reading a streamed response until that line is complete and
+then closing the stream returns as soon as the line is there, instead of
+after up to max_tokens of output nobody reads, and the provider stops
+generating (and billing) once the connection is gone.
+"""
+
+from typing import Iterable, Optional
+
+# Enough for a one-sentence summary; the callers trim further
+FIRST_LINE_MAX_CHARS = 160
+
+
+def first_line(chunks: Iterable[Optional[str]], max_chars: int = FIRST_LINE_MAX_CHARS) -> str:
+    """
+    Read text chunks until the first non-empty line is complete.
+
+    Stops consuming the iterator at the first newline after some text, or
+    once max_chars characters of the line have arrived; the caller then
+    closes the stream.
+
+    Args:
+        chunks: Streamed text deltas (None entries are skipped)
+        max_chars: Longest line to wait for
+
+    Returns:
+        str: The first line, stripped, cut to max_chars
+    """
+    text = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        text = (text + chunk).lstrip()
+        newline = text.find("\n")
+        if newline != -1:
+            return text[:newline].strip()[:max_chars]
+        if len(text) >= max_chars:
+            break
+    return text.strip()[:max_chars]
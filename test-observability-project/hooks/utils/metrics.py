@@ -0,0 +1,269 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Hook timing spans exported as a Prometheus textfile.
+
+Set CLAUDE_HOOKS_METRICS_DIR to a node_exporter textfile collector
+directory to enable. Each hook process times its stages with span(), and at
+exit the observations are merged, under a file lock, into histograms shared
+by every hook process on the machine and rendered to claude_hooks.prom.
+A process that cannot take the lock within
+CLAUDE_HOOKS_METRICS_LOCK_TIMEOUT_MS (default 2000) drops its observations
+rather than hold up the hook.
+
+Usage in a hook:
+
+    metrics.start('post_tool_use', 'PostToolUse')
+    with metrics.span('stdin_parse'):
+        input_data = codec.read_stdin()
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: merge without locking
+    fcntl = None
+
+METRICS_DIR = os.environ.get("CLAUDE_HOOKS_METRICS_DIR", "")
+LOCK_TIMEOUT = float(os.environ.get("CLAUDE_HOOKS_METRICS_LOCK_TIMEOUT_MS", "2000")) / 1000
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STATE_FILE = ".claude_hooks_metrics.json"
+LOCK_FILE = ".claude_hooks_metrics.lock"
+PROM_FILE = "claude_hooks.prom"
+
+
+class HookMetrics:
+    """Stage timings recorded by one hook invocation."""
+
+    def __init__(self, hook: str, event_type: str = ""):
+        self.hook = hook
+        self.event_type = event_type
+        self.outcome = "ok"
+        self.start_ns = time.time_ns()
+        self._start = time.perf_counter()
+        # (stage, wall-clock start in ns, duration in seconds)
+        self.spans: List[Tuple[str, int, float]] = []
+        self.counters: Dict[str, int] = {}
+        self._flushed = False
+
+    @contextmanager
+    def span(self, stage: str):
+        """Time the enclosed block as one stage of this hook."""
+        start_ns = time.time_ns()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((stage, start_ns, time.perf_counter() - start))
+
+    def elapsed(self) -> float:
+        """Seconds since this hook invocation started."""
+        return time.perf_counter() - self._start
+
+    def flush(self):
+        """Merge this invocation's observations into the shared textfile."""
+        if self._flushed or not METRICS_DIR:
+            return
+        self._flushed = True
+        total = self.elapsed()
+
+        observations = [("claude_hook_duration_seconds", {}, total)]
+        for stage, _, duration in self.spans:
+            observations.append(("claude_hook_stage_duration_seconds", {"stage": stage}, duration))
+
+        base_labels = {"hook": self.hook, "event_type": self.event_type, "outcome": self.outcome}
+        _merge(observations, base_labels, self.counters)
+
+
+def _label_key(name: str, labels: Dict[str, str]) -> str:
+    rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items()))
+    return f"{name}{{{rendered}}}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _lock(lock, timeout: float = LOCK_TIMEOUT) -> bool:
+    """Take an exclusive flock on an open file, waiting at most timeout seconds."""
+    if fcntl is None:
+        return True
+    deadline = time.monotonic() + timeout
+    delay = 0.0005
+    while True:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.02)
+
+
+def _merge(observations, base_labels: Dict[str, str], counters: Dict[str, int]):
+    """Add observations to the shared state and rewrite the textfile."""
+    metrics_dir = Path(METRICS_DIR)
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+
+    with open(metrics_dir / LOCK_FILE, "a") as lock:
+        if not _lock(lock):
+            return  # A stuck holder must not hold up every hook behind it
+        try:
+            state_path = metrics_dir / STATE_FILE
+            try:
+                state = json.loads(state_path.read_text())
+            except (OSError, ValueError):
+                state = {"histograms": {}, "counters": {}}
+
+            for name, labels, value in observations:
+                key = _label_key(name, dict(base_labels, **labels))
+                hist = state["histograms"].setdefault(
+                    key, {"name": name, "labels": dict(base_labels, **labels),
+                          "buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0})
+                for i, bound in enumerate(BUCKETS):
+                    if value <= bound:
+                        hist["buckets"][i] += 1
+                hist["sum"] += value
+                hist["count"] += 1
+
+            for name, value in counters.items():
+                key = _label_key(name, base_labels)
+                counter = state["counters"].setdefault(
+                    key, {"name": name, "labels": dict(base_labels), "value": 0})
+                counter["value"] += value
+
+            _atomic_write(state_path, json.dumps(state))
+            _atomic_write(metrics_dir / PROM_FILE, render(state))
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _atomic_write(path: Path, text: str):
+    # The temp name must not end in .prom or node_exporter may read it half-written
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def render(state) -> str:
+    """Render merged metrics state in the Prometheus text exposition format."""
+    lines = []
+    by_name: Dict[str, list] = {}
+    for hist in state["histograms"].values():
+        by_name.setdefault(hist["name"], []).append(hist)
+
+    help_text = {
+        "claude_hook_duration_seconds": "Wall-clock time of one hook invocation",
+        "claude_hook_stage_duration_seconds": "Time spent in one stage of a hook invocation",
+    }
+    for name, series in sorted(by_name.items()):
+        lines.append(f"# HELP {name} {help_text.get(name, name)}")
+        lines.append(f"# TYPE {name} histogram")
+        for hist in series:
+            labels = hist["labels"]
+            for bound, count in zip(BUCKETS, hist["buckets"]):
+                lines.append(f"{_label_key(name + '_bucket', dict(labels, le=repr(bound)))} {count}")
+            lines.append(f"{_label_key(name + '_bucket', dict(labels, le='+Inf'))} {hist['count']}")
+            lines.append(f"{_label_key(name + '_sum', labels)} {hist['sum']}")
+            lines.append(f"{_label_key(name + '_count', labels)} {hist['count']}")
+
+    counters: Dict[str, list] = {}
+    for counter in state["counters"].values():
+        counters.setdefault(counter["name"], []).append(counter)
+    for name, series in sorted(counters.items()):
+        lines.append(f"# TYPE {name} counter")
+        for counter in series:
+            lines.append(f"{_label_key(name, counter['labels'])} {counter['value']}")
+
+    return "\n".join(lines) + "\n"
+
+
+# The recorder for this process, created by start()
+_current: Optional[HookMetrics] = None
+
+
+def start(hook: str, event_type: str = "") -> HookMetrics:
+    """
+    Start recording metrics for this hook process.
+
+    The observations are flushed automatically when the process exits,
+    including through sys.exit().
+
+    Args:
+        hook: Hook script name, e.g. 'pre_tool_use'
+        event_type: Hook event type, e.g. 'PreToolUse'
+
+    Returns:
+        The process-wide HookMetrics recorder
+    """
+    global _current
+    if _current is None:
+        _current = HookMetrics(hook, event_type)
+        atexit.register(_current.flush)
+    return _current
+
+
+def restart(hook: str, event_type: str = "") -> HookMetrics:
+    """
+    Replace the process recorder without flushing it, e.g. in a forked
+    worker that must not report the parent's observations a second time.
+
+    The new recorder is flushed at exit, or by calling its flush().
+    """
+    global _current
+    if _current is not None:
+        atexit.unregister(_current.flush)
+        _current = None
+    return start(hook, event_type)
+
+
+def current() -> Optional[HookMetrics]:
+    """Return the recorder created by start(), if any."""
+    return _current
+
+
+@contextmanager
+def _no_span():
+    yield
+
+
+def span(stage: str):
+    """Time a stage on the process recorder; a no-op if start() was not called."""
+    if _current is None:
+        return _no_span()
+    return _current.span(stage)
+
+
+def set_event_type(event_type: str):
+    """Set the event type label, for hooks that learn it from their input."""
+    if _current is not None:
+        _current.event_type = event_type
+
+
+def set_outcome(outcome: str):
+    """Set the outcome label, e.g. 'blocked' or 'error' (default 'ok')."""
+    if _current is not None:
+        _current.outcome = outcome
+
+
+def incr(name: str, value: int = 1):
+    """Add to a counter flushed with this hook's labels."""
+    if _current is not None:
+        _current.counters[name] = _current.counters.get(name, 0) + value
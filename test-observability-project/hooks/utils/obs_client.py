@@ -0,0 +1,519 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Client for the observability server.
+
+- Connections are kept alive and reused, one per thread
+- Events are paged by id (keyset pagination), not by re-downloading
+  /events/recent
+- Listings (/events/recent, /events/filter-options) are conditional GETs:
+  responses are cached with their ETag, in memory and in
+  CLAUDE_HOOKS_CLIENT_CACHE (default logs/.client_cache), and revalidated
+  with If-None-Match, so an unchanged listing costs a 304. At most
+  CLAUDE_HOOKS_CLIENT_CACHE_ENTRIES (default 32) responses are kept; pages
+  of /events are not cached
+- AsyncObservabilityClient wraps the same calls for asyncio code
+
+Usage:
+
+    client = ObservabilityClient('http://localhost:4000')
+    client.upload_blobs(event)
+    client.send_event(event)
+    for event in client.iter_events(after_id=0, session_id='abc'):
+        ...
+
+Command line:
+
+    uv run utils/obs_client.py recent --limit 20
+    uv run utils/obs_client.py filter-options
+    uv run utils/obs_client.py events --after-id 0 --session-id abc
+    uv run utils/obs_client.py blob sha256:<hex>
+"""
+
+import argparse
+import asyncio
+import hashlib
+import http.client
+import json
+import os
+import select
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlencode, urlsplit
+
+try:
+    from utils import blobstore, codec
+    from utils.constants import LOG_BASE_DIR
+except ImportError:  # Running this file directly as a script
+    import blobstore
+    import codec
+    from constants import LOG_BASE_DIR
+
+DEFAULT_SERVER = os.environ.get("CLAUDE_HOOKS_SERVER", "http://localhost:4000")
+CLIENT_CACHE_DIR = os.environ.get("CLAUDE_HOOKS_CLIENT_CACHE", os.path.join(LOG_BASE_DIR, ".client_cache"))
+# Cached responses kept, in memory and on disk; the least recently used go first
+CLIENT_CACHE_ENTRIES = int(os.environ.get("CLAUDE_HOOKS_CLIENT_CACHE_ENTRIES", "32"))
+
+# Methods safe to retry after the request may have reached the server
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+
+class ObservabilityError(Exception):
+    """The server could not be reached or answered with an error status."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class ObservabilityClient:
+    """Synchronous client with pooled connections and a conditional-request cache."""
+
+    def __init__(self, base_url: str = DEFAULT_SERVER, timeout: float = 5.0,
+                 cache_dir: Optional[str] = CLIENT_CACHE_DIR, max_age: float = 0.0):
+        """
+        Args:
+            base_url: Server origin, e.g. 'http://localhost:4000'
+            timeout: Per-request timeout in seconds
+            cache_dir: Directory for the on-disk response cache, None for
+                memory only
+            max_age: Seconds a cached response is used without revalidating
+        """
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_age = max_age
+        self._local = threading.local()
+        self._connections = set()
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Blob references the server is known to have
+        self._uploaded = set()
+
+    # Connections
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            conn = cls(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+            self._local.used = False
+            with self._cache_lock:
+                self._connections.add(conn)
+        elif self._closed_by_server(conn):
+            # Reconnect now rather than find out after sending the request
+            self._drop_connection()
+            return self._connection()
+        return conn
+
+    @staticmethod
+    def _closed_by_server(conn: http.client.HTTPConnection) -> bool:
+        """True if an idle kept-alive connection has been closed (or reset) by the server."""
+        if conn.sock is None:
+            return False
+        try:
+            readable, _, _ = select.select([conn.sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        # An idle connection has nothing to read unless the server hung up
+        return bool(readable)
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+            with self._cache_lock:
+                self._connections.discard(conn)
+
+    def close(self):
+        """Close every pooled connection; later requests reconnect."""
+        with self._cache_lock:
+            connections, self._connections = self._connections, set()
+        for conn in connections:
+            conn.close()
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None):
+        """
+        Send one request on this thread's kept-alive connection.
+
+        A kept-alive connection the server has since closed is replaced
+        before sending. A request that still fails on a reused connection
+        is retried once on a new connection if the failure shows the server
+        closed it before it got the request (an error while sending, or
+        RemoteDisconnected with no response), or if the method is
+        idempotent. A POST that may have reached the server, e.g. on a
+        read timeout, is not retried, so an event is never stored twice.
+
+        Returns:
+            (status, response headers, body bytes)
+
+        Raises:
+            ObservabilityError: If the server cannot be reached
+        """
+        headers = dict(headers or {}, **{"User-Agent": "Claude-Code-Hook/1.0"})
+        if body is not None:
+            headers.setdefault("Content-Type", "application/json")
+        for attempt in (1, 2):
+            conn = self._connection()
+            reused = self._local.used
+            sent = False
+            try:
+                conn.request(method, self.base_path + path, body=body, headers=headers)
+                sent = True
+                response = conn.getresponse()
+                data = response.read()
+                self._local.used = True
+                if response.getheader("Connection", "").lower() == "close":
+                    self._drop_connection()
+                return response.status, response, data
+            except (http.client.HTTPException, OSError) as e:
+                self._drop_connection()
+                stale = not sent or isinstance(e, http.client.RemoteDisconnected)
+                if attempt == 2 or not reused or not (stale or method in IDEMPOTENT_METHODS):
+                    raise ObservabilityError(f"Request to {self.host} failed: {e}") from e
+
+    # Conditional GETs
+
+    def _cache_file(self, path: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        key = hashlib.sha256(f"{self.scheme}://{self.host}:{self.port}{self.base_path}{path}".encode()).hexdigest()
+        return self.cache_dir / f"{key[:32]}.json"
+
+    def _cached(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._cache_lock:
+            entry = self._memory.get(path)
+            if entry is not None:
+                self._memory.move_to_end(path)
+        if entry is None:
+            cache_file = self._cache_file(path)
+            if cache_file is not None and cache_file.exists():
+                try:
+                    entry = json.loads(cache_file.read_text())
+                except (OSError, ValueError):
+                    entry = None
+        return entry
+
+    def _store(self, path: str, entry: Dict[str, Any]):
+        with self._cache_lock:
+            self._memory[path] = entry
+            self._memory.move_to_end(path)
+            while len(self._memory) > CLIENT_CACHE_ENTRIES:
+                self._memory.popitem(last=False)
+        cache_file = self._cache_file(path)
+        if cache_file is None:
+            return
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(entry))
+            os.replace(tmp, cache_file)
+            self._prune_disk_cache()
+        except OSError:
+            pass  # The memory cache still works
+
+    def _prune_disk_cache(self):
+        """Delete the least recently stored cache files beyond CLIENT_CACHE_ENTRIES."""
+        files = []
+        for cache_file in self.cache_dir.glob("*.json"):
+            try:
+                files.append((cache_file.stat().st_mtime, cache_file))
+            except OSError:
+                continue  # Pruned by another process
+        if len(files) <= CLIENT_CACHE_ENTRIES:
+            return
+        files.sort()
+        for _, cache_file in files[:len(files) - CLIENT_CACHE_ENTRIES]:
+            try:
+                cache_file.unlink()
+            except OSError:
+                pass
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None, cache: bool = True) -> Any:
+        """
+        GET a JSON resource, revalidating a cached copy with If-None-Match.
+
+        Args:
+            path: Resource path
+            params: Query parameters; None values are left out
+            cache: Cache the response; off for one-off resources such as
+                the pages of a keyset walk, which would only evict the
+                listings worth revalidating
+
+        Raises:
+            ObservabilityError: On connection failure or an error status
+        """
+        query = {key: value for key, value in (params or {}).items() if value is not None}
+        if query:
+            path = f"{path}?{urlencode(query)}"
+
+        entry = self._cached(path) if cache else None
+        if entry is not None and time.time() - entry["fetched_at"] < self.max_age:
+            return entry["data"]
+
+        headers = {"If-None-Match": entry["etag"]} if entry and entry.get("etag") else {}
+        status, response, body = self.request("GET", path, headers=headers)
+        if status == 304 and entry is not None:
+            entry["fetched_at"] = time.time()
+            self._store(path, entry)
+            return entry["data"]
+        if not 200 <= status < 300:
+            raise ObservabilityError(f"GET {path} returned {status}", status)
+
+        data = codec.loads(body)
+        etag = response.getheader("ETag")
+        if etag and cache:
+            self._store(path, {"etag": etag, "fetched_at": time.time(), "data": data})
+        return data
+
+    # Endpoints
+
+    def send_event(self, event: Dict[str, Any], path: str = "/events") -> Dict[str, Any]:
+        """
+        POST one event.
+
+        Returns:
+            The stored event as returned by the server, including its id
+
+        Raises:
+            ObservabilityError: On connection failure or an error status
+        """
+        status, _, body = self.request("POST", path, body=codec.dumpb(event))
+        if not 200 <= status < 300:
+            raise ObservabilityError(f"Server returned status: {status}", status)
+        try:
+            return codec.loads(body)
+        except ValueError:
+            return {}
+
+    def upload_blobs(self, event: Dict[str, Any]) -> int:
+        """
+        Upload the blobs an event refers to that the server does not have yet.
+
+        Each reference is checked with HEAD /blobs/<hex> and, if missing, its
+        content is sent with PUT /blobs/<hex>; blobs uploaded or found by this
+        client are not checked again. Blobs missing from the local store are
+        skipped.
+
+        Returns:
+            Number of blobs uploaded
+
+        Raises:
+            ObservabilityError: On connection failure or an error status
+        """
+        uploaded = 0
+        for ref in dict.fromkeys(blobstore.blob_refs(event)):
+            if ref in self._uploaded:
+                continue
+            try:
+                digest = blobstore.blob_digest(ref)
+            except ValueError:
+                continue  # Not a reference this client made
+            status, _, _ = self.request("HEAD", f"/blobs/{digest}")
+            if status == 404:
+                content = blobstore.get_blob(ref)
+                if content is None:
+                    continue
+                status, _, _ = self.request("PUT", f"/blobs/{digest}", body=content.encode("utf-8"),
+                                            headers={"Content-Type": "text/plain; charset=utf-8"})
+                uploaded += 1
+            if not 200 <= status < 300:
+                raise ObservabilityError(f"Blob upload {digest} returned {status}", status)
+            self._uploaded.add(ref)
+        return uploaded
+
+    def get_blob(self, ref: str) -> str:
+        """
+        Fetch a blob's content from the server.
+
+        Args:
+            ref: A blob reference, "sha256:<hex>" or bare hex
+
+        Raises:
+            ObservabilityError: On an invalid reference, connection failure or
+                an error status (404 if unknown)
+        """
+        try:
+            digest = blobstore.blob_digest(ref)
+        except ValueError as e:
+            raise ObservabilityError(str(e)) from e
+        status, _, body = self.request("GET", f"/blobs/{digest}")
+        if not 200 <= status < 300:
+            raise ObservabilityError(f"GET /blobs/{digest} returned {status}", status)
+        return body.decode("utf-8")
+
+    def recent_events(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """The newest events, oldest first."""
+        return self.get_json("/events/recent", {"limit": limit})
+
+    def filter_options(self) -> Dict[str, List[str]]:
+        """Distinct source apps, session ids and event types."""
+        return self.get_json("/events/filter-options")
+
+    def events_page(self, after_id: Optional[int] = None, before_id: Optional[int] = None,
+                    limit: int = 100, source_app: Optional[str] = None,
+                    session_id: Optional[str] = None,
+                    hook_event_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        One page of events by id, oldest first.
+
+        Args:
+            after_id: Return events with a larger id (paging forward)
+            before_id: Return events with a smaller id (paging backward)
+            limit: Page size, at most 1000
+            source_app, session_id, hook_event_type: Optional filters
+        """
+        return self.get_json("/events", {
+            "after_id": after_id, "before_id": before_id, "limit": limit,
+            "source_app": source_app, "session_id": session_id, "hook_event_type": hook_event_type,
+        }, cache=False)
+
+    def iter_events(self, after_id: int = 0, page_size: int = 500, **filters) -> Iterator[Dict[str, Any]]:
+        """Every event after after_id, oldest first, fetched page by page."""
+        while True:
+            page = self.events_page(after_id=after_id, limit=page_size, **filters)
+            yield from page
+            if len(page) < page_size:
+                return
+            after_id = page[-1]["id"]
+
+    def iter_events_backward(self, before_id: Optional[int] = None, page_size: int = 500,
+                             **filters) -> Iterator[Dict[str, Any]]:
+        """Events before before_id (default: all), newest first, fetched page by page."""
+        while True:
+            page = self.events_page(before_id=before_id, limit=page_size, **filters)
+            yield from reversed(page)
+            if len(page) < page_size:
+                return
+            before_id = page[0]["id"]
+
+
+class AsyncObservabilityClient:
+    """asyncio wrapper running ObservabilityClient calls on a small thread pool."""
+
+    def __init__(self, base_url: str = DEFAULT_SERVER, max_connections: int = 8, **kwargs):
+        """
+        Args:
+            base_url: Server origin
+            max_connections: Concurrent requests, one kept-alive connection each
+            **kwargs: Passed to ObservabilityClient
+        """
+        self.client = ObservabilityClient(base_url, **kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="obs-client")
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def send_event(self, event: Dict[str, Any], path: str = "/events") -> Dict[str, Any]:
+        return await self._run(self.client.send_event, event, path)
+
+    async def upload_blobs(self, event: Dict[str, Any]) -> int:
+        return await self._run(self.client.upload_blobs, event)
+
+    async def get_blob(self, ref: str) -> str:
+        return await self._run(self.client.get_blob, ref)
+
+    async def recent_events(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return await self._run(self.client.recent_events, limit)
+
+    async def filter_options(self) -> Dict[str, List[str]]:
+        return await self._run(self.client.filter_options)
+
+    async def events_page(self, **kwargs) -> List[Dict[str, Any]]:
+        return await self._run(self.client.events_page, **kwargs)
+
+    async def iter_events(self, after_id: int = 0, page_size: int = 500, **filters):
+        """Async iterator over every event after after_id, oldest first."""
+        while True:
+            page = await self.events_page(after_id=after_id, limit=page_size, **filters)
+            for event in page:
+                yield event
+            if len(page) < page_size:
+                return
+            after_id = page[-1]["id"]
+
+    async def close(self):
+        """Stop the worker threads and close the pooled connections."""
+        self._executor.shutdown(wait=True)
+        self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+# Clients shared within a process, keyed by server origin
+_clients: Dict[str, ObservabilityClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url: str = DEFAULT_SERVER) -> ObservabilityClient:
+    """Return the process-wide client for a server, creating it on first use."""
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = _clients[base_url] = ObservabilityClient(base_url)
+        return client
+
+
+def main():
+    """Command line interface: query the server."""
+    parser = argparse.ArgumentParser(description="Query the observability server")
+    parser.add_argument("--server", default=DEFAULT_SERVER, help="Server origin")
+    sub = parser.add_subparsers(dest="command", required=True)
+    recent = sub.add_parser("recent", help="Newest events")
+    recent.add_argument("--limit", type=int, default=100)
+    sub.add_parser("filter-options", help="Distinct source apps, sessions and event types")
+    events = sub.add_parser("events", help="Page through events by id")
+    events.add_argument("--after-id", type=int, default=0)
+    events.add_argument("--source-app")
+    events.add_argument("--session-id")
+    events.add_argument("--event-type")
+    events.add_argument("--max", type=int, help="Stop after this many events")
+    blob = sub.add_parser("blob", help="Print a blob's content, as stored on the server")
+    blob.add_argument("ref", help="sha256:<hex> or bare hex")
+    args = parser.parse_args()
+
+    client = ObservabilityClient(args.server)
+    try:
+        if args.command == "recent":
+            result = client.recent_events(args.limit)
+        elif args.command == "filter-options":
+            result = client.filter_options()
+        elif args.command == "blob":
+            sys.stdout.write(client.get_blob(args.ref))
+            return
+        else:
+            result = []
+            for event in client.iter_events(args.after_id, source_app=args.source_app,
+                                            session_id=args.session_id, hook_event_type=args.event_type):
+                result.append(event)
+                if args.max and len(result) >= args.max:
+                    break
+    except ObservabilityError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
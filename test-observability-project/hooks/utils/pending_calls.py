@@ -0,0 +1,158 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Cross-process index of tool calls between PreToolUse and PostToolUse.
+
+PreToolUse and PostToolUse run in separate processes, so the start of each
+tool call is recorded in a small SQLite table keyed by tool_use_id. The
+first PostToolUse hook to resolve a call fixes its end time; later lookups
+(e.g. the logger and send_event running as separate commands) get the same
+duration.
+
+The table stays small: resolved and orphaned calls (PreToolUse blocked, or
+the session killed) expire after CLAUDE_HOOKS_PENDING_TTL seconds (default
+3600), and at most CLAUDE_HOOKS_PENDING_MAX_ROWS calls (default 10000) are
+kept.
+"""
+
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Optional
+
+from utils import codec
+from utils.constants import LOG_BASE_DIR
+from utils.sqlite_state import StateDB
+
+PENDING_DB = os.environ.get("CLAUDE_HOOKS_PENDING_DB", os.path.join(LOG_BASE_DIR, ".pending.db"))
+PENDING_TTL = float(os.environ.get("CLAUDE_HOOKS_PENDING_TTL", "3600"))
+PENDING_MAX_ROWS = int(os.environ.get("CLAUDE_HOOKS_PENDING_MAX_ROWS", "10000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending (
+    tool_use_id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    tool_name TEXT NOT NULL,
+    started_ns INTEGER NOT NULL,
+    ended_ns INTEGER,
+    traced INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS pending_started ON pending (started_ns);
+"""
+
+# Autocommit mode; each statement is its own short transaction
+_db = StateDB(PENDING_DB, _SCHEMA)
+
+
+def _expire(conn: sqlite3.Connection, now_ns: int):
+    """Drop expired calls and the oldest calls beyond the row cap."""
+    conn.execute("DELETE FROM pending WHERE started_ns < ?", (now_ns - int(PENDING_TTL * 1e9),))
+    conn.execute(
+        "DELETE FROM pending WHERE started_ns < "
+        "(SELECT started_ns FROM pending ORDER BY started_ns DESC LIMIT 1 OFFSET ?)",
+        (PENDING_MAX_ROWS - 1,))
+
+
+def record_start(tool_use_id: str, session_id: str = "", tool_name: str = "",
+                 started_ns: Optional[int] = None) -> bool:
+    """
+    Record that a tool call started; the first record for a call wins.
+
+    Args:
+        tool_use_id: The tool call ID
+        session_id: The Claude session ID
+        tool_name: The tool name
+        started_ns: Start time in ns since the epoch, defaults to now
+
+    Returns:
+        True if the call was recorded, False if it was not (no id, already
+        recorded, or the index is unavailable)
+    """
+    if not tool_use_id:
+        return False
+    now_ns = time.time_ns()
+    try:
+        with _db.lock:
+            conn = _db.connect()
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO pending (tool_use_id, session_id, tool_name, started_ns) "
+                "VALUES (?, ?, ?, ?)",
+                (tool_use_id, session_id or "", tool_name or "", started_ns or now_ns))
+            _expire(conn, now_ns)
+            return cursor.rowcount == 1
+    except sqlite3.Error:
+        return False
+
+
+def resolve(tool_use_id: str, ended_ns: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Look up a tool call at PostToolUse, fixing its end time on first lookup.
+
+    Args:
+        tool_use_id: The tool call ID
+        ended_ns: End time in ns since the epoch, defaults to now; ignored
+            if another hook already resolved the call
+
+    Returns:
+        Dict with tool_use_id, session_id, tool_name, started_ns, ended_ns
+        and duration_ms, or None if the start was never recorded or expired
+    """
+    if not tool_use_id:
+        return None
+    try:
+        with _db.lock:
+            conn = _db.connect()
+            conn.execute("UPDATE pending SET ended_ns = ? WHERE tool_use_id = ? AND ended_ns IS NULL",
+                         (ended_ns or time.time_ns(), tool_use_id))
+            row = conn.execute(
+                "SELECT session_id, tool_name, started_ns, ended_ns FROM pending WHERE tool_use_id = ?",
+                (tool_use_id,)).fetchone()
+    except sqlite3.Error:
+        return None
+    if row is None:
+        return None
+    session_id, tool_name, started_ns, ended_ns = row
+    return {
+        "tool_use_id": tool_use_id,
+        "session_id": session_id,
+        "tool_name": tool_name,
+        "started_ns": started_ns,
+        "ended_ns": ended_ns,
+        "duration_ms": round(max(0, ended_ns - started_ns) / 1e6, 3),
+    }
+
+
+def claim_trace(tool_use_id: str) -> bool:
+    """Return True for exactly one caller per resolved call, the one that exports its span."""
+    try:
+        with _db.lock:
+            cursor = _db.connect().execute(
+                "UPDATE pending SET traced = 1 WHERE tool_use_id = ? AND traced = 0 AND ended_ns IS NOT NULL",
+                (tool_use_id,))
+    except sqlite3.Error:
+        return False
+    return cursor.rowcount == 1
+
+
+def tool_outcome(tool_response: Any) -> str:
+    """Classify a PostToolUse tool_response as 'success', 'error' or 'interrupted'."""
+    if not isinstance(tool_response, dict):
+        return "success"
+    if tool_response.get("interrupted"):
+        return "interrupted"
+    if tool_response.get("is_error") or tool_response.get("error") or tool_response.get("success") is False:
+        return "error"
+    return "success"
+
+
+def response_size(tool_response: Any) -> int:
+    """Size in bytes of a tool_response as JSON."""
+    if tool_response is None:
+        return 0
+    if isinstance(tool_response, str):
+        return len(tool_response.encode("utf-8"))
+    return len(codec.dumpb(tool_response))
+
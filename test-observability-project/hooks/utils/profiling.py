@@ -0,0 +1,249 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+On-demand profiling for hook scripts.
+
+Set CLAUDE_HOOKS_PROFILE to enable for every hook that runs its main()
+through profiling.run():
+
+- sample:   a background thread samples all thread stacks every
+            CLAUDE_HOOKS_PROFILE_INTERVAL_MS (default 1) and writes
+            collapsed stacks (<hook>-<time>-<pid>.folded)
+- trace:    a deterministic sys.setprofile tracer records exact self time
+            per call stack, in microseconds, as collapsed stacks
+- cprofile: the stdlib cProfile, written as a .prof file for pstats,
+            snakeviz and similar viewers
+
+Profiles go to CLAUDE_HOOKS_PROFILE_DIR (default logs/.profiles). Only the
+newest CLAUDE_HOOKS_PROFILE_KEEP files (default 1000) are kept.
+
+Merge many invocations into one flamegraph input:
+
+    uv run utils/profiling.py merge -o hooks.folded
+    flamegraph.pl hooks.folded > hooks.svg
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Optional
+
+try:
+    from utils.constants import LOG_BASE_DIR
+except ImportError:  # Running this file directly as a script
+    from constants import LOG_BASE_DIR
+
+PROFILE_MODE = os.environ.get("CLAUDE_HOOKS_PROFILE", "").strip().lower()
+PROFILE_DIR = os.environ.get("CLAUDE_HOOKS_PROFILE_DIR", os.path.join(LOG_BASE_DIR, ".profiles"))
+PROFILE_KEEP = int(os.environ.get("CLAUDE_HOOKS_PROFILE_KEEP", "1000"))
+PROFILE_INTERVAL_MS = float(os.environ.get("CLAUDE_HOOKS_PROFILE_INTERVAL_MS", "1"))
+
+
+def _frame_label(code) -> str:
+    # Semicolons separate frames in the collapsed format
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})".replace(";", ":")
+
+
+class StackSampler:
+    """Periodically samples the stacks of all threads except its own."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="hook-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+class CallTracer:
+    """Deterministic profiler attributing self time to exact call stacks."""
+
+    def __init__(self):
+        self.stacks: Counter = Counter()
+        self._stack = []  # [label, start, child_time]
+
+    def start(self):
+        sys.setprofile(self._profile)
+
+    def stop(self):
+        sys.setprofile(None)
+        # Drop the frames of this stop() call and its setprofile() call, then
+        # close frames still open, e.g. when main() exits via sys.exit()
+        del self._stack[-2:]
+        while self._stack:
+            self._pop(time.perf_counter())
+
+    def _push(self, label: str, now: float):
+        self._stack.append([label, now, 0.0])
+
+    def _pop(self, now: float):
+        path = ";".join(entry[0] for entry in self._stack)
+        label, start, child_time = self._stack.pop()
+        elapsed = now - start
+        self.stacks[path] += max(0, int((elapsed - child_time) * 1e6))
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def _profile(self, frame, event, arg):
+        now = time.perf_counter()
+        if event == "call":
+            self._push(_frame_label(frame.f_code), now)
+        elif event == "c_call":
+            self._push(f"{getattr(arg, '__qualname__', arg)} (builtin)".replace(";", ":"), now)
+        elif event in ("return", "c_return", "c_exception") and self._stack:
+            self._pop(now)
+
+
+def _rotate(profile_dir: Path, keep: int):
+    """Delete the oldest profiles beyond the newest `keep`."""
+    entries = [entry for entry in os.scandir(profile_dir)
+               if entry.is_file() and entry.name.endswith((".folded", ".prof"))]
+    if len(entries) <= keep:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in entries[: len(entries) - keep]:
+        try:
+            os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def _output_path(name: str, suffix: str) -> Path:
+    profile_dir = Path(PROFILE_DIR)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    return profile_dir / f"{name}-{stamp}-{os.getpid()}{suffix}"
+
+
+def _write_folded(path: Path, stacks: Counter, root: str):
+    with open(path, "w") as f:
+        for stack, count in stacks.items():
+            if count > 0:
+                f.write(f"{root};{stack} {count}\n")
+
+
+def run(main: Callable[[], None], name: Optional[str] = None):
+    """
+    Run a hook's main() under the profiler selected by CLAUDE_HOOKS_PROFILE.
+
+    Profiles are written even when main() exits through sys.exit(); the
+    exit then propagates unchanged.
+
+    Args:
+        main: The hook's entry point
+        name: Hook name used in profile file names and as the stack root,
+            defaults to the script name
+    """
+    if PROFILE_MODE not in ("sample", "trace", "cprofile"):
+        main()
+        return
+
+    name = name or Path(sys.argv[0]).stem
+    if PROFILE_MODE == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            main()
+        finally:
+            profiler.disable()
+            try:
+                profiler.dump_stats(str(_output_path(name, ".prof")))
+                _rotate(Path(PROFILE_DIR), PROFILE_KEEP)
+            except OSError:
+                pass
+        return
+
+    profiler = StackSampler(PROFILE_INTERVAL_MS / 1000) if PROFILE_MODE == "sample" else CallTracer()
+    profiler.start()
+    try:
+        main()
+    finally:
+        profiler.stop()
+        try:
+            _write_folded(_output_path(name, ".folded"), profiler.stacks, name)
+            _rotate(Path(PROFILE_DIR), PROFILE_KEEP)
+        except OSError:
+            pass
+
+
+def merge_folded(paths) -> Counter:
+    """Sum collapsed-stack files into one Counter."""
+    merged: Counter = Counter()
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if stack and count.isdigit():
+                    merged[stack] += int(count)
+    return merged
+
+
+def main():
+    """Command line interface: merge per-invocation profiles."""
+    parser = argparse.ArgumentParser(description="Merge hook profiles")
+    sub = parser.add_subparsers(dest="command", required=True)
+    merge = sub.add_parser("merge", help="Merge profiles into one collapsed-stack file")
+    merge.add_argument("--dir", default=PROFILE_DIR, help="Profile directory")
+    merge.add_argument("--hook", help="Only merge profiles of this hook")
+    merge.add_argument("-o", "--output", default="hooks.folded", help="Collapsed-stack output")
+    merge.add_argument("--prof-output", default="hooks.prof",
+                       help="Merged pstats output for cprofile profiles")
+    args = parser.parse_args()
+
+    profile_dir = Path(args.dir)
+    prefix = f"{args.hook}-" if args.hook else ""
+    folded = sorted(profile_dir.glob(f"{prefix}*.folded"))
+    profs = sorted(profile_dir.glob(f"{prefix}*.prof"))
+
+    if folded:
+        merged = merge_folded(folded)
+        with open(args.output, "w") as f:
+            for stack, count in sorted(merged.items()):
+                f.write(f"{stack} {count}\n")
+        print(f"Merged {len(folded)} collapsed-stack profiles into {args.output}")
+
+    if profs:
+        import pstats
+        stats = pstats.Stats(str(profs[0]))
+        for path in profs[1:]:
+            stats.add(str(path))
+        stats.dump_stats(args.prof_output)
+        print(f"Merged {len(profs)} cProfile profiles into {args.prof_output}")
+
+    if not folded and not profs:
+        print(f"No profiles found in {profile_dir}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Cross-process rate limiting of LLM calls.
+
+A burst of parallel subagents starts dozens of hook processes that all call
+the provider at once; past the account's quota they get 429s, which the
+LLM helpers turn into missing summaries. Every call instead takes a slot
+from a token bucket per provider, shared through a small SQLite table,
+with one bucket of requests per minute and one of tokens per minute.
+
+Slots are reserved in arrival order: a caller that has to wait takes its
+slot right away (the bucket goes negative) and sleeps until it is due, so
+waiting callers do not all retry at the same moment. A 429 from the
+provider blocks the bucket for its Retry-After for every process.
+
+Policies, for when no slot is free now:
+- wait: sleep until the reserved slot, if that is within the maximum wait
+- skip: make no call
+- defer: reserve the slot and return its delay without sleeping; the
+  caller queues the work with defer() and runs it from take_due() later
+
+take_due() leases the work it hands out rather than removing it: done()
+removes an item once it has been run, and work whose runner died (e.g.
+killed at its deadline) is handed out again once its lease has expired.
+
+    uv run utils/ratelimit.py status
+
+Settings:
+- CLAUDE_HOOKS_LLM_RPM, CLAUDE_HOOKS_LLM_TPM: requests and tokens per
+  minute (50, 40000), or per provider, e.g. CLAUDE_HOOKS_ANTHROPIC_RPM;
+  0 is unlimited
+- CLAUDE_HOOKS_LLM_RATE_POLICY: wait, skip or defer (wait)
+- CLAUDE_HOOKS_LLM_RATE_MAX_WAIT: longest wait or deferral in seconds (5)
+- CLAUDE_HOOKS_DEFER_MAX_AGE: seconds after which deferred work is due
+  whether or not it still has a slot (120)
+- CLAUDE_HOOKS_DEFER_LEASE: seconds a runner has for deferred work it
+  took before it is handed out again (60)
+- CLAUDE_HOOKS_RATELIMIT_DB: the database (logs/.ratelimit.db)
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, List, Optional, Tuple
+
+try:
+    from utils.constants import LOG_BASE_DIR
+    from utils.sqlite_state import StateDB
+except ImportError:  # Running this file directly as a script
+    from constants import LOG_BASE_DIR
+    from sqlite_state import StateDB
+
+RATELIMIT_DB = os.environ.get("CLAUDE_HOOKS_RATELIMIT_DB", os.path.join(LOG_BASE_DIR, ".ratelimit.db"))
+
+WAIT = "wait"
+SKIP = "skip"
+DEFER = "defer"
+# For the LLM helpers: the caller already holds a slot, e.g. reserved with DEFER
+ACQUIRED = "acquired"
+POLICIES = (WAIT, SKIP, DEFER, ACQUIRED)
+
+RATE_POLICY = os.environ.get("CLAUDE_HOOKS_LLM_RATE_POLICY", WAIT)
+MAX_WAIT = float(os.environ.get("CLAUDE_HOOKS_LLM_RATE_MAX_WAIT", "5"))
+DEFER_MAX_AGE = float(os.environ.get("CLAUDE_HOOKS_DEFER_MAX_AGE", "120"))
+DEFER_LEASE = float(os.environ.get("CLAUDE_HOOKS_DEFER_LEASE", "60"))
+
+# Block after a 429 without a Retry-After header
+DEFAULT_RETRY_AFTER = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    requests REAL NOT NULL,
+    tokens REAL NOT NULL,
+    updated_ms INTEGER NOT NULL,
+    blocked_until_ms INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS deferred (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    run_at_ms INTEGER NOT NULL,
+    created_ms INTEGER NOT NULL,
+    item TEXT NOT NULL,
+    lease_id INTEGER NOT NULL DEFAULT 0,
+    leased_until_ms INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS deferred_due ON deferred (kind, run_at_ms);
+"""
+
+# The lease columns were added when take_due() stopped deleting what it hands out
+_db = StateDB(RATELIMIT_DB, _SCHEMA, {
+    "deferred": ["lease_id INTEGER NOT NULL DEFAULT 0", "leased_until_ms INTEGER NOT NULL DEFAULT 0"],
+})
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def limits(bucket: str) -> Tuple[float, float]:
+    """
+    Requests and tokens per minute of a bucket.
+
+    Returns:
+        (rpm, tpm), 0 meaning unlimited
+    """
+    prefix = f"CLAUDE_HOOKS_{bucket.upper()}_"
+    rpm = os.environ.get(prefix + "RPM", os.environ.get("CLAUDE_HOOKS_LLM_RPM", "50"))
+    tpm = os.environ.get(prefix + "TPM", os.environ.get("CLAUDE_HOOKS_LLM_TPM", "40000"))
+    return float(rpm), float(tpm)
+
+
+def _refill(row: Optional[Tuple[float, float, int, int]], rpm: float, tpm: float, now_ms: int):
+    """Bucket levels at now_ms: (requests, tokens, blocked_until_ms)."""
+    if row is None:
+        return rpm, tpm, 0
+    requests, tokens, updated_ms, blocked_until_ms = row
+    elapsed = max(0, now_ms - updated_ms)
+    return (min(rpm, requests + elapsed * rpm / 60000),
+            min(tpm, tokens + elapsed * tpm / 60000),
+            blocked_until_ms)
+
+
+def acquire(bucket: str, tokens: int = 0, policy: Optional[str] = None,
+            max_wait: Optional[float] = None) -> Optional[float]:
+    """
+    Take a slot for one call from a bucket.
+
+    Args:
+        bucket: Bucket name, e.g. the provider 'anthropic'
+        tokens: Estimated tokens of the call, prompt and output
+        policy: WAIT, SKIP or DEFER, defaults to CLAUDE_HOOKS_LLM_RATE_POLICY
+        max_wait: Longest wait or deferral in seconds, defaults to
+            CLAUDE_HOOKS_LLM_RATE_MAX_WAIT
+
+    Returns:
+        Seconds until the call may start: 0.0 to call now (WAIT has already
+        slept), the reserved delay for DEFER, or None if no slot was taken
+        and the call should not be made. Fails open: 0.0 if the limiter's
+        database cannot be used.
+    """
+    policy = policy or RATE_POLICY
+    if policy == ACQUIRED:
+        return 0.0
+    rpm, tpm = limits(bucket)
+    if rpm <= 0 and tpm <= 0:
+        return 0.0
+    max_wait_ms = (MAX_WAIT if max_wait is None else max_wait) * 1000
+    now_ms = _now_ms()
+    try:
+        with _db.lock:
+            conn = _db.connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT requests, tokens, updated_ms, blocked_until_ms FROM buckets "
+                                   "WHERE name = ?", (bucket,)).fetchone()
+                requests, available, blocked_until_ms = _refill(row, rpm, tpm, now_ms)
+                # A call larger than the whole bucket waits for a full one
+                cost = min(tokens, tpm) if tpm > 0 else 0
+                delay_ms = max(
+                    blocked_until_ms - now_ms,
+                    (1 - requests) * 60000 / rpm if rpm > 0 else 0,
+                    (cost - available) * 60000 / tpm if tpm > 0 else 0,
+                    0,
+                )
+                taken = delay_ms == 0 or (policy != SKIP and delay_ms <= max_wait_ms)
+                if taken:
+                    requests -= 1
+                    available -= cost
+                conn.execute(
+                    "INSERT INTO buckets (name, requests, tokens, updated_ms, blocked_until_ms) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT (name) DO UPDATE SET requests = excluded.requests, "
+                    "tokens = excluded.tokens, updated_ms = excluded.updated_ms",
+                    (bucket, requests, available, now_ms, blocked_until_ms))
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+    except sqlite3.Error:
+        return 0.0
+    if not taken:
+        return None
+    if policy == DEFER:
+        return delay_ms / 1000
+    if delay_ms:
+        time.sleep(delay_ms / 1000)
+    return 0.0
+
+
+def note_error(bucket: str, error: BaseException) -> bool:
+    """
+    Block a bucket for every process after the provider answered 429.
+
+    Args:
+        bucket: Bucket name
+        error: The exception from the provider SDK; anything other than a
+            429 (status_code attribute) is ignored
+
+    Returns:
+        True if the bucket was blocked
+    """
+    if getattr(error, "status_code", None) != 429:
+        return False
+    retry_after = DEFAULT_RETRY_AFTER
+    try:
+        retry_after = float(error.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        pass
+    rpm, tpm = limits(bucket)
+    now_ms = _now_ms()
+    until_ms = now_ms + int(retry_after * 1000)
+    try:
+        with _db.lock:
+            _db.connect().execute(
+                "INSERT INTO buckets (name, requests, tokens, updated_ms, blocked_until_ms) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET blocked_until_ms = MAX(blocked_until_ms, excluded.blocked_until_ms)",
+                (bucket, rpm, tpm, now_ms, until_ms))
+    except sqlite3.Error:
+        return False
+    return True
+
+
+def defer(kind: str, item: Any, delay: float) -> bool:
+    """
+    Queue work that holds a slot reserved with DEFER.
+
+    Args:
+        kind: Queue name, e.g. 'summary'
+        item: JSON-serializable work item
+        delay: Seconds until the reserved slot, as returned by acquire()
+
+    Returns:
+        True if the item was queued
+    """
+    now_ms = _now_ms()
+    try:
+        with _db.lock:
+            _db.connect().execute(
+                "INSERT INTO deferred (kind, run_at_ms, created_ms, item) VALUES (?, ?, ?, ?)",
+                (kind, now_ms + int(delay * 1000), now_ms, json.dumps(item)))
+    except (sqlite3.Error, TypeError, ValueError):
+        return False
+    return True
+
+
+def take_due(kind: str, limit: int, horizon: float = 0.0) -> List[Tuple[Tuple[int, int], float, Any, bool]]:
+    """
+    Lease queued work whose slot has come; each item goes to one caller at a time.
+
+    Args:
+        kind: Queue name
+        limit: Most items to take
+        horizon: Also take items due within this many seconds
+
+    Returns:
+        [(lease, run_at, item, expired)] in due order, run_at in epoch
+        seconds. Pass lease to done() once the item has been run; until
+        then it is handed out again after CLAUDE_HOOKS_DEFER_LEASE seconds.
+        Expired items waited longer than CLAUDE_HOOKS_DEFER_MAX_AGE; their
+        slot is long gone, so run them without the rate-limited part.
+    """
+    now_ms = _now_ms()
+    lease_id = int.from_bytes(os.urandom(7), "big") + 1
+    try:
+        with _db.lock:
+            conn = _db.connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT id, run_at_ms, created_ms, item FROM deferred "
+                    "WHERE kind = ? AND run_at_ms <= ? AND leased_until_ms <= ? ORDER BY run_at_ms LIMIT ?",
+                    (kind, now_ms + int(horizon * 1000), now_ms, limit)).fetchall()
+                conn.executemany("UPDATE deferred SET lease_id = ?, leased_until_ms = ? WHERE id = ?",
+                                 [(lease_id, now_ms + int(DEFER_LEASE * 1000), row[0]) for row in rows])
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+    except sqlite3.Error:
+        return []
+    expired_ms = now_ms - int(DEFER_MAX_AGE * 1000)
+    return [((item_id, lease_id), run_at_ms / 1000, json.loads(item), created_ms < expired_ms)
+            for item_id, run_at_ms, created_ms, item in rows]
+
+
+def count_due(kind: str, horizon: float = 0.0) -> int:
+    """Number of queued items take_due() would hand out now, leased ones excluded."""
+    now_ms = _now_ms()
+    try:
+        with _db.lock:
+            return _db.connect().execute(
+                "SELECT COUNT(*) FROM deferred WHERE kind = ? AND run_at_ms <= ? AND leased_until_ms <= ?",
+                (kind, now_ms + int(horizon * 1000), now_ms)).fetchone()[0]
+    except sqlite3.Error:
+        return 0
+
+
+def done(lease: Tuple[int, int]) -> bool:
+    """
+    Remove an item taken with take_due() once it has been run.
+
+    Args:
+        lease: The item's lease from take_due()
+
+    Returns:
+        False if the lease had expired and another caller has taken the item
+    """
+    try:
+        with _db.lock:
+            return _db.connect().execute("DELETE FROM deferred WHERE id = ? AND lease_id = ?", lease).rowcount > 0
+    except sqlite3.Error:
+        return False
+
+
+def status() -> List[dict]:
+    """Current level of every bucket and the length of its deferred queues."""
+    now_ms = _now_ms()
+    result = []
+    with _db.lock:
+        conn = _db.connect()
+        rows = conn.execute("SELECT name, requests, tokens, updated_ms, blocked_until_ms FROM buckets "
+                            "ORDER BY name").fetchall()
+        queues = dict(conn.execute("SELECT kind, COUNT(*) FROM deferred GROUP BY kind").fetchall())
+    for name, *row in rows:
+        rpm, tpm = limits(name)
+        requests, tokens, blocked_until_ms = _refill(tuple(row), rpm, tpm, now_ms)
+        result.append({"bucket": name, "rpm": rpm, "tpm": tpm, "requests": round(requests, 2),
+                       "tokens": round(tokens), "blocked_for_s": max(0, blocked_until_ms - now_ms) / 1000})
+    return [*result, *({"queue": kind, "deferred": count} for kind, count in sorted(queues.items()))]
+
+
+def main():
+    """Command line interface: show bucket levels and deferred work."""
+    parser = argparse.ArgumentParser(description="Shared LLM rate limits")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Print bucket levels and deferred queue lengths as JSON")
+    parser.parse_args()
+
+    try:
+        print(json.dumps(status(), indent=2))
+    except sqlite3.Error as e:
+        print(f"Failed to read {RATELIMIT_DB}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Incrementally maintained per-session statistics.
+
+Every logged hook event adds to its session's counters with a single SQLite
+UPSERT, so a session report is one small read however long the session
+ran, instead of a re-parse of every per-hook log:
+
+    uv run utils/rollup.py report <session_id>
+    uv run utils/rollup.py list
+
+The rollup lives in CLAUDE_HOOKS_ROLLUP_DB (default logs/.rollup.db).
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+try:
+    from utils.constants import LOG_BASE_DIR
+    from utils.sqlite_state import StateDB
+except ImportError:  # Running this file directly as a script
+    from constants import LOG_BASE_DIR
+    from sqlite_state import StateDB
+
+ROLLUP_DB = os.environ.get("CLAUDE_HOOKS_ROLLUP_DB", os.path.join(LOG_BASE_DIR, ".rollup.db"))
+
+# Session counters, in report order
+SESSION_COUNTERS = (
+    "events", "tool_calls", "tool_failures", "blocked", "bytes_written",
+    "prompts", "notifications", "subagent_stops", "stops", "compactions", "sampled_out",
+)
+TOOL_COUNTERS = ("calls", "failures", "blocked", "bytes_written")
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    first_ms INTEGER NOT NULL,
+    last_ms INTEGER NOT NULL,
+    {", ".join(f"{name} INTEGER NOT NULL DEFAULT 0" for name in SESSION_COUNTERS)}
+);
+CREATE TABLE IF NOT EXISTS tools (
+    session_id TEXT NOT NULL,
+    tool_name TEXT NOT NULL,
+    {", ".join(f"{name} INTEGER NOT NULL DEFAULT 0" for name in TOOL_COUNTERS)},
+    PRIMARY KEY (session_id, tool_name)
+);
+"""
+
+# Counters introduced after a database was created are added to it
+_db = StateDB(ROLLUP_DB, _SCHEMA, {
+    "sessions": [f"{name} INTEGER NOT NULL DEFAULT 0" for name in SESSION_COUNTERS],
+    "tools": [f"{name} INTEGER NOT NULL DEFAULT 0" for name in TOOL_COUNTERS],
+})
+
+
+def _bytes_written(tool_name: str, tool_input: Dict[str, Any]) -> int:
+    """Bytes of file content a Write/Edit/MultiEdit call wrote."""
+    if tool_name == "Write":
+        texts = [tool_input.get("content")]
+    elif tool_name == "Edit":
+        texts = [tool_input.get("new_string")]
+    elif tool_name == "MultiEdit":
+        texts = [edit.get("new_string") for edit in tool_input.get("edits") or [] if isinstance(edit, dict)]
+    else:
+        return 0
+    return sum(len(text.encode("utf-8")) for text in texts if isinstance(text, str))
+
+
+def _deltas(event_type: str, input_data: Dict[str, Any], blocked: bool):
+    """Session and tool counter increments for one event."""
+    session = {"events": 1}
+    tool = {}
+    if event_type == "PreToolUse" and blocked:
+        session["blocked"] = tool["blocked"] = 1
+    elif event_type == "PostToolUse":
+        from utils.pending_calls import tool_outcome
+
+        tool_name = input_data.get("tool_name", "")
+        written = _bytes_written(tool_name, input_data.get("tool_input") or {})
+        failed = int(tool_outcome(input_data.get("tool_response")) == "error")
+        session.update(tool_calls=1, tool_failures=failed, bytes_written=written)
+        tool.update(calls=1, failures=failed, bytes_written=written)
+    elif event_type == "UserPromptSubmit":
+        session["prompts"] = 1
+    elif event_type == "Notification":
+        session["notifications"] = 1
+    elif event_type == "SubagentStop":
+        session["subagent_stops"] = 1
+    elif event_type == "Stop":
+        session["stops"] = 1
+    elif event_type == "PreCompact":
+        session["compactions"] = 1
+    return session, tool
+
+
+def _upsert(conn: sqlite3.Connection, table: str, keys: Dict[str, Any], deltas: Dict[str, int],
+            first: Optional[Dict[str, Any]] = None, last: Optional[Dict[str, Any]] = None):
+    columns = {**keys, **(first or {}), **(last or {}), **deltas}
+    updates = [f"{name} = {name} + excluded.{name}" for name in deltas]
+    updates += [f"{name} = excluded.{name}" for name in (last or {})]
+    conn.execute(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+        f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {', '.join(updates)}",
+        tuple(columns.values()))
+
+
+def record(event_type: str, input_data: Dict[str, Any], blocked: bool = False) -> bool:
+    """
+    Add one hook event to its session's rollup.
+
+    Args:
+        event_type: Hook event type, e.g. 'PostToolUse'
+        input_data: The hook input; only session_id, tool_name, tool_input
+            and tool_response are read
+        blocked: Whether a guard blocked the event (PreToolUse)
+
+    Returns:
+        True if the rollup was updated
+    """
+    session, tool = _deltas(event_type, input_data, blocked)
+    return _apply(input_data.get("session_id") or "unknown", session, tool, input_data.get("tool_name", ""))
+
+
+def add(session_id: str, **counters: int) -> bool:
+    """
+    Add to session counters for activity that is not a logged event.
+
+    Args:
+        session_id: The Claude session ID
+        **counters: Session counter increments, e.g. sampled_out=1
+
+    Returns:
+        True if the rollup was updated
+    """
+    return _apply(session_id or "unknown", counters, {}, "")
+
+
+def _apply(session_id: str, session: Dict[str, int], tool: Dict[str, int], tool_name: str) -> bool:
+    now_ms = int(time.time() * 1000)
+    try:
+        with _db.lock:
+            conn = _db.connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                _upsert(conn, "sessions", {"session_id": session_id}, session,
+                        first={"first_ms": now_ms}, last={"last_ms": now_ms})
+                if tool:
+                    _upsert(conn, "tools", {"session_id": session_id, "tool_name": tool_name}, tool)
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+    except sqlite3.Error:
+        return False
+    return True
+
+
+def get(session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a session's rollup.
+
+    Args:
+        session_id: The Claude session ID
+
+    Returns:
+        Dict of session counters with first_ms, last_ms and per-tool counters
+        under 'tools', or None if the session has no rollup
+    """
+    try:
+        with _db.lock:
+            conn = _db.connect()
+            row = conn.execute(
+                f"SELECT first_ms, last_ms, {', '.join(SESSION_COUNTERS)} FROM sessions WHERE session_id = ?",
+                (session_id,)).fetchone()
+            tools = conn.execute(
+                f"SELECT tool_name, {', '.join(TOOL_COUNTERS)} FROM tools WHERE session_id = ? "
+                "ORDER BY calls DESC, tool_name", (session_id,)).fetchall()
+    except sqlite3.Error:
+        return None
+    if row is None:
+        return None
+    rollup = {"session_id": session_id, "first_ms": row[0], "last_ms": row[1]}
+    rollup.update(zip(SESSION_COUNTERS, row[2:]))
+    rollup["tools"] = {name: dict(zip(TOOL_COUNTERS, counts)) for name, *counts in tools}
+    return rollup
+
+
+def describe(rollup: Dict[str, Any]) -> str:
+    """One-line human summary of a session rollup."""
+    minutes = (rollup["last_ms"] - rollup["first_ms"]) / 60000
+    return (f"{rollup['tool_calls']} tool calls ({rollup['tool_failures']} failed, "
+            f"{rollup['blocked']} blocked), {rollup['bytes_written']} bytes written, "
+            f"{rollup['prompts']} prompts, {rollup['subagent_stops']} subagents "
+            f"in {minutes:.1f} min")
+
+
+def summary_event(session_id: str, source_app: str) -> Optional[Dict[str, Any]]:
+    """
+    Build the SessionSummary event sent to the server at Stop.
+
+    Args:
+        session_id: The Claude session ID
+        source_app: Source application name
+
+    Returns:
+        The event dict, or None if the session has no rollup
+    """
+    rollup = get(session_id)
+    if rollup is None:
+        return None
+    return {
+        "source_app": source_app,
+        "session_id": session_id,
+        "hook_event_type": "SessionSummary",
+        "payload": rollup,
+        "summary": describe(rollup),
+        "timestamp": int(datetime.now().timestamp() * 1000),
+    }
+
+
+def main():
+    """Command line interface: print session rollups."""
+    parser = argparse.ArgumentParser(description="Per-session hook statistics")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("report", help="Print one session's rollup as JSON")
+    report.add_argument("session_id")
+    sessions = sub.add_parser("list", help="List sessions, most recent first")
+    sessions.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "report":
+        rollup = get(args.session_id)
+        if rollup is None:
+            print(f"No rollup for session {args.session_id}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(rollup, indent=2))
+        return
+
+    try:
+        rows = _db.connect().execute(
+            "SELECT session_id FROM sessions ORDER BY last_ms DESC LIMIT ?", (args.limit,)).fetchall()
+    except sqlite3.Error as e:
+        print(f"Failed to read {ROLLUP_DB}: {e}", file=sys.stderr)
+        sys.exit(1)
+    for (session_id,) in rows:
+        print(f"{session_id}  {describe(get(session_id))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Sampling policy for events sent to the observability server.
+
+The policy is a JSON file named by CLAUDE_HOOKS_SAMPLING_CONFIG, by default
+sampling.json next to the hook scripts (see sampling.json.sample). Without a
+config file every event is sent.
+
+    {
+      "default_rate": 1.0,
+      "events": {"PreToolUse": 0.5},
+      "tools": {"Read": 0.1, "Glob": 0.1, "Grep": 0.1},
+      "always_keep": {
+        "events": ["Stop", "SubagentStop", "SessionSummary"],
+        "outcomes": ["error", "interrupted"],
+        "blocked": true
+      }
+    }
+
+A tool's rate takes precedence over its event type's rate, which takes
+precedence over default_rate; a rate of 0 never sends. Tool events are
+sampled on a hash of tool_use_id, so PreToolUse and PostToolUse of one call
+are kept or dropped together (and with different rates, the calls kept at
+the lower rate are a subset of those kept at the higher one).
+
+Kept events carry their sample_rate so totals can be extrapolated (each
+kept event stands for 1 / sample_rate events); dropped events are counted
+in the session rollup and the metrics textfile.
+"""
+
+import hashlib
+import json
+import os
+import random
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+SAMPLING_CONFIG = os.environ.get(
+    "CLAUDE_HOOKS_SAMPLING_CONFIG", str(Path(__file__).resolve().parent.parent / "sampling.json"))
+
+DEFAULT_ALWAYS_KEEP = {
+    "events": ["Stop", "SubagentStop", "SessionSummary"],
+    "outcomes": ["error", "interrupted"],
+    "blocked": True,
+}
+
+_config: Optional[Dict[str, Any]] = None
+
+
+def load_config(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load the sampling policy; a missing or invalid file keeps every event.
+
+    Args:
+        path: Config file path, defaults to CLAUDE_HOOKS_SAMPLING_CONFIG
+
+    Returns:
+        The policy dict
+    """
+    try:
+        with open(path or SAMPLING_CONFIG) as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        config = {}
+    if not isinstance(config, dict):
+        config = {}
+    config.setdefault("always_keep", DEFAULT_ALWAYS_KEEP)
+    return config
+
+
+def _policy() -> Dict[str, Any]:
+    global _config
+    if _config is None:
+        _config = load_config()
+    return _config
+
+
+def hash_fraction(key: str) -> float:
+    """Map a key to a stable number in [0, 1)."""
+    return int(hashlib.sha256(key.encode()).hexdigest()[:15], 16) / 16 ** 15
+
+
+def rate_for(event_type: str, tool_name: str = "", config: Optional[Dict[str, Any]] = None) -> float:
+    """Sample rate for an event type and tool under a policy."""
+    config = config if config is not None else _policy()
+    if tool_name and tool_name in config.get("tools", {}):
+        rate = config["tools"][tool_name]
+    elif event_type in config.get("events", {}):
+        rate = config["events"][event_type]
+    else:
+        rate = config.get("default_rate", 1.0)
+    return min(1.0, max(0.0, float(rate)))
+
+
+def always_keep(event_type: str, input_data: Dict[str, Any], blocked: bool = False,
+                config: Optional[Dict[str, Any]] = None) -> bool:
+    """Whether an event is exempt from sampling (errors, blocks, Stop, ...)."""
+    config = config if config is not None else _policy()
+    rules = config.get("always_keep", {})
+    if event_type in rules.get("events", []):
+        return True
+    if blocked and rules.get("blocked", True):
+        return True
+    if event_type == "PostToolUse" and rules.get("outcomes"):
+        from utils.pending_calls import tool_outcome
+
+        return tool_outcome(input_data.get("tool_response")) in rules["outcomes"]
+    return False
+
+
+def sample(event_type: str, input_data: Dict[str, Any], blocked: bool = False,
+           config: Optional[Dict[str, Any]] = None) -> Optional[float]:
+    """
+    Decide whether to send an event.
+
+    Args:
+        event_type: Hook event type, e.g. 'PostToolUse'
+        input_data: The decoded hook input
+        blocked: Whether a guard blocked the event
+        config: Policy to apply, defaults to the loaded config file
+
+    Returns:
+        The sample rate the event was kept at (1.0 for always-kept events),
+        or None if the event is sampled out
+    """
+    if always_keep(event_type, input_data, blocked, config):
+        return 1.0
+    rate = rate_for(event_type, input_data.get("tool_name", ""), config)
+    if rate >= 1.0:
+        return 1.0
+    tool_use_id = input_data.get("tool_use_id")
+    draw = hash_fraction(tool_use_id) if tool_use_id else random.random()
+    return rate if draw < rate else None
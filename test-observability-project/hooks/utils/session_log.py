@@ -0,0 +1,246 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Per-session log files shared by all hooks.
+
+Logs are JSON arrays by default. With CLAUDE_HOOKS_LOG_FORMAT=msgpack (and
+msgspec or msgpack installed) entries are appended to a binary record
+stream next to where the JSON file would be, e.g. post_tool_use.msgpack.
+
+Parallel subagents write to the same session logs at once, so appends never
+rewrite a log:
+
+- JSON arrays are extended in place under an exclusive flock: one write
+  replaces the closing bracket with ",<entry>]". Waits for the lock are
+  bounded by CLAUDE_HOOKS_LOG_LOCK_TIMEOUT_MS (default 2000); on timeout the
+  entry goes to <name>.overflow.jsonl instead, which read_session_log()
+  merges back in.
+- Record streams and overflow files are appended lock-free with a single
+  O_APPEND write per entry.
+- A log whose tail is not a closed array (e.g. after a crash mid-write) is
+  moved aside as <name>.corrupt-<time> rather than discarded.
+
+Each entry is stamped with logged_at, its append time in epoch
+milliseconds, so the logs of one session can be merged in order (see
+tools/replay.py).
+"""
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are not serialized
+    fcntl = None
+
+from utils import codec
+from utils.blobstore import BLOB_THRESHOLD, externalize
+from utils.constants import ensure_session_log_dir
+
+LOCK_TIMEOUT = float(os.environ.get("CLAUDE_HOOKS_LOG_LOCK_TIMEOUT_MS", "2000")) / 1000
+
+# Bytes read from the end of a log to find its closing bracket
+_TAIL_BYTES = 64
+_WHITESPACE = b" \t\r\n"
+
+LOGGED_AT_KEY = "logged_at"
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _lock(fd: int, exclusive: bool = True, timeout: float = LOCK_TIMEOUT) -> bool:
+    """Take a flock on fd, waiting at most timeout seconds."""
+    if fcntl is None:
+        return True
+    mode = (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB
+    deadline = time.monotonic() + timeout
+    delay = 0.0005
+    while True:
+        try:
+            fcntl.flock(fd, mode)
+            return True
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.02)
+
+
+def _append_fd(path: Path, data: bytes):
+    """Append data with a single O_APPEND write, atomic with respect to other appenders."""
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def overflow_path(log_path: Path) -> Path:
+    """Where entries go when log_path stays locked too long."""
+    return log_path.with_name(f"{log_path.stem}.overflow.jsonl")
+
+
+def _open_locked(log_path: Path):
+    """Open and exclusively lock log_path; returns None if the lock wait timed out."""
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        fd = os.open(log_path, os.O_RDWR | os.O_CREAT, 0o644)
+        if not _lock(fd, timeout=max(0.0, deadline - time.monotonic())):
+            os.close(fd)
+            return None
+        # Another writer may have moved a corrupt log aside while we waited
+        try:
+            if os.fstat(fd).st_ino == os.stat(log_path).st_ino:
+                return fd
+        except FileNotFoundError:
+            pass
+        os.close(fd)
+
+
+def _append_json(log_path: Path, item: bytes):
+    """Append one encoded JSON value to the array in log_path."""
+    item = item.strip()
+    fd = _open_locked(log_path)
+    if fd is None:
+        _append_fd(overflow_path(log_path), item.replace(b"\n", b" ") + b"\n")
+        return
+    try:
+        size = os.fstat(fd).st_size
+        tail_start = max(0, size - _TAIL_BYTES)
+        tail = os.pread(fd, size - tail_start, tail_start).rstrip(_WHITESPACE)
+
+        if not tail:
+            os.pwrite(fd, b"[" + item + b"]", 0)
+            os.ftruncate(fd, len(item) + 2)
+            return
+        if not tail.endswith(b"]"):
+            # Keep what is there for inspection and start a new array
+            os.rename(log_path, log_path.with_name(f"{log_path.name}.corrupt-{time.strftime('%Y%m%dT%H%M%S')}"))
+            _append_json(log_path, item)
+            return
+
+        close_at = tail_start + len(tail) - 1
+        # No value can end in "[", so "[" before the bracket means an empty array
+        separator = b"" if tail[:-1].rstrip(_WHITESPACE).endswith(b"[") else b","
+        os.pwrite(fd, separator + item + b"]", close_at)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: Path, data: bytes):
+    """Replace a file's content so readers and concurrent writers never see a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=Path(path).parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
+
+def append_session_log(session_id: str, log_name: str, entry: Dict[str, Any]) -> Path:
+    """
+    Append an entry to a session's log file.
+
+    Large string fields are moved to the blob store first so the same
+    file content is not copied into every log.
+
+    Args:
+        session_id: The Claude session ID
+        log_name: Log file name inside the session directory, e.g. 'stop.json'
+        entry: The hook input data to record
+
+    Returns:
+        Path of the log file that was written
+    """
+    # Ensure session log directory exists
+    log_dir = ensure_session_log_dir(session_id)
+    log_path = log_dir / log_name
+    entry = externalize({**entry, LOGGED_AT_KEY: _now_ms()})
+
+    if codec.LOG_FORMAT == "msgpack" and codec.msgpack_available():
+        # Binary logs are a stream of records, so appending never rewrites the file
+        log_path = log_path.with_suffix(".msgpack")
+        _append_fd(log_path, codec.pack_record(entry))
+        return log_path
+
+    _append_json(log_path, codec.dumpb(entry))
+    return log_path
+
+
+def append_raw_session_log(session_id: str, log_name: str, raw: bytes) -> Path:
+    """
+    Append an undecoded JSON document to a session's log file.
+
+    When the document is too small for any field to need the blob store it
+    is appended without re-encoding, so hooks that only selected a few fields from stdin
+    never decode the whole input. Otherwise this falls back to
+    append_session_log().
+
+    Args:
+        session_id: The Claude session ID
+        log_name: Log file name inside the session directory
+        raw: A complete JSON object, e.g. the hook's stdin bytes
+
+    Returns:
+        Path of the log file that was written
+    """
+    needs_decode = BLOB_THRESHOLD > 0 and len(raw) >= BLOB_THRESHOLD
+    if needs_decode or (codec.LOG_FORMAT == "msgpack" and codec.msgpack_available()):
+        return append_session_log(session_id, log_name, codec.loads(raw))
+
+    log_path = ensure_session_log_dir(session_id) / log_name
+    # Stamp the entry by splicing the key in after the opening brace
+    body = raw.strip()[1:].lstrip()
+    stamp = b'{"%s":%d' % (LOGGED_AT_KEY.encode(), _now_ms())
+    _append_json(log_path, stamp + (b"}" if body == b"}" else b"," + body))
+    return log_path
+
+
+def read_session_log(log_path: Path) -> List[Dict[str, Any]]:
+    """
+    Read every entry from a session log file in either format.
+
+    Args:
+        log_path: Path to a .json or .msgpack session log
+
+    Returns:
+        List of logged entries, including overflow entries, empty if the
+        file is missing or unreadable
+    """
+    log_path = Path(log_path)
+    if log_path.suffix == ".msgpack":
+        return list(codec.iter_records(log_path.read_bytes())) if log_path.exists() else []
+
+    entries = []
+    if log_path.exists():
+        fd = os.open(log_path, os.O_RDONLY)
+        try:
+            # A shared lock keeps in-progress appends out of the read
+            _lock(fd, exclusive=False)
+            data = os.read(fd, os.fstat(fd).st_size)
+        finally:
+            os.close(fd)
+        try:
+            entries = codec.loads(data)
+        except (json.JSONDecodeError, ValueError):
+            entries = []
+
+    overflow = overflow_path(log_path)
+    if overflow.exists():
+        for line in overflow.read_bytes().splitlines():
+            try:
+                entries.append(codec.loads(line))
+            except (json.JSONDecodeError, ValueError):
+                pass  # Skip a line cut short by a crash
+    return entries
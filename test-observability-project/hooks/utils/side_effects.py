@@ -0,0 +1,234 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Deadline-bounded side effects, run after the hook has returned.
+
+Claude Code waits for a hook to exit before it continues. TTS, LLM
+completion messages, chat export and digest folds are not needed for that,
+so hooks hand them to this module instead of running them:
+
+    side_effects.arm_deadline()                # hard limit on the hook itself
+    side_effects.defer('announce', announce_completion)
+    ...
+    side_effects.run_detached()                # just before exiting
+
+run_detached() double-forks one worker for all deferred jobs. The worker
+is in a session of its own with stdio on /dev/null, so the hook exits and
+Claude Code reads its output at once. The worker runs the jobs in order
+and is killed, with any TTS or LLM subprocess it started, once it has run
+for CLAUDE_HOOKS_SIDE_EFFECT_DEADLINE seconds (default 30).
+
+arm_deadline() makes the hook itself exit after CLAUDE_HOOKS_DEADLINE
+seconds (default 8), whatever it is waiting on, with code 0 unless the
+event was already blocked.
+
+Both overruns are counted in the hook metrics, as
+claude_hook_deadline_overruns_total and
+claude_hook_side_effect_overruns_total. Worker job timings are recorded
+under hook="side_effects" with the job name as the stage.
+
+Set CLAUDE_HOOKS_DETACH=0 to run deferred jobs in the hook process instead.
+Where os.fork is missing (Windows) they always run there.
+"""
+
+import os
+import signal
+import sys
+import threading
+from typing import Any, Callable, List, Optional, Tuple
+
+try:
+    from utils import metrics
+except ImportError:  # Running this file directly as a script
+    import metrics
+
+HOOK_DEADLINE = float(os.environ.get("CLAUDE_HOOKS_DEADLINE", "8"))
+SIDE_EFFECT_DEADLINE = float(os.environ.get("CLAUDE_HOOKS_SIDE_EFFECT_DEADLINE", "30"))
+DETACH = os.environ.get("CLAUDE_HOOKS_DETACH", "1") != "0" and hasattr(os, "fork")
+
+# (name, function, args, kwargs) in the order they were deferred
+_jobs: List[Tuple[str, Callable, tuple, dict]] = []
+# How many of _jobs, at the front, were queued with defer_first()
+_first_jobs = 0
+_jobs_lock = threading.Lock()
+_deadline: Optional[threading.Timer] = None
+
+
+def defer(name: str, fn: Callable, *args: Any, **kwargs: Any):
+    """
+    Queue fn(*args, **kwargs) for the side-effect worker.
+
+    Args:
+        name: Job name, the worker's stage label in the metrics
+        fn: Function to call; its return value and exceptions are ignored
+    """
+    with _jobs_lock:
+        _jobs.append((name, fn, args, kwargs))
+
+
+def defer_first(name: str, fn: Callable, *args: Any, **kwargs: Any):
+    """
+    Queue a job like defer(), ahead of every job queued with defer().
+
+    For jobs that must not wait behind TTS or LLM calls, such as sending a
+    coalesced event; jobs queued with defer_first() keep their order.
+    """
+    global _first_jobs
+    with _jobs_lock:
+        _jobs.insert(_first_jobs, (name, fn, args, kwargs))
+        _first_jobs += 1
+
+
+def _overrun(exit_code: int):
+    """Exit the hook at its deadline, after recording the overrun."""
+    metrics.incr("claude_hook_deadline_overruns_total")
+    metrics.set_outcome("deadline")
+    recorder = metrics.current()
+    if recorder is not None:
+        try:
+            recorder.flush()
+        except Exception:
+            pass
+    # Deferred jobs are dropped rather than delay the hook further
+    os._exit(exit_code)
+
+
+def arm_deadline(seconds: Optional[float] = None, exit_code: int = 0):
+    """
+    Exit the hook process once it has run this long.
+
+    Args:
+        seconds: Wall-clock limit from now, defaults to CLAUDE_HOOKS_DEADLINE;
+            0 or less disables the deadline
+        exit_code: Exit code at the deadline, e.g. 2 if the event is
+            already blocked
+    """
+    global _deadline
+    seconds = HOOK_DEADLINE if seconds is None else seconds
+    if seconds <= 0 or _deadline is not None:
+        return
+    _deadline = threading.Timer(seconds, _overrun, args=(exit_code,))
+    _deadline.daemon = True
+    _deadline.start()
+
+
+def disarm_deadline():
+    """Cancel the deadline set by arm_deadline()."""
+    global _deadline
+    if _deadline is not None:
+        _deadline.cancel()
+        _deadline = None
+
+
+def _run_jobs(jobs: List[Tuple[str, Callable, tuple, dict]]):
+    for name, fn, args, kwargs in jobs:
+        with metrics.span(name):
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                metrics.set_outcome("error")
+
+
+def _worker_overrun(signum, frame):
+    metrics.incr("claude_hook_side_effect_overruns_total")
+    metrics.set_outcome("deadline")
+    try:
+        metrics.current().flush()
+    finally:
+        # Take down any TTS or LLM subprocess with the worker
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        os.killpg(os.getpgrp(), signal.SIGTERM)
+        os._exit(0)
+
+
+def _worker(jobs: List[Tuple[str, Callable, tuple, dict]], event_type: str):
+    """Body of the detached grandchild: run the jobs under the side-effect deadline, then exit."""
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.close(devnull)
+
+    # Timings go to a recorder of the worker's own, not the hook's inherited one
+    metrics.restart("side_effects", event_type)
+    if SIDE_EFFECT_DEADLINE > 0:
+        signal.signal(signal.SIGALRM, _worker_overrun)
+        signal.setitimer(signal.ITIMER_REAL, SIDE_EFFECT_DEADLINE)
+    _run_jobs(jobs)
+    signal.setitimer(signal.ITIMER_REAL, 0)
+    metrics.current().flush()
+
+
+def run_detached() -> Optional[int]:
+    """
+    Run the deferred jobs in a detached worker and return at once.
+
+    Call it from the hook's main thread, once its other threads are done:
+    a forked worker gets a copy of only the calling thread, and of any lock
+    another thread holds at that moment.
+
+    Returns:
+        The worker's pid, or None if there were no jobs or they ran in
+        this process (CLAUDE_HOOKS_DETACH=0, no os.fork, fork failed)
+    """
+    global _first_jobs
+    with _jobs_lock:
+        jobs = list(_jobs)
+        _jobs.clear()
+        _first_jobs = 0
+    if not jobs:
+        return None
+    if not DETACH:
+        _run_jobs(jobs)
+        return None
+
+    recorder = metrics.current()
+    event_type = recorder.event_type if recorder is not None else ""
+    # Buffered output would otherwise be written again by the worker
+    sys.stdout.flush()
+    sys.stderr.flush()
+    read_fd, write_fd = os.pipe()
+    with metrics.span("detach"):
+        try:
+            pid = os.fork()
+        except OSError:
+            os.close(read_fd)
+            os.close(write_fd)
+            _run_jobs(jobs)
+            return None
+        if pid == 0:
+            # First child: leave the hook's session, so Claude Code cannot wait on
+            # or signal the worker, and exit so the worker is reparented to init
+            status = 0
+            try:
+                os.close(read_fd)
+                os.setsid()
+                worker_pid = os.fork()
+                if worker_pid == 0:
+                    os.close(write_fd)
+                    try:
+                        _worker(jobs, event_type)
+                    finally:
+                        os._exit(0)
+                os.write(write_fd, str(worker_pid).encode())
+            except BaseException:
+                status = 1
+            finally:
+                os._exit(status)
+
+        os.close(write_fd)
+        try:
+            worker_pid = int(os.read(read_fd, 32) or 0) or None
+        except ValueError:
+            worker_pid = None
+        finally:
+            os.close(read_fd)
+        os.waitpid(pid, 0)
+    if worker_pid is None:
+        metrics.set_outcome("detach_failed")
+        _run_jobs(jobs)
+        return None
+    metrics.incr("claude_hook_side_effects_detached_total", len(jobs))
+    return worker_pid
@@ -0,0 +1,87 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Shared connection handling for the hooks' small SQLite state databases.
+
+pending_calls, rollup, ratelimit and digest each keep their state in a
+database of their own under logs/. A StateDB opens it lazily, once per
+process, in WAL mode with a short busy timeout, so hook processes writing
+at the same time wait on each other briefly instead of failing:
+
+    _db = StateDB(DIGEST_DB, _SCHEMA)
+    with _db.lock:
+        conn = _db.connect()
+        ...
+
+The connection is shared by the dispatcher's handler threads; hold lock
+while using it. A forked child (the side-effect worker) opens a connection
+of its own on first use.
+"""
+
+import os
+import sqlite3
+import threading
+import weakref
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Every StateDB in the process, to drop their connections in a forked child
+_databases: "weakref.WeakSet[StateDB]" = weakref.WeakSet()
+
+
+class StateDB:
+    """One SQLite state database, opened on first use."""
+
+    def __init__(self, path: str, schema: str, columns: Optional[Dict[str, List[str]]] = None):
+        """
+        Args:
+            path: Database file; its directory is created on first use
+            schema: CREATE ... IF NOT EXISTS statements, run on every open
+            columns: Column definitions per table added after its schema
+                first shipped, e.g. {"pending": ["lease_id INTEGER NOT NULL DEFAULT 0"]};
+                an existing database missing one gets it with ALTER TABLE
+        """
+        self.path = path
+        self.schema = schema
+        self.columns = columns or {}
+        self.lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Connections inherited across fork: never used, and kept open, since
+        # closing one in the child can checkpoint or delete the parent's WAL
+        self._inherited: List[sqlite3.Connection] = []
+        _databases.add(self)
+
+    def connect(self) -> sqlite3.Connection:
+        """The process's connection, in autocommit mode; call it with lock held."""
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.schema)
+            for table, definitions in self.columns.items():
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                for definition in definitions:
+                    if definition.split()[0] not in existing:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {definition}")
+            self._conn = conn
+        return self._conn
+
+    def _after_fork(self):
+        if self._conn is not None:
+            self._inherited.append(self._conn)
+            self._conn = None
+        # The thread that held the lock at fork does not exist in the child
+        self.lock = threading.Lock()
+
+
+def _after_fork():
+    for db in list(_databases):
+        db._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
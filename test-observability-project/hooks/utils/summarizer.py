@@ -7,28 +7,25 @@
 # ]
 # ///
 
-import json
 from typing import Optional, Dict, Any
-from .llm.anth import prompt_llm
+from . import ratelimit
+from .compactor import compact_payload
+from .llm.anth import prompt_llm_first_line
+from .llm.clients import CHARS_PER_TOKEN, anthropic_client
 
+# Provider of the summaries, and so their rate limit bucket
+SUMMARY_PROVIDER = "anthropic"
+# Output token limit of the summary call
+SUMMARY_MAX_TOKENS = 100
 
-def generate_event_summary(event_data: Dict[str, Any]) -> Optional[str]:
-    """
-    Generate a concise one-sentence summary of a hook event for engineers.
 
-    Args:
-        event_data: The hook event data containing event_type, payload, etc.
-
-    Returns:
-        str: A one-sentence summary, or None if generation fails
-    """
+def _summary_prompt(event_data: Dict[str, Any]) -> str:
+    """The prompt asking for a summary of event_data."""
     event_type = event_data.get("hook_event_type", "Unknown")
     payload = event_data.get("payload", {})
 
-    # Convert payload to string representation
-    payload_str = json.dumps(payload, indent=2)
-    if len(payload_str) > 1000:
-        payload_str = payload_str[:1000] + "..."
+    # Salient fields first, within the token budget
+    payload_str = compact_payload(event_type, payload)
 
     prompt = f"""Generate a one-sentence summary of this Claude Code hook event payload for an engineer monitoring the system.
 
@@ -53,14 +50,51 @@ Examples:
 - Agent responds with implementation plan
 
 Generate the summary based on the payload:"""
+    return prompt
+
+
+def reserve_summary(event_data: Dict[str, Any]) -> Optional[float]:
+    """
+    Reserve a rate limit slot for summarizing event_data later (DEFER policy).
+
+    Args:
+        event_data: The hook event data containing event_type, payload, etc.
+
+    Returns:
+        Seconds until the reserved slot, 0.0 to summarize now, or None if
+        no slot is free within the maximum wait or there is no client to
+        make the call (no API key), in which case no slot is taken
+    """
+    try:
+        client = anthropic_client()
+    except ImportError:  # anthropic is not installed
+        client = None
+    if client is None:
+        return None
+    tokens = len(_summary_prompt(event_data)) // CHARS_PER_TOKEN + SUMMARY_MAX_TOKENS
+    return ratelimit.acquire(SUMMARY_PROVIDER, tokens, ratelimit.DEFER)
+
+
+def generate_event_summary(event_data: Dict[str, Any], rate_policy: Optional[str] = None) -> Optional[str]:
+    """
+    Generate a concise one-sentence summary of a hook event for engineers.
+
+    Args:
+        event_data: The hook event data containing event_type, payload, etc.
+        rate_policy: ratelimit.WAIT, SKIP or ACQUIRED (slot from
+            reserve_summary()), defaults to CLAUDE_HOOKS_LLM_RATE_POLICY
+
+    Returns:
+        str: A one-sentence summary, or None if generation fails or is rate limited
+    """
+    prompt = _summary_prompt(event_data)
 
-    summary = prompt_llm(prompt)
+    # Only the first line is kept, so stop the stream once it is complete
+    summary = prompt_llm_first_line(prompt, max_chars=120, rate_policy=rate_policy)
 
     # Clean up the response
     if summary:
         summary = summary.strip().strip('"').strip("'").strip(".")
-        # Take only the first line if multiple
-        summary = summary.split("\n")[0].strip()
         # Ensure it's not too long
         if len(summary) > 100:
             summary = summary[:97] + "..."
@@ -0,0 +1,250 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+OTLP trace export linking hook processes into per-session traces.
+
+Every hook runs in its own process, so spans are linked through ids derived
+from the hook input rather than through in-memory context:
+
+- trace id: derived from session_id, one trace per Claude session
+- session span: a root anchor emitted the first time a session is seen
+- tool call span: derived from tool_use_id, started at PreToolUse in the
+  pending-call index and emitted by one hook that sees the PostToolUse
+- hook span: one per hook process, child of its tool call span (or of the
+  session span), with one child span per metrics.span() stage
+
+Set CLAUDE_HOOKS_OTLP_FILE to append OTLP/JSON export requests to a file
+(one per line, as the collector's file receiver expects), and/or
+CLAUDE_HOOKS_OTLP_ENDPOINT to POST them to a local collector, e.g.
+http://localhost:4318/v1/traces.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utils import metrics, pending_calls
+from utils.constants import LOG_BASE_DIR
+
+OTLP_FILE = os.environ.get("CLAUDE_HOOKS_OTLP_FILE", "")
+OTLP_ENDPOINT = os.environ.get("CLAUDE_HOOKS_OTLP_ENDPOINT", "")
+SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "claude-code-hooks")
+
+# Start markers for sessions
+TRACE_STATE_DIR = Path(LOG_BASE_DIR) / ".traces"
+
+SPAN_KIND_INTERNAL = 1
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+def enabled() -> bool:
+    """Check whether any trace exporter is configured."""
+    return bool(OTLP_FILE or OTLP_ENDPOINT)
+
+
+def trace_id_for(session_id: str) -> str:
+    """Derive the 128-bit trace id for a session."""
+    return hashlib.sha256(f"session:{session_id}".encode()).hexdigest()[:32]
+
+
+def session_span_id(session_id: str) -> str:
+    """Derive the span id of a session's root span."""
+    return hashlib.sha256(f"session-span:{session_id}".encode()).hexdigest()[:16]
+
+
+def tool_span_id(tool_use_id: str) -> str:
+    """Derive the span id of a tool call span."""
+    return hashlib.sha256(f"tool:{tool_use_id}".encode()).hexdigest()[:16]
+
+
+def _random_span_id() -> str:
+    return os.urandom(8).hex()
+
+
+def _attributes(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+    attributes = []
+    for key, value in values.items():
+        if value is None or value == "":
+            continue
+        if isinstance(value, bool):
+            attributes.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            attributes.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            attributes.append({"key": key, "value": {"doubleValue": value}})
+        else:
+            attributes.append({"key": key, "value": {"stringValue": str(value)}})
+    return attributes
+
+
+def make_span(trace_id: str, span_id: str, parent_id: Optional[str], name: str,
+              start_ns: int, end_ns: int, attributes: Optional[Dict[str, Any]] = None,
+              error: bool = False) -> Dict[str, Any]:
+    """Build one span in OTLP/JSON form."""
+    span = {
+        "traceId": trace_id,
+        "spanId": span_id,
+        "name": name,
+        "kind": SPAN_KIND_INTERNAL,
+        "startTimeUnixNano": str(start_ns),
+        "endTimeUnixNano": str(max(end_ns, start_ns)),
+        "attributes": _attributes(attributes or {}),
+        "status": {"code": STATUS_ERROR if error else STATUS_OK},
+    }
+    if parent_id:
+        span["parentSpanId"] = parent_id
+    return span
+
+
+def export(spans: List[Dict[str, Any]]):
+    """Send spans to the configured file and/or collector; never raises."""
+    if not spans:
+        return
+    request = {
+        "resourceSpans": [{
+            "resource": {"attributes": _attributes({"service.name": SERVICE_NAME})},
+            "scopeSpans": [{"scope": {"name": "claude-code-hooks"}, "spans": spans}],
+        }]
+    }
+    body = json.dumps(request, separators=(",", ":")).encode("utf-8")
+
+    if OTLP_FILE:
+        try:
+            Path(OTLP_FILE).parent.mkdir(parents=True, exist_ok=True)
+            # A single O_APPEND write keeps concurrent hook processes from interleaving
+            fd = os.open(OTLP_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, body + b"\n")
+            finally:
+                os.close(fd)
+        except OSError as e:
+            print(f"Failed to write traces: {e}", file=sys.stderr)
+
+    if OTLP_ENDPOINT:
+        # Imported here: urllib.request costs every hook ~35 ms to import, and most never export
+        import urllib.request
+
+        try:
+            req = urllib.request.Request(
+                OTLP_ENDPOINT, data=body, headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(req, timeout=1):
+                pass
+        except Exception as e:
+            print(f"Failed to export traces: {e}", file=sys.stderr)
+
+
+def _create_marker(path: Path, start_ns: int) -> bool:
+    """Create a start marker; returns False if another process already did."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as f:
+        f.write(str(start_ns))
+    return True
+
+
+class HookTrace:
+    """Trace context for one hook process."""
+
+    def __init__(self, session_id: str, tool_use_id: str = "", tool_name: str = ""):
+        self.session_id = session_id or "unknown"
+        self.tool_use_id = tool_use_id
+        self.tool_name = tool_name
+        self.trace_id = trace_id_for(self.session_id)
+        self.parent_id = tool_span_id(tool_use_id) if tool_use_id else session_span_id(self.session_id)
+        self._exported = False
+
+    def finish(self):
+        """Export this process's spans; called automatically at exit."""
+        if self._exported:
+            return
+        self._exported = True
+        recorder = metrics.current()
+        if recorder is None:
+            return
+
+        now_ns = time.time_ns()
+        spans = []
+        event_type = recorder.event_type
+
+        # The session root is emitted once, by the first hook to see the session
+        session_marker = TRACE_STATE_DIR / "sessions" / self.session_id
+        if _create_marker(session_marker, recorder.start_ns):
+            spans.append(make_span(
+                self.trace_id, session_span_id(self.session_id), None,
+                f"session {self.session_id}", recorder.start_ns, recorder.start_ns,
+                {"session.id": self.session_id}))
+
+        if self.tool_use_id:
+            if event_type == "PreToolUse":
+                pending_calls.record_start(self.tool_use_id, self.session_id, self.tool_name,
+                                           recorder.start_ns)
+            elif event_type == "PostToolUse":
+                call = pending_calls.resolve(self.tool_use_id, recorder.start_ns)
+                if call is not None and pending_calls.claim_trace(self.tool_use_id):
+                    spans.append(make_span(
+                        self.trace_id, tool_span_id(self.tool_use_id),
+                        session_span_id(self.session_id), f"tool {self.tool_name}",
+                        call["started_ns"], call["ended_ns"],
+                        {"tool.name": self.tool_name, "tool.use_id": self.tool_use_id,
+                         "tool.duration_ms": call["duration_ms"], "session.id": self.session_id}))
+
+        hook_span_id = _random_span_id()
+        spans.append(make_span(
+            self.trace_id, hook_span_id, self.parent_id, f"{recorder.hook} {event_type}",
+            recorder.start_ns, now_ns,
+            {"hook.name": recorder.hook, "hook.event_type": event_type,
+             "hook.outcome": recorder.outcome, "tool.name": self.tool_name,
+             "session.id": self.session_id},
+            error=recorder.outcome == "error"))
+
+        for stage, start_ns, duration in recorder.spans:
+            spans.append(make_span(
+                self.trace_id, _random_span_id(), hook_span_id, stage,
+                start_ns, start_ns + int(duration * 1e9), {"hook.stage": stage}))
+
+        export(spans)
+
+
+_current: Optional[HookTrace] = None
+
+
+def bind(session_id: str, tool_use_id: str = "", tool_name: str = "") -> Optional[HookTrace]:
+    """
+    Attach this hook process to its session trace.
+
+    Call after the hook input is parsed and after metrics.start(). Spans are
+    exported when the process exits.
+
+    Args:
+        session_id: The Claude session ID
+        tool_use_id: The tool call ID, for PreToolUse and PostToolUse events
+        tool_name: The tool name, for PreToolUse and PostToolUse events
+
+    Returns:
+        The process's HookTrace, or None if tracing is disabled
+    """
+    global _current
+    if not enabled():
+        return None
+    if _current is None:
+        _current = HookTrace(session_id, tool_use_id, tool_name)
+        atexit.register(_current.finish)
+    return _current
+
+
+def bind_input(input_data: Dict[str, Any]) -> Optional[HookTrace]:
+    """bind() using the ids in a decoded hook input."""
+    return bind(input_data.get("session_id", ""), input_data.get("tool_use_id", ""),
+                input_data.get("tool_name", ""))
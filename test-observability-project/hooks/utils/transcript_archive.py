@@ -0,0 +1,375 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Append-only compressed archive of a session's transcript.
+
+Claude Code rewrites its context when it compacts, so transcript history
+from before a compaction is only in the transcript file, which grows
+without bound. At each PreCompact, append_snapshot() archives what the
+transcript gained since the previous snapshot, so the archive holds every
+line once however often it is snapshotted.
+
+Two files per session, next to its logs:
+- transcript.archive: independently zlib-compressed chunks of whole lines
+  (up to CHUNK_LINES lines or CHUNK_BYTES bytes each)
+- transcript.archive.idx: one fixed-size record per chunk (archive offset,
+  line range, source offset, CRC, first and last timestamp); appending the
+  record commits the chunk
+
+A reader finds the chunks holding a line range (binary search over the
+index) or a point in time (chunk timestamps) and decompresses only those.
+A transcript that was rewritten is archived again from line 0 as a new
+run; runs are numbered by the snapshot they start in, and the latest is
+read unless another is asked for:
+
+    uv run utils/transcript_archive.py info <session_id>
+    uv run utils/transcript_archive.py show <session_id> --line 1200 --count 20
+    uv run utils/transcript_archive.py show <session_id> --at 2025-08-04T10:30:00Z
+    uv run utils/transcript_archive.py show <session_id> --run 1 --line 0
+"""
+
+import argparse
+import bisect
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: no locking
+    fcntl = None
+
+try:
+    from utils.constants import get_session_log_dir
+except ImportError:  # Running this file directly as a script
+    from constants import get_session_log_dir
+
+ARCHIVE_NAME = "transcript.archive"
+INDEX_NAME = "transcript.archive.idx"
+
+# Chunk size: small enough that one line costs little to read, large
+# enough to compress well
+CHUNK_LINES = 256
+CHUNK_BYTES = 256 * 1024
+COMPRESS_LEVEL = 6
+
+_MAGIC = b"CCTAIDX1"
+# archive_offset, compressed_len, first_line, line_count, source_offset,
+# raw_len, crc32, snapshot, archived_ms, first_ts, last_ts
+_RECORD = struct.Struct("<QIQIQIIIQdd")
+
+
+class Chunk(NamedTuple):
+    """Index record of one archived chunk."""
+
+    archive_offset: int
+    compressed_len: int
+    first_line: int
+    line_count: int
+    source_offset: int
+    raw_len: int
+    crc32: int
+    snapshot: int
+    archived_ms: int
+    first_ts: float
+    last_ts: float
+
+
+def _line_time(line: bytes) -> float:
+    """Epoch seconds of a transcript line's timestamp, or NaN."""
+    try:
+        value = json.loads(line).get("timestamp")
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, TypeError, ValueError):
+        return float("nan")
+
+
+def _chunks(data: bytes) -> Iterator[List[bytes]]:
+    """Split whole lines into chunks of at most CHUNK_LINES lines and about CHUNK_BYTES bytes."""
+    chunk: List[bytes] = []
+    size = 0
+    for line in data.splitlines(keepends=True):
+        if chunk and (len(chunk) >= CHUNK_LINES or size + len(line) > CHUNK_BYTES):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(line)
+        size += len(line)
+    if chunk:
+        yield chunk
+
+
+def _archive_dir(session_id: str) -> Path:
+    return get_session_log_dir(session_id)
+
+
+def read_index(index_path: Path) -> List[Chunk]:
+    """Read every committed chunk record; a torn last record is ignored."""
+    try:
+        data = index_path.read_bytes()
+    except FileNotFoundError:
+        return []
+    if not data.startswith(_MAGIC):
+        return []
+    end = len(_MAGIC) + (len(data) - len(_MAGIC)) // _RECORD.size * _RECORD.size
+    return [Chunk(*fields) for fields in _RECORD.iter_unpack(data[len(_MAGIC):end])]
+
+
+def _resume_offset(transcript, last: Optional[Chunk]) -> int:
+    """Source offset to archive from: after the last chunk, or 0 if the transcript was rewritten."""
+    if last is None:
+        return 0
+    transcript.seek(last.source_offset)
+    if zlib.crc32(transcript.read(last.raw_len)) != last.crc32:
+        return 0
+    return last.source_offset + last.raw_len
+
+
+def append_snapshot(session_id: str, transcript_path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """
+    Archive what the transcript gained since the last snapshot.
+
+    Only complete lines are archived; a line still being written is left
+    for the next snapshot. If the transcript no longer matches what was
+    archived (replaced or truncated), it is archived again from the start
+    as a new snapshot.
+
+    Args:
+        session_id: The Claude session ID
+        transcript_path: Path to the session's JSONL transcript
+
+    Returns:
+        Dict with snapshot, lines, raw_bytes, compressed_bytes, first_line and
+        total_lines, or None if there was nothing new to archive
+    """
+    archive_dir = _archive_dir(session_id)
+    index_path = archive_dir / INDEX_NAME
+    archive_path = archive_dir / ARCHIVE_NAME
+
+    with open(transcript_path, "rb") as transcript:
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        index_fd = os.open(index_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                # Two compactions of one session must not interleave their chunks
+                fcntl.flock(index_fd, fcntl.LOCK_EX)
+            chunks = read_index(index_path)
+            last = chunks[-1] if chunks else None
+            start = _resume_offset(transcript, last)
+            transcript.seek(start)
+            data = transcript.read()
+            return _append(index_fd, archive_path, chunks, last, start, data)
+        finally:
+            os.close(index_fd)
+
+
+def _append(index_fd: int, archive_path: Path, chunks: List[Chunk], last: Optional[Chunk],
+            start: int, data: bytes) -> Optional[Dict[str, Any]]:
+    """Write the new lines' chunks, then commit them to the index; called with the index locked."""
+    # Leave a partly written last line for the next snapshot
+    data = data[:data.rfind(b"\n") + 1]
+    if not data:
+        return None
+
+    snapshot = last.snapshot + 1 if last else 1
+    first_line = last.first_line + last.line_count if last and start else 0
+    archived_ms = int(time.time() * 1000)
+    records = []
+    compressed_total = 0
+    line_no, source_offset = first_line, start
+    with open(archive_path, "ab") as archive:
+        archive_offset = archive.seek(0, os.SEEK_END)
+        for lines in _chunks(data):
+            raw = b"".join(lines)
+            compressed = zlib.compress(raw, COMPRESS_LEVEL)
+            archive.write(compressed)
+            records.append(_RECORD.pack(
+                archive_offset, len(compressed), line_no, len(lines), source_offset, len(raw),
+                zlib.crc32(raw), snapshot, archived_ms, _line_time(lines[0]), _line_time(lines[-1])))
+            archive_offset += len(compressed)
+            compressed_total += len(compressed)
+            line_no += len(lines)
+            source_offset += len(raw)
+        archive.flush()
+        os.fsync(archive.fileno())
+
+    # Appending the records commits the chunks
+    if os.fstat(index_fd).st_size < len(_MAGIC):
+        os.ftruncate(index_fd, 0)
+        os.write(index_fd, _MAGIC)
+    else:
+        # Drop a torn record left by an interrupted snapshot
+        os.ftruncate(index_fd, len(_MAGIC) + len(chunks) * _RECORD.size)
+    os.lseek(index_fd, 0, os.SEEK_END)
+    os.write(index_fd, b"".join(records))
+    return {
+        "snapshot": snapshot,
+        "lines": line_no - first_line,
+        "raw_bytes": len(data),
+        "compressed_bytes": compressed_total,
+        "first_line": first_line,
+        "total_lines": line_no,
+    }
+
+
+class TranscriptArchive:
+    """Random-access reader of a session's transcript archive."""
+
+    def __init__(self, session_id: Optional[str] = None, directory: Optional[Union[str, Path]] = None,
+                 run: Optional[int] = None):
+        """
+        Args:
+            session_id: The Claude session ID, to find its log directory
+            directory: The directory holding the archive, instead of session_id
+            run: Run to read, numbered by the snapshot it starts in (see
+                runs()); defaults to the latest
+
+        Raises:
+            ValueError: If the archive has no such run
+        """
+        self.directory = Path(directory) if directory is not None else _archive_dir(session_id)
+        self.chunks = read_index(self.directory / INDEX_NAME)
+        # A rewritten transcript starts over at line 0, as a new run
+        self._run_starts = [i for i, chunk in enumerate(self.chunks) if chunk.first_line == 0]
+        starts = [self.chunks[i].snapshot for i in self._run_starts]
+        if run is None:
+            k = len(starts) - 1
+        elif run in starts:
+            k = starts.index(run)
+        else:
+            raise ValueError(f"No run {run} in the archive; runs: {starts}")
+        start = self._run_starts[k] if k >= 0 else 0
+        stop = self._run_starts[k + 1] if k + 1 < len(self._run_starts) else len(self.chunks)
+        self.run = starts[k] if k >= 0 else None
+        self._current = self.chunks[start:stop]
+        self._first_lines = [chunk.first_line for chunk in self._current]
+
+    def __len__(self) -> int:
+        """Number of archived lines in the run being read."""
+        last = self._current[-1] if self._current else None
+        return last.first_line + last.line_count if last else 0
+
+    def runs(self) -> List[Dict[str, Any]]:
+        """One entry per run: number (its first snapshot), last snapshot, time and length in lines."""
+        result = []
+        bounds = self._run_starts + [len(self.chunks)]
+        for start, stop in zip(bounds, bounds[1:]):
+            first, last = self.chunks[start], self.chunks[stop - 1]
+            result.append({"run": first.snapshot, "last_snapshot": last.snapshot,
+                           "archived_ms": first.archived_ms, "lines": last.first_line + last.line_count})
+        return result
+
+    def snapshots(self) -> List[Dict[str, Any]]:
+        """One entry per snapshot, of every run: number, run, time, line range and sizes."""
+        result: Dict[int, Dict[str, Any]] = {}
+        run = None
+        for chunk in self.chunks:
+            if chunk.first_line == 0:
+                run = chunk.snapshot
+            entry = result.setdefault(chunk.snapshot, {
+                "snapshot": chunk.snapshot, "run": run, "archived_ms": chunk.archived_ms,
+                "first_line": chunk.first_line, "lines": 0, "raw_bytes": 0, "compressed_bytes": 0})
+            entry["lines"] += chunk.line_count
+            entry["raw_bytes"] += chunk.raw_len
+            entry["compressed_bytes"] += chunk.compressed_len
+        return list(result.values())
+
+    def _read_chunk(self, archive, chunk: Chunk) -> List[bytes]:
+        archive.seek(chunk.archive_offset)
+        raw = zlib.decompress(archive.read(chunk.compressed_len))
+        return raw.splitlines(keepends=True)
+
+    def lines(self, start: int = 0, stop: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Raw transcript lines start..stop-1, decompressing only the chunks they are in.
+
+        Args:
+            start: First line number (0-based)
+            stop: Line number to stop before, defaults to the end
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return
+        i = max(0, bisect.bisect_right(self._first_lines, start) - 1)
+        with open(self.directory / ARCHIVE_NAME, "rb") as archive:
+            for chunk in self._current[i:]:
+                if chunk.first_line >= stop:
+                    break
+                lines = self._read_chunk(archive, chunk)
+                lo = max(start - chunk.first_line, 0)
+                hi = min(stop - chunk.first_line, chunk.line_count)
+                yield from lines[lo:hi]
+
+    def records(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Decoded transcript records start..stop-1; undecodable lines are skipped."""
+        for line in self.lines(start, stop):
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+    def line_at(self, when: float) -> int:
+        """
+        First line logged at or after a time.
+
+        Args:
+            when: Epoch seconds
+
+        Returns:
+            Line number, len(self) if everything is older
+        """
+        # Chunk times narrow it down to one or two chunks; lines without a timestamp are skipped
+        for chunk in self._current:
+            if chunk.last_ts >= when or chunk.last_ts != chunk.last_ts:
+                for offset, line in enumerate(self.lines(chunk.first_line, chunk.first_line + chunk.line_count)):
+                    if _line_time(line) >= when:
+                        return chunk.first_line + offset
+        return len(self)
+
+
+def _parse_time(value: str) -> float:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def main():
+    """Command line interface: inspect a session's transcript archive."""
+    parser = argparse.ArgumentParser(description="Read archived transcript history")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info", help="Print the archive's snapshots as JSON")
+    info.add_argument("session_id")
+    show = sub.add_parser("show", help="Print archived transcript lines")
+    show.add_argument("session_id")
+    where = show.add_mutually_exclusive_group()
+    where.add_argument("--line", type=int, default=0, help="First line number (0-based)")
+    where.add_argument("--at", help="First line at or after this ISO time")
+    show.add_argument("--count", type=int, default=20, help="Number of lines")
+    show.add_argument("--run", type=int, help="Run to read (see info), defaults to the latest")
+    args = parser.parse_args()
+
+    try:
+        archive = TranscriptArchive(args.session_id, run=getattr(args, "run", None))
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
+    if not archive.chunks:
+        print(f"No transcript archive for session {args.session_id}", file=sys.stderr)
+        sys.exit(1)
+    if args.command == "info":
+        print(json.dumps({"lines": len(archive), "runs": archive.runs(), "snapshots": archive.snapshots()},
+                         indent=2))
+        return
+    start = archive.line_at(_parse_time(args.at)) if args.at else args.line
+    for line in archive.lines(start, start + args.count):
+        sys.stdout.write(line.decode("utf-8", "replace"))
+
+
+if __name__ == "__main__":
+    main()
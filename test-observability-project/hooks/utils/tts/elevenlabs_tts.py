@@ -28,6 +28,7 @@ def main():
     - High-quality voice synthesis
     - Stable production model
     - Cost-effective for high-volume usage
+    - ELEVENLABS_BASE_URL overrides the API endpoint (e.g. tools/mock_providers.py)
     """
     
     # Load environment variables
@@ -46,7 +47,7 @@ def main():
         from elevenlabs import play
         
         # Initialize client
-        elevenlabs = ElevenLabs(api_key=api_key)
+        elevenlabs = ElevenLabs(api_key=api_key, base_url=os.getenv("ELEVENLABS_BASE_URL") or None)
         
         print("🎙️  ElevenLabs Turbo v2.5 TTS")
         print("=" * 40)
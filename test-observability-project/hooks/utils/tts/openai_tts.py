@@ -31,6 +31,7 @@ async def main():
     - Nova voice (engaging and warm)
     - Streaming audio with instructions support
     - Live audio playback via LocalAudioPlayer
+    - OPENAI_BASE_URL overrides the API endpoint (e.g. tools/mock_providers.py)
     """
 
     # Load environment variables
@@ -49,7 +50,7 @@ async def main():
         from openai.helpers import LocalAudioPlayer
 
         # Initialize OpenAI client
-        openai = AsyncOpenAI(api_key=api_key)
+        openai = AsyncOpenAI(api_key=api_key, base_url=os.getenv("OPENAI_BASE_URL") or None)
 
         print("🎙️  OpenAI TTS")
         print("=" * 20)